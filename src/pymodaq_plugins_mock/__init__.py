@@ -1,8 +1,15 @@
 from pathlib import Path
-from .utils import Config
-
-config = Config()
 
 
 with open(str(Path(__file__).parent.joinpath('resources/VERSION')), 'r') as fvers:
     __version__ = fvers.read().strip()
+
+
+def __getattr__(name: str):
+    # the config is loaded on first access, not to import pymodaq (and all the plugins it discovers) with the package
+    if name == 'config':
+        from .utils import Config
+        global config
+        config = Config()
+        return config
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Benchmarks of the mock instruments, each module can be run using python -m pymodaq_plugins_mock.benchmarks.<module>
+"""
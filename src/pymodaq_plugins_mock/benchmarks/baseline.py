@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Json baselines of the benchmarks, to detect regressions.
+
+A baseline holds the results of a benchmark as a flat mapping of metric names to values, lower being better, and
+the thresholds used to compare new results to them: a metric regresses if it is larger than its baseline value by
+more than `tolerance` (relative) and more than `min_delta` (absolute, in the unit of the metrics), the latter
+avoiding false alarms on tiny values dominated by noise.
+"""
+import json
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Union
+
+BASELINES_PATH = Path(__file__).parent.joinpath('baselines')
+
+
+class Regression(NamedTuple):
+    metric: str
+    baseline: float
+    value: float
+
+    @property
+    def ratio(self) -> float:
+        return self.value / self.baseline if self.baseline else float('inf')
+
+    def __str__(self):
+        return f'{self.metric}: {self.value:.1f} instead of {self.baseline:.1f} (x{self.ratio:.2f})'
+
+
+def machine() -> dict:
+    """Description of the machine, saved with a baseline as the results depend on it"""
+    return dict(python=sys.version.split()[0], platform=platform.platform(), processor=platform.processor(),
+                date=time.strftime('%Y-%m-%d'))
+
+
+def save_baseline(path: Union[str, Path], results: Dict[str, float], tolerance: float = 0.25,
+                  min_delta: float = 0.):
+    with open(path, 'w') as f:
+        json.dump(dict(machine=machine(), tolerance=tolerance, min_delta=min_delta,
+                       results={metric: round(value, 4) for metric, value in results.items()}), f, indent=2)
+        f.write('\n')
+
+
+def load_baseline(path: Union[str, Path]) -> dict:
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def compare(results: Dict[str, float], baseline: dict) -> List[Regression]:
+    """Get the metrics of results regressing compared to the baseline, the metrics missing in one of them being
+    ignored"""
+    regressions = []
+    for metric, reference in baseline['results'].items():
+        value = results.get(metric)
+        if value is not None and value > reference * (1 + baseline['tolerance']) and \
+                value - reference > baseline['min_delta']:
+            regressions.append(Regression(metric, reference, value))
+    return regressions
+
+
+def check(results: Dict[str, float], path: Union[str, Path]) -> bool:
+    """Print the regressions compared to the baseline saved at path, return True if there is none"""
+    baseline = load_baseline(path)
+    regressions = compare(results, baseline)
+    print(f'Compared to the baseline of {baseline["machine"]["date"]} (tolerance {baseline["tolerance"]:.0%}, '
+          f'min delta {baseline["min_delta"]:g}): {len(regressions)} regression(s)')
+    for regression in regressions:
+        print(f'    {regression}')
+    return not regressions
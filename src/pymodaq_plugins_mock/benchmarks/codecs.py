@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Benchmark of the frame codecs of the binary TCP frames on mock camera frames.
+
+The frames are those of the 2D mock (a gaussian spot modulated by fringes) digitized as a 12 bits camera would,
+with shot noise. For each codec, the compression ratio, the encoding and decoding throughputs and the latency
+added by the codec are reported, together with the total time to get a frame through a link of the given bandwidth.
+
+Usage::
+
+    python -m pymodaq_plugins_mock.benchmarks.codecs --size 1024 --levels 1 6 --workers 1 4 --link 100
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from pymodaq.utils.math_utils import gauss2D
+
+from pymodaq_plugins_mock.hardware.codecs import CODECS, decode, encode, payload_size
+
+
+def camera_frame(size: int, dtype='uint16', full_scale: int = 4095) -> np.ndarray:
+    """A frame of the 2D mock as acquired by a camera"""
+    axis = np.linspace(0, size, size, endpoint=False)
+    signal = gauss2D(axis, size / 2, size / 5, axis, size / 2, size / 3) * np.sin(axis / 4) ** 2
+    return np.clip(np.random.poisson(0.9 * full_scale * signal + 100), 0, full_scale).astype(dtype)
+
+
+def run(frame: np.ndarray, codec: str, level: int, nworkers: int, repeat: int, link_MBps: float) -> dict:
+    with ThreadPoolExecutor(nworkers) as executor:
+        out = np.empty_like(frame)
+        encoding, decoding = [], []
+        for _ in range(repeat):
+            tic = time.perf_counter()
+            payload = encode(frame, codec, level, executor=executor)
+            encoding.append(time.perf_counter() - tic)
+            data = b''.join(bytes(buffer) for buffer in payload)
+            tic = time.perf_counter()
+            decode(data, codec, out, executor)
+            decoding.append(time.perf_counter() - tic)
+    if not np.array_equal(out, frame):
+        raise RuntimeError(f'{codec} codec is not lossless')
+    encoding, decoding = float(np.median(encoding)), float(np.median(decoding))
+    size = payload_size(payload)
+    return dict(codec=codec, level=level, workers=nworkers, ratio=frame.nbytes / size,
+                encode_MB_per_s=frame.nbytes / encoding / 1e6, decode_MB_per_s=frame.nbytes / decoding / 1e6,
+                added_latency_ms=(encoding + decoding) * 1000,
+                link_ms=((encoding + decoding) + size / (link_MBps * 1e6)) * 1000)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('Usage')[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', type=int, default=1024, help='side of the square frames')
+    parser.add_argument('--dtype', default='uint16')
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 6])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--link', type=float, default=100., help='bandwidth of the link in MB/s')
+    parser.add_argument('--json', help='path of a json file where to save the results')
+    options = parser.parse_args(args)
+
+    frame = camera_frame(options.size, options.dtype)
+    results = []
+    print(f'{options.size}x{options.size} {options.dtype} frames, link of {options.link} MB/s')
+    print(f'{"codec":>13} {"level":>5} {"workers":>7} {"ratio":>6} {"enc. MB/s":>9} {"dec. MB/s":>9} '
+          f'{"added (ms)":>10} {"link (ms)":>9}')
+    for codec in CODECS:
+        for level in (options.levels if codec != 'none' else [0]):
+            for nworkers in options.workers:
+                result = run(frame, codec, level, nworkers, options.repeat, options.link)
+                results.append(result)
+                print(f'{codec:>13} {level:>5} {nworkers:>7} {result["ratio"]:6.2f} '
+                      f'{result["encode_MB_per_s"]:9.0f} {result["decode_MB_per_s"]:9.0f} '
+                      f'{result["added_latency_ms"]:10.2f} {result["link_ms"]:9.2f}')
+    if options.json:
+        with open(options.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == '__main__':
+    main()
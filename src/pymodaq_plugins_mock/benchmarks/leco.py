@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Round trip latency and throughput of the LECODirector plugins, everything running in this process: a LECO
+coordinator, a Mock plugin acting as the remote module (see :mod:`pymodaq_plugins_mock.hardware.leco_actor`) and
+the director plugin.
+
+For the viewers, the round trip is the time from grab_data to the reception of the data by the director, for the
+actuator from move_abs to move_done. The overhead is the round trip minus the time spent by the Mock plugin itself
+(the 2D Mock simulates a 100 ms exposure for instance).
+
+With --stream, the 2D director is also run with the frames published on a data stream and, with --buffer larger than
+one, requested in advance as in a continuous grab (see :mod:`pymodaq_plugins_mock.hardware.frame_stream`), the round
+trip being then the time between two frames.
+
+Usage::
+
+    python -m pymodaq_plugins_mock.benchmarks.leco --plugins 0D 1D 2D move --sizes 64 256 1024 --frames 20
+    python -m pymodaq_plugins_mock.benchmarks.leco --plugins 2D --sizes 1024 --stream 5570 --buffer 4
+"""
+import argparse
+import json
+import threading
+import time
+from functools import partial
+from typing import List, Optional
+
+import numpy as np
+from qtpy import QtCore, QtWidgets
+
+from pymodaq.utils.data import DataActuator, DataToExport
+
+from pymodaq_plugins_mock.daq_move_plugins.daq_move_LECODirector import DAQ_Move_LECODirector
+from pymodaq_plugins_mock.daq_move_plugins.daq_move_Mock import DAQ_Move_Mock
+from pymodaq_plugins_mock.daq_viewer_plugins.plugins_0D.daq_0Dviewer_LECODirector import DAQ_0DViewer_LECODirector
+from pymodaq_plugins_mock.daq_viewer_plugins.plugins_0D.daq_0Dviewer_Mock import DAQ_0DViewer_Mock
+from pymodaq_plugins_mock.daq_viewer_plugins.plugins_1D.daq_1Dviewer_LECODirector import DAQ_1DViewer_LECODirector
+from pymodaq_plugins_mock.daq_viewer_plugins.plugins_1D.daq_1Dviewer_Mock import DAQ_1DViewer_Mock
+from pymodaq_plugins_mock.daq_viewer_plugins.plugins_2D.daq_2Dviewer_LECODirector import DAQ_2DViewer_LECODirector
+from pymodaq_plugins_mock.daq_viewer_plugins.plugins_2D.daq_2Dviewer_Mock import DAQ_2DViewer_Mock
+from pymodaq_plugins_mock.benchmarks.throughput import configure
+from pymodaq_plugins_mock.hardware.leco_actor import CoordinatorThread, MockActor
+
+VIEWERS = {'0D': (DAQ_0DViewer_Mock, DAQ_0DViewer_LECODirector),
+           '1D': (DAQ_1DViewer_Mock, DAQ_1DViewer_LECODirector),
+           '2D': (DAQ_2DViewer_Mock, DAQ_2DViewer_LECODirector)}
+
+
+class Recorder:
+    """Wait for the signals of a director, connected directly as they are emitted by its listener thread or by the
+    Qt event loop, processed while waiting"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.nbytes = 0
+
+    def data(self, dte: DataToExport):
+        self.nbytes = sum(array.nbytes for dwa in dte for array in dwa)
+        self.event.set()
+
+    def status(self, status):
+        if status.command == 'move_done':
+            self.event.set()
+
+    def wait(self, trigger, timeout: float) -> float:
+        self.event.clear()
+        tic = time.perf_counter()
+        trigger()
+        while not self.event.wait(0.0005):
+            QtCore.QCoreApplication.processEvents()
+            if time.perf_counter() - tic > timeout:
+                raise TimeoutError('No answer from the actor')
+        return time.perf_counter() - tic
+
+
+def summarize(plugin: str, size: int, round_trips: List[float], nbytes: int, actor: MockActor) -> dict:
+    round_trips = np.array(round_trips)
+    p50 = float(np.percentile(round_trips, 50) * 1000)
+    return dict(plugin=plugin, size=size, count=len(round_trips), MB_per_s=nbytes * len(round_trips)
+                / round_trips.sum() / 1e6, per_s=len(round_trips) / round_trips.sum(),
+                rtt_ms_p50=p50, rtt_ms_p99=float(np.percentile(round_trips, 99) * 1000),
+                overhead_ms_p50=p50 - actor.acquisition.percentile(50) * 1000)
+
+
+def run_viewer(dim: str, size: int, count: int, port: int, timeout: float = 10., stream_port: Optional[int] = None,
+               buffer: int = 4) -> dict:
+    """Measure the round trips of a viewer director, its frames being streamed on stream_port if given (2D only) and
+    prefetched if buffer is larger than one"""
+    actor = MockActor(f'mock_actor_{dim}', VIEWERS[dim][0](), port=port,
+                      stream_address=None if stream_port is None else f'tcp://*:{stream_port}')
+    actor.start()
+    configure(actor.plugin, dim, size)
+    director = VIEWERS[dim][1]()
+    recorder = Recorder()
+    try:
+        director.settings.child('actor_name').setValue(actor.name)
+        if stream_port is not None:
+            director.settings.child('data_stream', 'use').setValue(True)
+            director.settings.child('data_stream', 'address').setValue(f'tcp://localhost:{stream_port}')
+            director.settings.child('data_stream', 'prefetch').setValue(buffer > 1)
+            director.settings.child('data_stream', 'buffer').setValue(buffer)
+        director.ini_detector()
+        director.dte_signal.connect(recorder.data, QtCore.Qt.DirectConnection)
+        grab = partial(director.grab_data, live=True)
+        recorder.wait(grab, timeout)  # warm up
+        actor.acquisition.reset()
+        round_trips = [recorder.wait(grab, timeout) for _ in range(count)]
+    finally:
+        director.close()
+        actor.stop()
+    return summarize(dim if stream_port is None else f'{dim}s', size if dim != '0D' else 1, round_trips,
+                     recorder.nbytes, actor)
+
+
+def run_actuator(count: int, port: int, timeout: float = 10.) -> dict:
+    plugin = DAQ_Move_Mock()
+    plugin.settings.child('tau').setValue(1)
+    actor = MockActor('mock_actor_move', plugin, port=port)
+    actor.start()
+    director = DAQ_Move_LECODirector()
+    recorder = Recorder()
+    try:
+        director.settings.child('actor_name').setValue(actor.name)
+        director.ini_stage()
+        director.emit_status = recorder.status  # no parent module to forward the status to
+        recorder.wait(lambda: director.move_abs(DataActuator(data=1.)), timeout)  # warm up
+        actor.acquisition.reset()
+        round_trips = [recorder.wait(lambda: director.move_abs(DataActuator(data=float(ind % 2))), timeout)
+                       for ind in range(count)]
+    finally:
+        director.close()
+        actor.stop()
+    return summarize('move', 1, round_trips, 0, actor)
+
+
+def print_result(result: dict):
+    print(f'{result["plugin"]:>6} {result["size"]:>6} {result["per_s"]:8.1f} {result["MB_per_s"]:8.2f} '
+          f'{result["rtt_ms_p50"]:13.2f} {result["rtt_ms_p99"]:13.2f} {result["overhead_ms_p50"]:13.2f}')
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('Usage')[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--plugins', nargs='+', default=['0D', '1D', '2D', 'move'],
+                        choices=['0D', '1D', '2D', 'move'])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[64, 256, 1024],
+                        help='number of points of the 1D data and side of the 2D data')
+    parser.add_argument('--frames', type=int, default=20, help='number of round trips per plugin and size')
+    parser.add_argument('--port', type=int, default=12300, help='port of the coordinator')
+    parser.add_argument('--external', action='store_true', help='use an already running coordinator')
+    parser.add_argument('--stream', type=int, help='port of the data stream, to run the 2D director with it too')
+    parser.add_argument('--buffer', type=int, default=4, help='number of frames requested in advance when streamed')
+    parser.add_argument('--json', help='path of a json file where to save the results')
+    options = parser.parse_args(args)
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])  # noqa, plugins are QObjects
+    coordinator = None
+    if not options.external:
+        coordinator = CoordinatorThread(options.port)
+        coordinator.start()
+    results = []
+    print(f'{"plugin":>6} {"size":>6} {"per s":>8} {"MB/s":>8} {"rtt p50 (ms)":>13} {"rtt p99 (ms)":>13} '
+          f'{"overhead p50":>13}')
+    try:
+        for plugin in options.plugins:
+            for size in (options.sizes if plugin in ('1D', '2D') else [1]):
+                if plugin == 'move':
+                    result = run_actuator(options.frames, options.port)
+                else:
+                    result = run_viewer(plugin, size, options.frames, options.port)
+                print_result(result)
+                results.append(result)
+                if plugin == '2D' and options.stream is not None:
+                    result = run_viewer(plugin, size, options.frames, options.port, stream_port=options.stream,
+                                        buffer=options.buffer)
+                    print_result(result)
+                    results.append(result)
+    finally:
+        if coordinator is not None:
+            coordinator.stop()
+    if options.json:
+        with open(options.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Memory footprint of the Mock viewers: each plugin is run headless (as in
+:mod:`pymodaq_plugins_mock.benchmarks.throughput`) for many grabs, the memory being traced with tracemalloc (numpy
+arrays included) and the resident set size (RSS) of the process sampled.
+
+For each plugin and frame size are reported:
+
+* steady: the memory traced since the creation of the plugin, once warmed up, data of the last grab included
+* peak per grab: the largest memory allocated during a grab on top of the steady state (temporaries of
+  average_data...)
+* garbage: the largest memory held by objects waiting for the cyclic garbage collector when the memory is sampled
+  (the pymodaq data objects being in reference cycles, the frames are freed only by the collector)
+* growth: the traced memory growth over the grabs, with its linear trend per grab, the memory being sampled after a
+  garbage collection. A leak is reported if the memory grew by more than --leak-bytes with a positive trend
+* RSS at the end, and its growth over the grabs
+
+The steady, peak, garbage and RSS memories (in MB) can be saved as a json baseline, and compared to it with thresholds (see
+:mod:`pymodaq_plugins_mock.benchmarks.baseline`), the exit code being 1 in case of regression or leak.
+
+Usage::
+
+    python -m pymodaq_plugins_mock.benchmarks.memory --plugins 0D 1D --grabs 5000
+    python -m pymodaq_plugins_mock.benchmarks.memory --plugins 2D ND --sizes 256 1024 --grabs 200
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from typing import Dict, List, Optional
+
+import numpy as np
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from qtpy import QtCore, QtWidgets  # noqa: E402
+
+from pymodaq.utils.data import DataToExport  # noqa: E402
+
+from pymodaq_plugins_mock.benchmarks.baseline import BASELINES_PATH, check, save_baseline  # noqa: E402
+from pymodaq_plugins_mock.benchmarks.throughput import DIMS, configure, has_dtype  # noqa: E402
+from pymodaq_plugins_mock.manifest import load_plugin  # noqa: E402
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+MB = 1e6
+
+
+def rss_bytes() -> Optional[int]:
+    """Resident set size of this process, None if it cannot be known (no /proc and no psutil)"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class Sink:
+    """Keep only the last data emitted, as a viewer displaying them would"""
+
+    def __init__(self):
+        self.data: DataToExport = None
+
+    def __call__(self, dte: DataToExport):
+        self.data = dte
+
+
+def measure(plugin, grabs: int, naverage: int = 1, warmup: int = 3, interval: int = 0,
+            leak_bytes: int = 64 * 1024) -> dict:
+    """Trace the memory of an initialized viewer plugin during grabs
+
+    tracemalloc should have been started before the creation of the plugin, for its memory to be traced.
+
+    Parameters
+    ----------
+    plugin: DAQ_Viewer_base
+    grabs: int
+    naverage: int
+    warmup: int
+        number of grabs before the measure, the caches of the plugin and of numpy being filled
+    interval: int
+        the memory is sampled every interval grabs, by default grabs // 50
+    leak_bytes: int
+        growth of the traced memory above which a leak is reported
+    """
+    if not tracemalloc.is_tracing():
+        raise RuntimeError('tracemalloc should be started before creating the plugin')
+    interval = interval or max(1, grabs // 50)
+    sink = Sink()
+    plugin.dte_signal.connect(sink, QtCore.Qt.DirectConnection)
+    try:
+        for _ in range(warmup):
+            plugin.grab_data(Naverage=naverage)
+        gc.collect()
+        steady = tracemalloc.get_traced_memory()[0]
+        rss_start = rss_bytes()
+        samples, peak, garbage = [], 0, 0
+        for ind in range(grabs):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            plugin.grab_data(Naverage=naverage)
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+            if ind % interval == 0 or ind == grabs - 1:
+                uncollected = tracemalloc.get_traced_memory()[0]
+                gc.collect()
+                samples.append((ind, tracemalloc.get_traced_memory()[0]))
+                garbage = max(garbage, uncollected - samples[-1][1])
+        end = samples[-1][1]
+        rss_end = rss_bytes()
+    finally:
+        plugin.dte_signal.disconnect(sink)
+    indexes, memories = np.array(samples, dtype=float).T
+    trend = float(np.polyfit(indexes, memories, 1)[0]) if len(samples) > 2 else 0.
+    growth = end - steady
+    return dict(grabs=grabs, naverage=naverage, steady_MB=steady / MB, peak_per_grab_MB=peak / MB,
+                garbage_MB=garbage / MB, growth_bytes=growth, trend_bytes_per_grab=trend, leak=bool(growth > leak_bytes and trend > 0),
+                rss_MB=None if rss_end is None else rss_end / MB,
+                rss_growth_MB=None if rss_end is None or rss_start is None else (rss_end - rss_start) / MB)
+
+
+def run_viewer(dim: str, size: int, grabs: int, naverage: int = 1, dtype: str = None, nd_nt: int = 32,
+               **kwargs) -> dict:
+    """Measure the memory of a Mock viewer, kwargs being passed to measure"""
+    klass = load_plugin(f'daq_{dim}viewer', 'Mock')
+    tracemalloc.start()
+    plugin = klass()
+    try:
+        plugin.ini_detector()
+        configure(plugin, dim, size, dtype, nd_nt)
+        result = measure(plugin, grabs, naverage, **kwargs)
+    finally:
+        plugin.close()
+        tracemalloc.stop()
+    return dict(plugin=dim, size=size if dim != '0D' else 1, dtype=dtype, **result)
+
+
+def metrics(results: List[dict]) -> Dict[str, float]:
+    """Flatten the results into the metrics of a baseline, all in MB"""
+    flat = {}
+    for result in results:
+        point = f'{result["plugin"]}/{result["size"]}/{result["naverage"]}/{result["dtype"]}'
+        for key in ('steady_MB', 'peak_per_grab_MB', 'garbage_MB', 'rss_MB'):
+            if result[key] is not None:
+                flat[f'{point}:{key}'] = result[key]
+    return flat
+
+
+def print_result(result: dict):
+    rss = '' if result['rss_MB'] is None else f'{result["rss_MB"]:9.1f} {result["rss_growth_MB"]:9.2f}'
+    print(f'{result["plugin"]:>6} {result["size"]:>6} {result["grabs"]:>6} {result["steady_MB"]:9.2f} '
+          f'{result["peak_per_grab_MB"]:9.2f} {result["garbage_MB"]:10.2f} {result["growth_bytes"] / 1e3:10.1f} '
+          f'{result["trend_bytes_per_grab"]:9.1f} {"LEAK" if result["leak"] else "ok":>5} {rss}')
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('Usage')[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--plugins', nargs='+', default=DIMS, choices=DIMS)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[64, 256, 1024])
+    parser.add_argument('--nd-sizes', type=int, nargs='+', default=[32, 64], help='spatial sizes of the ND data')
+    parser.add_argument('--nd-nt', type=int, default=32, help='temporal size of the ND data')
+    parser.add_argument('--naverage', type=int, default=1)
+    parser.add_argument('--dtype', help='data type of the plugins having a dtype setting')
+    parser.add_argument('--grabs', type=int, default=1000, help='number of grabs per plugin and size')
+    parser.add_argument('--leak-bytes', type=int, default=64 * 1024,
+                        help='growth of the traced memory above which a leak is reported')
+    parser.add_argument('--json', help='path of a json file where to save the results')
+    parser.add_argument('--baseline', nargs='?', const=str(BASELINES_PATH.joinpath('memory.json')),
+                        help='compare to this baseline, the one of the package if no path is given')
+    parser.add_argument('--save-baseline', help='path where to save the results as a baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='relative tolerance of the saved baseline')
+    parser.add_argument('--min-delta', type=float, default=1., help='absolute tolerance (MB) of the saved baseline')
+    options = parser.parse_args(args)
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])  # noqa, plugins are QObjects
+    results = []
+    print(f'{"plugin":>6} {"size":>6} {"grabs":>6} {"steady MB":>9} {"peak MB":>9} {"garbage MB":>10} {"growth kB":>10} '
+          f'{"B / grab":>9} {"leak":>5} {"RSS MB":>9} {"RSS +MB":>9}')
+    for dim in options.plugins:
+        for size in {'0D': [1], 'ND': options.nd_sizes}.get(dim, options.sizes):
+            results.append(run_viewer(dim, size, options.grabs, options.naverage,
+                                      options.dtype if has_dtype(dim) else None, options.nd_nt,
+                                      leak_bytes=options.leak_bytes))
+            print_result(results[-1])
+    if options.json:
+        with open(options.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if options.save_baseline:
+        save_baseline(options.save_baseline, metrics(results), options.tolerance, options.min_delta)
+    ok = not any(result['leak'] for result in results)
+    if options.baseline:
+        ok = check(metrics(results), options.baseline) and ok
+    if not ok:
+        sys.exit(1)
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Cold start benchmark: import time of the package and of each plugin module, and time to get each Mock plugin
+initialized, every measure being done in a fresh interpreter.
+
+The import times are measured around the import statement and detailed using python -X importtime (number of
+modules imported and the ones taking the longest). The time to initialized is split into the import of the plugin
+(including Qt and pymodaq), its instantiation and its ini_detector/ini_stage, the process time being the total, as
+seen by the caller, from the launch of the interpreter to its exit.
+
+The results (medians over --repeat runs, in ms) can be saved as a json baseline, and compared to it with thresholds
+(see :mod:`pymodaq_plugins_mock.benchmarks.baseline`), the exit code being 1 in case of regression.
+
+Usage::
+
+    python -m pymodaq_plugins_mock.benchmarks.startup --repeat 5
+    python -m pymodaq_plugins_mock.benchmarks.startup --save-baseline startup.json --tolerance 0.3 --min-delta 50
+    python -m pymodaq_plugins_mock.benchmarks.startup --baseline startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from pymodaq_plugins_mock.benchmarks.baseline import BASELINES_PATH, check, save_baseline
+from pymodaq_plugins_mock.manifest import load_manifest
+
+MARKER = '--- benchmarked import ---'
+
+IMPORT_SCRIPT = f'''
+import importlib, sys, time
+sys.stderr.write({MARKER!r} + "\\n")
+tic = time.perf_counter()
+importlib.import_module({{module!r}})
+print((time.perf_counter() - tic) * 1000)
+'''
+
+INIT_SCRIPT = '''
+import json, time
+tic = time.perf_counter()
+from qtpy import QtWidgets
+from pymodaq_plugins_mock.manifest import load_plugin
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+klass = load_plugin({plugin_type!r}, {name!r})
+imported = time.perf_counter()
+plugin = klass()
+instantiated = time.perf_counter()
+if {plugin_type!r} == 'daq_move':
+    plugin.ini_stage()
+else:
+    plugin.ini_detector()
+initialized = time.perf_counter()
+plugin.close()
+print(json.dumps(dict(import_ms=(imported - tic) * 1000, instantiate_ms=(instantiated - imported) * 1000,
+                      ini_ms=(initialized - instantiated) * 1000)))
+'''
+
+
+def run_python(script: str, *options: str) -> subprocess.CompletedProcess:
+    env = dict(os.environ)
+    env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    return subprocess.run([sys.executable, *options, '-c', script], capture_output=True, text=True, check=True,
+                          env=env)
+
+
+def parse_importtime(stderr: str) -> List[tuple]:
+    """Get the (module, self time, cumulative time, nesting level) of the imports reported by python -X importtime
+    after the marker, the times in ms"""
+    imports = []
+    lines = stderr.splitlines()
+    if MARKER in lines:
+        lines = lines[lines.index(MARKER) + 1:]
+    for line in lines:
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        imports.append((name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000,
+                        (len(name) - len(name.lstrip()) - 1) // 2))
+    return imports
+
+
+def import_time(module: str, repeat: int = 3, top: int = 5) -> dict:
+    """Import time (median) of a module in a fresh interpreter, with the modules imported by the last run"""
+    durations = []
+    for _ in range(repeat):
+        process = run_python(IMPORT_SCRIPT.format(module=module), '-X', 'importtime')
+        durations.append(float(process.stdout.split()[-1]))
+    imports = parse_importtime(process.stderr)
+    return dict(module=module, import_ms=float(np.median(durations)), modules=len(imports),
+                slowest=[(name, self_ms) for name, self_ms, *_ in sorted(imports, key=lambda entry: -entry[1])[:top]])
+
+
+def init_time(plugin_type: str, name: str, repeat: int = 3) -> dict:
+    """Time (medians) to get a plugin initialized in a fresh interpreter"""
+    runs = []
+    for _ in range(repeat):
+        tic = time.perf_counter()
+        process = run_python(INIT_SCRIPT.format(plugin_type=plugin_type, name=name))
+        runs.append(dict(json.loads(process.stdout.splitlines()[-1]), process_ms=(time.perf_counter() - tic) * 1000))
+    return dict(plugin=f'{plugin_type}_{name}', **{key: float(np.median([run[key] for run in runs]))
+                                                  for key in runs[0]})
+
+
+def plugin_modules() -> List[str]:
+    return [entry_point.split(':')[0] for plugins in load_manifest().values() for entry_point in plugins.values()]
+
+
+def mock_plugins() -> List[tuple]:
+    return [(plugin_type, name) for plugin_type, plugins in load_manifest().items() for name in plugins
+            if name.startswith('Mock')]
+
+
+def metrics(imports: List[dict], inits: List[dict]) -> Dict[str, float]:
+    """Flatten the results into the metrics of a baseline"""
+    results = {f'import:{entry["module"]}': entry['import_ms'] for entry in imports}
+    for entry in inits:
+        results.update({f'{key[:-3]}:{entry["plugin"]}': value for key, value in entry.items() if key != 'plugin'})
+    return results
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('Usage')[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3, help='number of fresh interpreters per measure')
+    parser.add_argument('--modules', nargs='*', help='modules whose import is measured, default to the package '
+                                                     'and all the plugin modules')
+    parser.add_argument('--no-init', action='store_true', help='do not measure the initialization of the Mocks')
+    parser.add_argument('--json', help='path of a json file where to save the results')
+    parser.add_argument('--baseline', nargs='?', const=str(BASELINES_PATH.joinpath('startup.json')),
+                        help='compare to this baseline, the one of the package if no path is given')
+    parser.add_argument('--save-baseline', help='path where to save the results as a baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='relative tolerance of the saved baseline')
+    parser.add_argument('--min-delta', type=float, default=30., help='absolute tolerance (ms) of the saved baseline')
+    options = parser.parse_args(args)
+
+    modules = options.modules if options.modules is not None else ['pymodaq_plugins_mock'] + plugin_modules()
+    imports = []
+    print(f'{"module":<72} {"import (ms)":>11} {"modules":>8}  slowest')
+    for module in modules:
+        imports.append(import_time(module, options.repeat))
+        print(f'{module:<72} {imports[-1]["import_ms"]:11.1f} {imports[-1]["modules"]:8d}  '
+              + ', '.join(f'{name} {self_ms:.0f}' for name, self_ms in imports[-1]['slowest'][:3]))
+    inits = []
+    if not options.no_init:
+        print(f'\n{"plugin":<24} {"import (ms)":>11} {"instantiate":>11} {"ini":>8} {"process":>8}')
+        for plugin_type, name in mock_plugins():
+            inits.append(init_time(plugin_type, name, options.repeat))
+            entry = inits[-1]
+            print(f'{entry["plugin"]:<24} {entry["import_ms"]:11.1f} {entry["instantiate_ms"]:11.1f} '
+                  f'{entry["ini_ms"]:8.1f} {entry["process_ms"]:8.1f}')
+    results = metrics(imports, inits)
+    if options.json:
+        with open(options.json, 'w') as f:
+            json.dump(dict(imports=imports, inits=inits), f, indent=2)
+    if options.save_baseline:
+        save_baseline(options.save_baseline, results, options.tolerance, options.min_delta)
+    if options.baseline and not check(results, options.baseline):
+        sys.exit(1)
+    return results
+
+
+if __name__ == '__main__':
+    main()
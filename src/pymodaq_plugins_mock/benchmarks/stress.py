@@ -0,0 +1,445 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Concurrent stress of many instruments, to find where the thread per module model of PyMoDAQ stops scaling: N Mock
+detectors and M Mock actuators run headless (offscreen Qt) at the same time, each with its own workload, for a given
+duration.
+
+In the threads mode, as in a dashboard, each instrument runs in its own QThread and emits its data to a receiver
+living in the main thread, the frames being queued to the Qt event loop of the main thread. Each received frame costs
+--consumer-ms of CPU in the main thread, as displaying it would. In the processes mode, each instrument runs the same
+way in its own (spawned) process, with its own main thread.
+
+For each instrument are reported:
+
+* the number of grabs (or moves) per second, and the MB/s emitted
+* the percentiles of the grab duration (grab_data until the data are emitted) or of the move duration (move_abs until
+  within epsilon of the target, the position being polled every --poll-ms)
+* for the detectors, the frames received by the main thread, the frames dropped (see
+  :mod:`pymodaq_plugins_mock.hardware.frame_tags`) and the percentiles of the latency from the acquisition to the
+  reception, which grows when the main thread does not keep up
+* the CPU time of the instrument thread (the threads of its prefetcher or process pool are not included), and in the
+  processes mode the resident memory (RSS) of its process
+
+and for each run the total rates, the worst latency, the CPU load of the main thread and the RSS. The number of
+detectors can be swept, the scaling being the total grab rate relative to the first run times the number of
+detectors: it drops below 1 once adding instruments no longer adds throughput.
+
+Settings of the plugins are set with --set (detectors) and --set-actuators, as path=value (the path of the setting
+in the tree, dot separated, the value being json, or a string), each setting being applied only to the instruments
+having it. For instance, exposure=0 removes the simulated exposure of the 2D Mock, and the faults.* settings inject
+latencies, drops and errors (see :mod:`pymodaq_plugins_mock.hardware.faults`).
+
+Usage::
+
+    python -m pymodaq_plugins_mock.benchmarks.stress --detectors 1 5 10 20 --dims 1D 2D --size 256 --rate 20
+    python -m pymodaq_plugins_mock.benchmarks.stress --detectors 20 --actuators 4 --consumer-ms 2 --set exposure=0
+    python -m pymodaq_plugins_mock.benchmarks.stress --mode processes --detectors 8 --dims 2D --size 1024
+    python -m pymodaq_plugins_mock.benchmarks.stress --detectors 4 --set faults.inject=true faults.seed=1 \
+        faults.distribution=pareto faults.drop_probability=0.01
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import threading
+import time
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from qtpy import QtCore, QtWidgets  # noqa: E402
+
+from pymodaq.utils.data import DataActuator, DataToExport  # noqa: E402
+
+from pymodaq_plugins_mock.benchmarks.memory import rss_bytes  # noqa: E402
+from pymodaq_plugins_mock.benchmarks.throughput import DIMS, configure  # noqa: E402
+from pymodaq_plugins_mock.hardware.frame_tags import FrameChecker  # noqa: E402
+from pymodaq_plugins_mock.hardware.stats import LatencyHistogram  # noqa: E402
+from pymodaq_plugins_mock.manifest import load_plugin  # noqa: E402
+
+MB = 1e6
+
+Settings = Tuple[Tuple[Tuple[str, ...], object], ...]
+
+
+class InstrumentSpec(NamedTuple):
+    """Workload of an instrument
+
+    kind is one of DIMS for a Mock viewer, or 'move' for the Mock actuator. rate is the number of grabs or moves per
+    second, as fast as possible if 0. settings are (path, value) applied to the plugin if it has them.
+    """
+    name: str
+    kind: str
+    size: int = 64
+    naverage: int = 1
+    rate: float = 0.
+    tau_ms: int = 10
+    poll_ms: float = 1.
+    settings: Settings = ()
+
+
+def parse_settings(items: List[str]) -> Settings:
+    """Parse path=value items, the path being dot separated and the value json or a string"""
+    settings = []
+    for item in items:
+        path, _, value = item.partition('=')
+        try:
+            value = json.loads(value)
+        except ValueError:
+            pass
+        settings.append((tuple(path.split('.')), value))
+    return tuple(settings)
+
+
+def apply_settings(plugin, settings: Settings):
+    """Set the settings the plugin has, calling commit_settings as a DAQ_Viewer or DAQ_Move would"""
+    for path, value in settings:
+        try:
+            param = plugin.settings.child(*path)
+        except KeyError:
+            continue
+        param.setValue(value)
+        plugin.commit_settings(param)
+
+
+class Receiver(QtCore.QObject):
+    """Receive the frames of a detector in the main thread, spending consumer_ms of CPU on each"""
+
+    def __init__(self, consumer_ms: float = 0.):
+        super().__init__()
+        self.consumer_s = consumer_ms * 1e-3
+        self.checker = FrameChecker()
+
+    @QtCore.Slot(object)
+    def receive(self, dte: DataToExport):
+        self.checker.check(dte)
+        end = time.perf_counter() + self.consumer_s
+        while time.perf_counter() < end:
+            pass
+
+
+class InstrumentThread(QtCore.QThread):
+    """Run the workload of an instrument, its plugin being created and closed in the thread
+
+    The thread gets ready (plugin initialized), waits for the start event, then grabs or moves until duration
+    elapsed.
+    """
+
+    def __init__(self, spec: InstrumentSpec, receiver: Receiver, start_event: threading.Event, duration: float):
+        super().__init__()
+        self.spec = spec
+        self.receiver = receiver
+        self.start_event = start_event
+        self.duration = duration
+        self.ready = threading.Event()
+        self.durations = LatencyHistogram()
+        self.events = 0
+        self.emitted = 0
+        self.nbytes = 0
+        self.elapsed = 0.
+        self.cpu_s = 0.
+        self.error: Optional[str] = None
+
+    def run(self):
+        plugin = None
+        try:
+            if self.spec.kind == 'move':
+                plugin = load_plugin('daq_move', 'Mock')()
+                plugin.settings.child('tau').setValue(self.spec.tau_ms)
+                plugin.ini_stage()
+            else:
+                plugin = load_plugin(f'daq_{self.spec.kind}viewer', 'Mock')()
+                plugin.ini_detector()
+                configure(plugin, self.spec.kind, self.spec.size)
+                plugin.dte_signal.connect(self.count, QtCore.Qt.DirectConnection)
+                plugin.dte_signal.connect(self.receiver.receive)  # queued to the main thread
+            apply_settings(plugin, self.spec.settings)
+        except Exception as e:
+            self.error = f'{type(e).__name__}: {e}'
+            return
+        finally:
+            self.ready.set()
+        self.start_event.wait()
+        try:
+            self.loop(plugin)
+        except Exception as e:
+            self.error = f'{type(e).__name__}: {e}'
+        finally:
+            plugin.close()
+
+    def count(self, dte: DataToExport):
+        self.emitted += 1
+        self.nbytes += sum(array.nbytes for dwa in dte for array in dwa)
+
+    def loop(self, plugin):
+        cpu = time.thread_time()
+        start = time.perf_counter()
+        stop = start + self.duration
+        while time.perf_counter() < stop:
+            if self.spec.rate > 0:
+                delay = start + self.events / self.spec.rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            tic = time.perf_counter()
+            if self.spec.kind == 'move':
+                self.move(plugin, self.events, stop)
+            else:
+                plugin.grab_data(Naverage=self.spec.naverage)
+            self.durations.record(time.perf_counter() - tic)
+            self.events += 1
+        self.elapsed = time.perf_counter() - start
+        self.cpu_s = time.thread_time() - cpu
+
+    def move(self, plugin, index: int, stop: float):
+        """Move back and forth over 100 epsilon until within epsilon of the target (or the end of the run)"""
+        target = (index + 1) % 2 * 100 * plugin.settings['epsilon']
+        plugin.move_abs(DataActuator(data=target))
+        while abs(plugin.get_actuator_value().value() - target) > plugin.settings['epsilon']:
+            if time.perf_counter() > stop:
+                break
+            time.sleep(self.spec.poll_ms * 1e-3)
+
+    def summary(self) -> dict:
+        spec = self.spec
+        result = dict(name=spec.name, kind=spec.kind, size=spec.size if spec.kind not in ('0D', 'move') else 1,
+                      error=self.error, events=self.events,
+                      per_s=self.events / self.elapsed if self.elapsed else 0.,
+                      MB_per_s=self.nbytes / self.elapsed / MB if self.elapsed else 0.,
+                      duration_ms={key: value for key, value in self.durations.summary().items() if key != 'count'},
+                      cpu_s=self.cpu_s, cpu_percent=100 * self.cpu_s / self.elapsed if self.elapsed else 0.,
+                      rss_MB=None)
+        if spec.kind != 'move':
+            checker = self.receiver.checker.summary()
+            result.update(emitted=self.emitted, received=checker['received'], dropped=checker['dropped'],
+                          latency_ms={key: value for key, value in checker['latency_ms'].items() if key != 'count'})
+        return result
+
+
+def run_threads(specs: List[InstrumentSpec], duration: float, consumer_ms: float = 0., timeout: float = 60.,
+                start_event: Optional[threading.Event] = None,
+                ready: Optional[Callable[[], None]] = None) -> dict:
+    """Run the instruments in QThreads of this process, their frames being received in the main thread
+
+    Parameters
+    ----------
+    specs: list of InstrumentSpec
+    duration: float
+        in seconds, from the start of the workloads
+    consumer_ms: float
+        CPU time spent by the main thread on each received frame
+    timeout: float
+        maximum time (s) of the initialization of the instruments
+    start_event: threading.Event like, optional
+        an event started from outside (another process), the instruments start as soon as they are ready if None
+    ready: callable, optional
+        called once all the instruments are ready
+
+    Returns
+    -------
+    dict: the summary of each instrument as instruments, and the CPU (s, %) of the main thread as consumer_cpu_s and
+        consumer_cpu_percent, and the RSS (MB) of the process as rss_MB
+    """
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])  # noqa, plugins are QObjects
+    start = threading.Event()
+    receivers = [Receiver(consumer_ms) for _ in specs]
+    threads = [InstrumentThread(spec, receiver, start, duration) for spec, receiver in zip(specs, receivers)]
+    for thread in threads:
+        thread.start()
+    deadline = time.perf_counter() + timeout
+    while not all(thread.ready.is_set() for thread in threads):
+        if time.perf_counter() > deadline:
+            start.set()
+            raise TimeoutError('The instruments were not initialized in time')
+        QtWidgets.QApplication.processEvents()
+        time.sleep(0.001)
+    QtWidgets.QApplication.processEvents()
+    for receiver in receivers:
+        receiver.checker.reset()  # the data emitted by the initializations
+    if ready is not None:
+        ready()
+    if start_event is not None:
+        start_event.wait()
+    cpu = time.thread_time()
+    tic = time.perf_counter()
+    start.set()
+    loop = QtCore.QEventLoop()
+    timer = QtCore.QTimer()
+    timer.timeout.connect(lambda: loop.quit() if all(thread.isFinished() for thread in threads) else None)
+    timer.start(20)
+    loop.exec_()
+    timer.stop()
+    QtWidgets.QApplication.processEvents()  # the frames still queued
+    elapsed = time.perf_counter() - tic
+    cpu_s = time.thread_time() - cpu
+    rss = rss_bytes()
+    return dict(instruments=[thread.summary() for thread in threads], consumer_cpu_s=cpu_s,
+                consumer_cpu_percent=100 * cpu_s / elapsed, rss_MB=None if rss is None else rss / MB)
+
+
+def _run_process(spec: InstrumentSpec, duration: float, consumer_ms: float, timeout: float, start_event,
+                 ready_queue, results_queue):
+    """Run an instrument as run_threads, in a spawned process"""
+    try:
+        result = run_threads([spec], duration, consumer_ms, timeout, start_event,
+                             lambda: ready_queue.put(spec.name))
+    except Exception as e:
+        result = dict(instruments=[dict(name=spec.name, kind=spec.kind, error=f'{type(e).__name__}: {e}')])
+        ready_queue.put(spec.name)
+    results_queue.put(result)
+
+
+def run_processes(specs: List[InstrumentSpec], duration: float, consumer_ms: float = 0.,
+                  timeout: float = 60.) -> dict:
+    """Run each instrument in its own process, with its own main thread receiving its frames
+
+    Returns
+    -------
+    dict: as run_threads, the RSS of each process being in the summary of its instrument, and the consumer CPU and
+        RSS being the totals over the processes
+    """
+    context = multiprocessing.get_context('spawn')
+    start_event = context.Event()
+    ready_queue, results_queue = context.Queue(), context.Queue()
+    processes = [context.Process(target=_run_process, daemon=True,
+                                 args=(spec, duration, consumer_ms, timeout, start_event, ready_queue, results_queue))
+                 for spec in specs]
+    for process in processes:
+        process.start()
+    try:
+        for _ in specs:
+            ready_queue.get(timeout=timeout)
+        start_event.set()
+        results = [results_queue.get(timeout=timeout + duration) for _ in specs]
+    finally:
+        start_event.set()
+        for process in processes:
+            process.join(timeout)
+    instruments = []
+    for result in results:
+        for instrument in result['instruments']:
+            instrument['rss_MB'] = result.get('rss_MB')
+            instruments.append(instrument)
+    order = [spec.name for spec in specs]
+    instruments.sort(key=lambda instrument: order.index(instrument['name']))
+    rss = [instrument['rss_MB'] for instrument in instruments if instrument['rss_MB'] is not None]
+    return dict(instruments=instruments,
+                consumer_cpu_s=sum(result.get('consumer_cpu_s', 0.) for result in results),
+                consumer_cpu_percent=sum(result.get('consumer_cpu_percent', 0.) for result in results),
+                rss_MB=sum(rss) if rss else None)
+
+
+def make_specs(detectors: int, actuators: int = 0, dims: List[str] = ('2D',), size: int = 64, naverage: int = 1,
+               rate: float = 0., tau_ms: int = 10, poll_ms: float = 1., settings: Settings = (),
+               actuator_settings: Settings = ()) -> List[InstrumentSpec]:
+    """The workloads of the detectors (of the dims in turn) and of the actuators"""
+    specs = [InstrumentSpec(f'det{ind:02d}_{dims[ind % len(dims)]}', dims[ind % len(dims)], size, naverage, rate,
+                            settings=settings) for ind in range(detectors)]
+    specs += [InstrumentSpec(f'act{ind:02d}', 'move', rate=rate, tau_ms=tau_ms, poll_ms=poll_ms,
+                             settings=actuator_settings) for ind in range(actuators)]
+    return specs
+
+
+def run(specs: List[InstrumentSpec], duration: float, mode: str = 'threads', consumer_ms: float = 0.,
+        timeout: float = 60.) -> dict:
+    """Run the instruments in the threads or processes mode, the run being summarized as totals"""
+    if mode == 'threads':
+        result = run_threads(specs, duration, consumer_ms, timeout)
+    elif mode == 'processes':
+        result = run_processes(specs, duration, consumer_ms, timeout)
+    else:
+        raise ValueError(f'Unknown mode {mode}, should be threads or processes')
+    instruments = result['instruments']
+    detectors = [instrument for instrument in instruments if instrument['kind'] != 'move']
+    actuators = [instrument for instrument in instruments if instrument['kind'] == 'move']
+    result.update(mode=mode, detectors=len(detectors), actuators=len(actuators),
+                  errors=sum(instrument['error'] is not None for instrument in instruments),
+                  grabs_per_s=sum(instrument.get('per_s', 0.) for instrument in detectors),
+                  moves_per_s=sum(instrument.get('per_s', 0.) for instrument in actuators),
+                  MB_per_s=sum(instrument.get('MB_per_s', 0.) for instrument in detectors),
+                  dropped=sum(instrument.get('dropped', 0) for instrument in detectors),
+                  latency_p99_ms=max((instrument['latency_ms']['p99'] for instrument in detectors
+                                      if 'latency_ms' in instrument), default=0.),
+                  cpu_percent=sum(instrument.get('cpu_percent', 0.) for instrument in instruments))
+    return result
+
+
+def scaling(results: List[dict]) -> List[float]:
+    """Total grab rate of each run relative to the first one times the number of detectors"""
+    if not results or results[0]['detectors'] == 0 or results[0]['grabs_per_s'] == 0:
+        return [float('nan')] * len(results)
+    per_detector = results[0]['grabs_per_s'] / results[0]['detectors']
+    return [result['grabs_per_s'] / (per_detector * result['detectors']) if result['detectors'] else float('nan')
+            for result in results]
+
+
+def print_instruments(result: dict):
+    print(f'{"name":>10} {"per s":>8} {"MB/s":>8} {"dur p50":>8} {"dur p99":>8} {"received":>8} {"dropped":>8} '
+          f'{"lat p50":>8} {"lat p99":>8} {"CPU %":>6} {"RSS MB":>7}')
+    for instrument in result['instruments']:
+        if instrument['error'] is not None:
+            print(f'{instrument["name"]:>10} {instrument["error"]}')
+            continue
+        latency = instrument.get('latency_ms', {})
+        rss = '' if instrument['rss_MB'] is None else f'{instrument["rss_MB"]:7.1f}'
+        print(f'{instrument["name"]:>10} {instrument["per_s"]:8.1f} {instrument["MB_per_s"]:8.2f} '
+              f'{instrument["duration_ms"]["p50"]:8.2f} {instrument["duration_ms"]["p99"]:8.2f} '
+              f'{instrument.get("received", ""):>8} {instrument.get("dropped", ""):>8} '
+              f'{latency.get("p50", float("nan")):8.2f} {latency.get("p99", float("nan")):8.2f} '
+              f'{instrument["cpu_percent"]:6.1f} {rss}')
+
+
+def print_runs(results: List[dict]):
+    print(f'{"mode":>9} {"det":>4} {"act":>4} {"grabs/s":>9} {"moves/s":>8} {"MB/s":>8} {"scaling":>7} '
+          f'{"dropped":>7} {"lat p99":>8} {"CPU %":>7} {"main %":>7} {"RSS MB":>7} {"errors":>6}')
+    for result, scale in zip(results, scaling(results)):
+        rss = '' if result['rss_MB'] is None else f'{result["rss_MB"]:7.1f}'
+        print(f'{result["mode"]:>9} {result["detectors"]:4d} {result["actuators"]:4d} {result["grabs_per_s"]:9.1f} '
+              f'{result["moves_per_s"]:8.1f} {result["MB_per_s"]:8.2f} {scale:7.2f} {result["dropped"]:7d} '
+              f'{result["latency_p99_ms"]:8.2f} {result["cpu_percent"]:7.1f} {result["consumer_cpu_percent"]:7.1f} '
+              f'{rss:>7} {result["errors"]:6d}')
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('Usage')[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--detectors', type=int, nargs='+', default=[1, 5, 10, 20],
+                        help='numbers of detectors, one run for each')
+    parser.add_argument('--actuators', type=int, default=0, help='number of actuators of each run')
+    parser.add_argument('--dims', nargs='+', default=['2D'], choices=DIMS, help='dimensions of the detectors, in turn')
+    parser.add_argument('--size', type=int, default=64, help='size of the data (see the throughput benchmark)')
+    parser.add_argument('--naverage', type=int, default=1)
+    parser.add_argument('--rate', type=float, default=0.,
+                        help='grabs or moves per second of each instrument, 0 for as fast as possible')
+    parser.add_argument('--tau-ms', type=int, default=10, help='time constant of the actuators')
+    parser.add_argument('--poll-ms', type=float, default=1., help='polling interval of the actuator positions')
+    parser.add_argument('--consumer-ms', type=float, default=0.,
+                        help='CPU time spent by the main thread on each received frame')
+    parser.add_argument('--mode', choices=['threads', 'processes'], default='threads')
+    parser.add_argument('--duration', type=float, default=5., help='of each run, in seconds')
+    parser.add_argument('--set', nargs='*', default=[], dest='settings', metavar='PATH=VALUE',
+                        help='settings of the detectors')
+    parser.add_argument('--set-actuators', nargs='*', default=[], metavar='PATH=VALUE',
+                        help='settings of the actuators')
+    parser.add_argument('--details', action='store_true', help='print the results of each instrument')
+    parser.add_argument('--json', help='path of a json file where to save the results')
+    options = parser.parse_args(args)
+
+    results = []
+    for detectors in options.detectors:
+        specs = make_specs(detectors, options.actuators, options.dims, options.size, options.naverage, options.rate,
+                           options.tau_ms, options.poll_ms, parse_settings(options.settings),
+                           parse_settings(options.set_actuators))
+        results.append(run(specs, options.duration, options.mode, options.consumer_ms))
+        if options.details:
+            print_instruments(results[-1])
+    print_runs(results)
+    if options.json:
+        with open(options.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Loopback round trip benchmark of the binary frames of the TCPServer plugins against pymodaq's serializer.
+
+For each frame size, a grabber thread answers requests sent by the server side with a frame, exactly as a remote
+grabber answers 'Send Data 2D'. The round trip time of each request and the throughput are reported.
+
+Usage::
+
+    python -m pymodaq_plugins_mock.benchmarks.tcp_frames --sizes 512 1024 2048 --dtype uint16 --frames 50
+"""
+import argparse
+import json
+import socket
+import threading
+import time
+from typing import Callable, List
+
+import numpy as np
+
+from pymodaq.utils.data import DataFromPlugins, DataToExport
+from pymodaq.utils.tcp_ip.mysocket import Socket
+from pymodaq.utils.tcp_ip.serializer import DeSerializer
+
+from pymodaq_plugins_mock.hardware.tcp_frames import FrameReceiver, recv_exactly_into, send_arrays
+
+REQUEST = b'GRAB'
+
+
+def loopback_pair():
+    """Get two connected TCP sockets on the loopback interface"""
+    with socket.create_server(('127.0.0.1', 0)) as server:
+        client = socket.create_connection(server.getsockname())
+        connection, _ = server.accept()
+    for sock in (client, connection):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return client, connection
+
+
+def serve(sock: socket.socket, nframes: int, reply: Callable[[socket.socket], None]):
+    """Grabber side: answer nframes requests"""
+    request = bytearray(len(REQUEST))
+    for _ in range(nframes):
+        recv_exactly_into(sock, request)
+        reply(sock)
+
+
+def run(mode: str, frame: np.ndarray, nframes: int) -> dict:
+    """Time nframes round trips of frame using either the 'binary' or the 'serializer' mode"""
+    grabber, server = loopback_pair()
+    if mode == 'binary':
+        def reply(sock):
+            send_arrays(sock, [frame])
+        receiver = FrameReceiver()
+
+        def receive(sock):
+            return receiver.receive(sock)[0].array
+    else:
+        dte = DataToExport('bench', data=[DataFromPlugins('bench', data=[frame])])
+
+        def reply(sock):
+            Socket(sock).check_sended_with_serializer(dte)
+
+        def receive(sock):
+            return DeSerializer(Socket(sock)).dte_deserialization()[0][0]
+
+    thread = threading.Thread(target=serve, args=(grabber, nframes, reply), daemon=True)
+    thread.start()
+    round_trips: List[float] = []
+    start = time.perf_counter()
+    try:
+        for _ in range(nframes):
+            tic = time.perf_counter()
+            server.sendall(REQUEST)
+            receive(server)
+            round_trips.append(time.perf_counter() - tic)
+        elapsed = time.perf_counter() - start
+    finally:
+        thread.join(5)
+        grabber.close()
+        server.close()
+    round_trips = np.array(round_trips) * 1000
+    return dict(mode=mode, shape=frame.shape, dtype=frame.dtype.str, frames=nframes,
+                MB_per_s=nframes * frame.nbytes / elapsed / 1e6,
+                frames_per_s=nframes / elapsed,
+                rtt_ms_p50=float(np.percentile(round_trips, 50)),
+                rtt_ms_p99=float(np.percentile(round_trips, 99)))
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('Usage')[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[256, 1024, 2048],
+                        help='side of the square frames')
+    parser.add_argument('--dtype', default='uint16')
+    parser.add_argument('--frames', type=int, default=30, help='number of frames per size and mode')
+    parser.add_argument('--modes', nargs='+', default=['serializer', 'binary'], choices=['serializer', 'binary'])
+    parser.add_argument('--json', help='path of a json file where to save the results')
+    options = parser.parse_args(args)
+
+    results = []
+    print(f'{"mode":>10} {"shape":>12} {"MB/s":>9} {"frames/s":>9} {"rtt p50 (ms)":>13} {"rtt p99 (ms)":>13}')
+    for size in options.sizes:
+        frame = (np.random.rand(size, size) * 4000).astype(options.dtype)
+        for mode in options.modes:
+            result = run(mode, frame, options.frames)
+            results.append(result)
+            print(f'{mode:>10} {str(frame.shape):>12} {result["MB_per_s"]:9.1f} {result["frames_per_s"]:9.1f} '
+                  f'{result["rtt_ms_p50"]:13.2f} {result["rtt_ms_p99"]:13.2f}')
+    if options.json:
+        with open(options.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == '__main__':
+    main()
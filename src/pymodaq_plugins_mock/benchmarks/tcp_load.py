@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Load generator for the TCPServer plugins: simulated remote grabbers and actuators connect to TCPServer plugins
+(running in a dashboard on this machine for instance), answer their requests with synthetic frames or moves, and
+report their throughput and latency histograms.
+
+Usage::
+
+    python -m pymodaq_plugins_mock.benchmarks.tcp_load --port 6341 --shape 1024 1024 --rate 50 --duration 30
+    python -m pymodaq_plugins_mock.benchmarks.tcp_load --port 6341 --grabbers 0 --actuators 1 --velocity 10
+"""
+import argparse
+import asyncio
+import json
+
+from pymodaq_plugins_mock.hardware.codecs import CODECS
+from pymodaq_plugins_mock.hardware.tcp_clients import SimulatedActuator, SimulatedGrabber, run_clients
+
+
+async def run(clients, duration: float, timeout: float):
+    stop = asyncio.Event()
+    asyncio.get_running_loop().call_later(duration, stop.set)
+    await run_clients(clients, stop, timeout)
+
+
+def print_summary(summaries):
+    print(f'{"client":>8} {"answers":>8} {"per s":>8} {"MB/s":>8} {"p50 (ms)":>9} {"p99 (ms)":>9} '
+          f'{"max (ms)":>9} {"cycle p50":>10} {"cycle p99":>10}')
+    for summary in summaries:
+        throughput, latency, cycle = summary['throughput'], summary['latency_ms'], summary['cycle_ms']
+        print(f'{summary["client"]:>8} {throughput["events"]:8d} {throughput["events_per_s"]:8.1f} '
+              f'{throughput["MB_per_s"]:8.1f} {latency["p50"]:9.2f} {latency["p99"]:9.2f} {latency["max"]:9.2f} '
+              f'{cycle["p50"]:10.2f} {cycle["p99"]:10.2f}')
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('Usage')[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=6341)
+    parser.add_argument('--grabbers', type=int, default=1, help='number of simulated grabbers')
+    parser.add_argument('--shape', type=int, nargs='+', default=[256, 256], help='shape of the frames')
+    parser.add_argument('--dtype', default='uint16')
+    parser.add_argument('--rate', type=float, default=0., help='maximum frames per second per grabber')
+    parser.add_argument('--serializer', action='store_true',
+                        help='send serialized DataToExport instead of binary frames')
+    parser.add_argument('--codecs', nargs='*', choices=CODECS, help='codecs supported by the grabbers')
+    parser.add_argument('--actuators', type=int, default=0, help='number of simulated actuators')
+    parser.add_argument('--velocity', type=float, default=0., help='velocity of the actuators (units/s)')
+    parser.add_argument('--duration', type=float, default=10., help='in seconds')
+    parser.add_argument('--timeout', type=float, default=5., help='connection timeout in seconds')
+    parser.add_argument('--json', help='path of a json file where to save the results')
+    options = parser.parse_args(args)
+
+    clients = [SimulatedGrabber(options.host, options.port, options.shape, options.dtype, options.rate,
+                                binary=not options.serializer, codecs=options.codecs)
+               for _ in range(options.grabbers)]
+    clients += [SimulatedActuator(options.host, options.port, options.velocity) for _ in range(options.actuators)]
+    asyncio.run(run(clients, options.duration, options.timeout))
+    summaries = [client.summary() for client in clients]
+    print_summary(summaries)
+    if options.json:
+        with open(options.json, 'w') as f:
+            json.dump(summaries, f, indent=2)
+    return summaries
+
+
+if __name__ == '__main__':
+    main()
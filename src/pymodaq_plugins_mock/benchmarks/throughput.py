@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Headless throughput harness of the Mock plugins: each plugin is instantiated without any GUI (offscreen Qt), its
+dte_signal being captured, then grab_data (or move_abs) is called in a loop for each point of a sweep over the
+frame sizes, Naverage and data types.
+
+For the viewers, the latency is the time from grab_data to the emission of the data, for the actuator from move_abs
+to the actuator being within epsilon of its target (the sweep being then over its time constant tau). The frame
+rate, throughput and latency percentiles are reported, the built-in sleeps of the Mocks (simulating exposures)
+included.
+
+The sizes are the number of points of the 1D data, the side of the 2D data and of the spatial part of the ND data
+(whose temporal size is --nd-nt). The data type is swept for the plugins having a dtype setting (the 2D Mock).
+
+The latencies and the time per frame (in ms) can be saved as a json baseline, and compared to it with thresholds
+(see :mod:`pymodaq_plugins_mock.benchmarks.baseline`), the exit code being 1 in case of regression.
+
+With --phases, the instrumentation of the plugins is enabled (see
+:mod:`pymodaq_plugins_mock.hardware.instrumentation`) and the p50 of each phase of the calls is printed.
+
+Usage::
+
+    python -m pymodaq_plugins_mock.benchmarks.throughput --plugins 0D 1D 2D ND move --sizes 64 256 1024
+    python -m pymodaq_plugins_mock.benchmarks.throughput --plugins 2D --naverage 1 4 --dtypes float64 uint16
+    python -m pymodaq_plugins_mock.benchmarks.throughput --baseline
+    python -m pymodaq_plugins_mock.benchmarks.throughput --plugins 2D --sizes 1024 --phases
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, List
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from qtpy import QtCore, QtWidgets  # noqa: E402
+
+from pymodaq.utils.data import DataActuator, DataToExport  # noqa: E402
+
+from pymodaq_plugins_mock.benchmarks.baseline import BASELINES_PATH, check, save_baseline  # noqa: E402
+from pymodaq_plugins_mock.hardware.stats import LatencyHistogram  # noqa: E402
+from pymodaq_plugins_mock.manifest import load_plugin  # noqa: E402
+
+DIMS = ['0D', '1D', '2D', 'ND']
+
+
+class Capture:
+    """Record the data emitted by a plugin, connected directly to its dte_signal"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.nbytes = 0
+        self.dtype = None
+
+    def __call__(self, dte: DataToExport):
+        self.nbytes = sum(array.nbytes for dwa in dte for array in dwa)
+        self.dtype = dte[0][0].dtype.name
+        self.event.set()
+
+    def grab(self, plugin, naverage: int, timeout: float) -> float:
+        """Time of a grab, until the data are emitted (right away by the Mocks, or later from their threads)"""
+        self.event.clear()
+        tic = time.perf_counter()
+        plugin.grab_data(Naverage=naverage)
+        if not self.event.wait(timeout):
+            raise TimeoutError(f'{type(plugin).__name__} did not emit its data')
+        return time.perf_counter() - tic
+
+
+def has_dtype(dim: str) -> bool:
+    return 'dtype' in [param['name'] for param in load_plugin(f'daq_{dim}viewer', 'Mock').params]
+
+
+def configure(plugin, dim: str, size: int, dtype: str = None, nd_nt: int = 32):
+    """Set the settings of an initialized Mock viewer for a point of the sweep, calling commit_settings as a
+    DAQ_Viewer would (the initialization may reset some settings, as the 1D Mock does)"""
+    values = {'1D': [(('x_axis', 'Npts'), size)],
+              '2D': [(('Nx',), size), (('Ny',), size), (('Nimagespannel',), 1)],
+              'ND': [(('spatial_settings', 'Nx'), size), (('spatial_settings', 'Ny'), size),
+                     (('temp_settings', 'Nt'), nd_nt)]}.get(dim, [])
+    if dtype is not None:
+        values.append((('dtype',), dtype))
+    for path, value in values:
+        param = plugin.settings.child(*path)
+        if param.value() != value:
+            param.setValue(value)
+            plugin.commit_settings(param)
+
+
+def summarize(durations: LatencyHistogram, elapsed: float, nbytes: int, **point) -> dict:
+    latency = durations.summary()
+    return dict(point, frames_per_s=durations.count / elapsed, MB_per_s=nbytes * durations.count / elapsed / 1e6,
+                latency_ms={key: value for key, value in latency.items() if key != 'count'})
+
+
+def instrument(plugin):
+    """Enable the instrumentation of a Mock plugin"""
+    param = plugin.settings.child('instrumentation', 'instrumented')
+    param.setValue(True)
+    plugin.commit_settings(param)
+
+
+def phases(plugin) -> Dict[str, float]:
+    """The p50 (ms) of each phase timed by an instrumented plugin"""
+    return {phase: stats['p50'] for phase, stats in plugin.timer.stats.summary().items()}
+
+
+def run_viewer(dim: str, size: int, naverage: int, dtype: str = None, frames: int = 10, warmup: int = 1,
+               nd_nt: int = 32, timeout: float = 30., instrumented: bool = False) -> dict:
+    """Grab frames from a Mock viewer, dtype being None for the plugins without a dtype setting"""
+    plugin = load_plugin(f'daq_{dim}viewer', 'Mock')()
+    capture = Capture()
+    try:
+        plugin.ini_detector()
+        configure(plugin, dim, size, dtype, nd_nt)
+        if instrumented:
+            instrument(plugin)
+        plugin.dte_signal.connect(capture, QtCore.Qt.DirectConnection)
+        for _ in range(warmup):
+            capture.grab(plugin, naverage, timeout)
+        durations = LatencyHistogram()
+        tic = time.perf_counter()
+        for _ in range(frames):
+            durations.record(capture.grab(plugin, naverage, timeout))
+        elapsed = time.perf_counter() - tic
+    finally:
+        plugin.close()
+    result = summarize(durations, elapsed, capture.nbytes, plugin=dim, size=size if dim != '0D' else 1,
+                       naverage=naverage, dtype=capture.dtype)
+    if instrumented:
+        result['phases_ms'] = phases(plugin)
+    return result
+
+
+def run_actuator(tau_ms: int, moves: int = 10, timeout: float = 10., poll_interval: float = 0.001,
+                 instrumented: bool = False) -> dict:
+    """Move the Mock actuator back and forth over 100 epsilon, each move lasting until it is within epsilon of its
+    target"""
+    plugin = load_plugin('daq_move', 'Mock')()
+    try:
+        plugin.settings.child('tau').setValue(tau_ms)
+        plugin.settings.child('instrumentation', 'instrumented').setValue(instrumented)
+        plugin.ini_stage()
+        durations = LatencyHistogram()
+        tic = time.perf_counter()
+        for ind in range(moves):
+            start = time.perf_counter()
+            target = (ind + 1) % 2 * 100 * plugin.settings['epsilon']
+            plugin.move_abs(DataActuator(data=target))
+            while abs(plugin.get_actuator_value().value() - target) > plugin.settings['epsilon']:
+                if time.perf_counter() - start > timeout:
+                    raise TimeoutError('The Mock actuator did not reach its target')
+                time.sleep(poll_interval)
+            durations.record(time.perf_counter() - start)
+        elapsed = time.perf_counter() - tic
+    finally:
+        plugin.close()
+    result = summarize(durations, elapsed, 0, plugin='move', size=tau_ms, naverage=1, dtype=None)
+    if instrumented:
+        result['phases_ms'] = phases(plugin)
+    return result
+
+
+def metrics(results: List[dict]) -> Dict[str, float]:
+    """Flatten the results into the metrics of a baseline, all in ms"""
+    flat = {}
+    for result in results:
+        point = f'{result["plugin"]}/{result["size"]}/{result["naverage"]}/{result["dtype"]}'
+        flat[f'{point}:ms_per_frame'] = 1000 / result['frames_per_s']
+        flat[f'{point}:p50_ms'] = result['latency_ms']['p50']
+        flat[f'{point}:p99_ms'] = result['latency_ms']['p99']
+    return flat
+
+
+def print_result(result: dict):
+    latency = result['latency_ms']
+    print(f'{result["plugin"]:>6} {result["size"]:>6} {result["naverage"]:>6} {str(result["dtype"]):>8} '
+          f'{result["frames_per_s"]:9.1f} {result["MB_per_s"]:9.2f} {latency["p50"]:9.2f} {latency["p90"]:9.2f} '
+          f'{latency["p99"]:9.2f}')
+    if 'phases_ms' in result:
+        print('        phases p50 (ms): ' + ', '.join(f'{phase} {duration:.3f}'
+                                                  for phase, duration in result['phases_ms'].items()))
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('Usage')[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--plugins', nargs='+', default=DIMS + ['move'], choices=DIMS + ['move'])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[64, 256, 1024])
+    parser.add_argument('--nd-sizes', type=int, nargs='+', default=[32, 64, 128], help='spatial sizes of the ND data')
+    parser.add_argument('--nd-nt', type=int, default=32, help='temporal size of the ND data')
+    parser.add_argument('--naverage', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--dtypes', nargs='+', default=['float64', 'uint16'])
+    parser.add_argument('--taus', type=int, nargs='+', default=[10, 100], help='time constants (ms) of the actuator')
+    parser.add_argument('--frames', type=int, default=10, help='number of grabs or moves per point of the sweep')
+    parser.add_argument('--warmup', type=int, default=1, help='number of grabs not measured')
+    parser.add_argument('--phases', action='store_true', help='time the phases of the calls of the plugins')
+    parser.add_argument('--json', help='path of a json file where to save the results')
+    parser.add_argument('--baseline', nargs='?', const=str(BASELINES_PATH.joinpath('throughput.json')),
+                        help='compare to this baseline, the one of the package if no path is given')
+    parser.add_argument('--save-baseline', help='path where to save the results as a baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='relative tolerance of the saved baseline')
+    parser.add_argument('--min-delta', type=float, default=2., help='absolute tolerance (ms) of the saved baseline')
+    options = parser.parse_args(args)
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])  # noqa, plugins are QObjects
+    results = []
+    print(f'{"plugin":>6} {"size":>6} {"Navg":>6} {"dtype":>8} {"frames/s":>9} {"MB/s":>9} {"p50 (ms)":>9} '
+          f'{"p90 (ms)":>9} {"p99 (ms)":>9}')
+    for dim in options.plugins:
+        if dim == 'move':
+            points = [dict(tau_ms=tau) for tau in options.taus]
+        else:
+            sizes = {'0D': [1], 'ND': options.nd_sizes}.get(dim, options.sizes)
+            dtypes = options.dtypes if has_dtype(dim) else [None]
+            points = [dict(dim=dim, size=size, naverage=naverage, dtype=dtype)
+                      for size in sizes for naverage in options.naverage for dtype in dtypes]
+        for point in points:
+            if dim == 'move':
+                result = run_actuator(moves=options.frames, instrumented=options.phases, **point)
+            else:
+                result = run_viewer(frames=options.frames, warmup=options.warmup, nd_nt=options.nd_nt,
+                                    instrumented=options.phases, **point)
+            print_result(result)
+            results.append(result)
+    if options.json:
+        with open(options.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if options.save_baseline:
+        save_baseline(options.save_baseline, metrics(results), options.tolerance, options.min_delta)
+    if options.baseline and not check(metrics(results), options.baseline):
+        sys.exit(1)
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -6,8 +6,21 @@ For this to work a coordinator must be instantiated can be done within the dashb
 running: `python -m pyleco.coordinators.coordinator`
 
 """
+from typing import Callable, Sequence
 
-from pymodaq.utils.leco.daq_move_LECODirector import DAQ_Move_LECODirector, main  # noqa
+from pymodaq.utils.leco.daq_move_LECODirector import DAQ_Move_LECODirector as DAQ_Move_LECODirectorBase, main
+
+
+class DAQ_Move_LECODirector(DAQ_Move_LECODirectorBase):
+    """A control module, which in the dashboard, allows to control a remote Move module"""
+
+    def register_rpc_methods(self, methods: Sequence[Callable]) -> None:
+        """Register the methods once, set_info being registered by both the LECODirector mixin and the base class"""
+        for method in methods:
+            try:
+                self.communicator.register_rpc_method(method=method)
+            except ValueError:  # already registered
+                pass
 
 
 if __name__ == '__main__':
@@ -3,7 +3,10 @@ from qtpy import QtWidgets
 from pymodaq.control_modules.move_utility_classes import (DAQ_Move_base, comon_parameters_fun,
                                                           main, DataActuatorType, ThreadCommand)
 from pymodaq_plugins_mock.hardware.wrapper import ActuatorWrapperWithTauMultiAxes
+from pymodaq_plugins_mock.hardware.faults import InjectedFault, fault_parameters
+from pymodaq_plugins_mock.hardware.instrumentation import PhaseTimer, instrumentation_parameters
 from pymodaq.utils.data import DataActuator
+from pymodaq.utils.parameter.utils import iter_children
 from pymodaq_plugins_mock import config
 
 
@@ -28,15 +31,24 @@ class DAQ_Move_Mock(DAQ_Move_base):
             {'title': 'Tau (ms):', 'name': 'tau', 'type': 'int',
              'value': ActuatorWrapperWithTauMultiAxes._tau * 1000,
              'tip': 'Characteristic evolution time'},
-             ] + comon_parameters_fun(axis_names=_axis_names)
+             ] + instrumentation_parameters + fault_parameters + comon_parameters_fun(axis_names=_axis_names)
 
     def ini_attributes(self):
         self.controller: ActuatorWrapperWithTauMultiAxes = None
+        self.timer = PhaseTimer()
 
     def get_actuator_value(self):
-        pos = DataActuator(data=self.controller.get_value(self.axis_name),
-                           units=self.controller_units)
-        pos = self.get_position_with_scaling(pos)
+        with self.timer.phase('read'):
+            try:
+                value = self.controller.get_value(self.axis_name)
+            except InjectedFault as e:
+                self.emit_status(ThreadCommand('Update_Status', [str(e), 'log']))
+                return self.current_value
+        with self.timer.phase('export'):
+            pos = DataActuator(data=value, units=self.controller_units)
+        with self.timer.phase('scaling'):
+            pos = self.get_position_with_scaling(pos)
+        self.timer.emit_periodic_status(self.emit_status)
         return pos
 
     def close(self):
@@ -50,6 +62,10 @@ class DAQ_Move_Mock(DAQ_Move_base):
             self.controller.tau = param.value() / 1000  # controller need a tau in seconds while the param tau is in ms
         elif param.name() == 'epsilon':
             self.controller.epsilon = param.value()
+        elif param.name() in iter_children(self.settings.child('instrumentation'), []):
+            self.timer.update_from_settings(self.settings.child('instrumentation'))
+        elif param.name() in iter_children(self.settings.child('faults'), []):
+            self.controller.faults.update_from_settings(self.settings.child('faults'))
 
     def ini_stage(self, controller=None):
         """Actuator communication initialization
@@ -68,6 +84,8 @@ class DAQ_Move_Mock(DAQ_Move_base):
         self.controller: ActuatorWrapperWithTauMultiAxes = (
             self.ini_stage_init(controller, ActuatorWrapperWithTauMultiAxes()))
         self.controller.tau = self.settings['tau'] / 1000
+        self.timer.update_from_settings(self.settings.child('instrumentation'))
+        self.controller.faults.update_from_settings(self.settings.child('faults'))
         self.settings.child('units').setValue(self.controller.get_units(self.axis_name))
         info = "Controller initialized"
         initialized = True
@@ -81,10 +99,12 @@ class DAQ_Move_Mock(DAQ_Move_base):
         position: (float) value of the absolute target positioning
         """
 
-        position = self.check_bound(position)  #if user checked bounds, the defined bounds are applied here
-        self.target_value = position
-        position = self.set_position_with_scaling(position)  # apply scaling if the user specified one
-        self.controller.move_at(position.value(), self.axis_name)
+        with self.timer.phase('scaling'):
+            position = self.check_bound(position)  #if user checked bounds, the defined bounds are applied here
+            self.target_value = position
+            position = self.set_position_with_scaling(position)  # apply scaling if the user specified one
+        with self.timer.phase('move'):
+            self.move_controller(position.value())
 
     def move_rel(self, position):
         """ Move the actuator to the relative target actuator value defined by position
@@ -93,10 +113,19 @@ class DAQ_Move_Mock(DAQ_Move_base):
         ----------
         position: (float) value of the relative target positioning
         """
-        position = self.check_bound(self.current_value+position)-self.current_value
-        self.target_value = position + self.current_value
-        self.set_position_relative_with_scaling(position)
-        self.controller.move_at(self.target_value.value(), self.axis_name)
+        with self.timer.phase('scaling'):
+            position = self.check_bound(self.current_value+position)-self.current_value
+            self.target_value = position + self.current_value
+            self.set_position_relative_with_scaling(position)
+        with self.timer.phase('move'):
+            self.move_controller(self.target_value.value())
+
+    def move_controller(self, value: float):
+        """Move the controller axis at value, an injected communication error being logged instead of raised"""
+        try:
+            self.controller.move_at(value, self.axis_name)
+        except InjectedFault as e:
+            self.emit_status(ThreadCommand('Update_Status', [str(e), 'log']))
 
     def move_home(self):
         """
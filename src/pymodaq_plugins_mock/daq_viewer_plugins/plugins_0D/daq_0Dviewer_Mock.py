@@ -1,3 +1,6 @@
+import time
+from typing import NamedTuple
+
 from qtpy import QtWidgets, QtCore
 
 from pymodaq.utils.daq_utils import ThreadCommand, getLineInfo
@@ -6,6 +9,20 @@ import numpy as np
 from pymodaq.control_modules.viewer_utility_classes import DAQ_Viewer_base, comon_parameters, main
 
 from pymodaq.utils.math_utils import gauss1D
+from pymodaq.utils.parameter.utils import iter_children
+
+from pymodaq_plugins_mock.hardware.faults import FaultInjector, fault_parameters
+from pymodaq_plugins_mock.hardware.frame_tags import FrameTagger
+from pymodaq_plugins_mock.hardware.instrumentation import PhaseTimer, instrumentation_parameters
+from pymodaq_plugins_mock.hardware.prefetch import FramePrefetcher, prefetch_parameters
+from pymodaq_plugins_mock.hardware.sample import SimulatedSample, coupling_parameters, sample_from_settings
+from pymodaq_plugins_mock.hardware.snapshot import snapshot
+
+
+class Mock0DSnapshot(NamedTuple):
+    """The settings read for each grab by DAQ_0DViewer_Mock"""
+    sep_viewers: bool
+    lcd: bool
 
 
 class DAQ_0DViewer_Mock(DAQ_Viewer_base):
@@ -28,13 +45,20 @@ class DAQ_0DViewer_Mock(DAQ_Viewer_base):
             {'title': 'dx', 'name': 'dx', 'type': 'float', 'value': 30, 'default': 30, 'min': 1},
             {'title': 'n', 'name': 'n', 'type': 'int', 'value': 2, 'default': 2, 'min': 1},
             {'title': 'amp_noise', 'name': 'amp_noise', 'type': 'float', 'value': 0.1, 'default': 0.1, 'min': 0}
-        ]}]
+        ]}] + prefetch_parameters + instrumentation_parameters + coupling_parameters + \
+        fault_parameters
 
     def ini_attributes(self):
         self.controller: str = None
         self.x_axis = None
         self.ind_data = 0
         self.lcd_init = False
+        self.prefetcher = FramePrefetcher(lambda Naverage, previous: self.average_data(Naverage))
+        self.timer = PhaseTimer()
+        self.tagger = FrameTagger()
+        self.faults = FaultInjector()
+        self.sample: SimulatedSample = None
+        self.snapshot = snapshot(Mock0DSnapshot, self.settings)
 
     def commit_settings(self, param):
         """
@@ -49,9 +73,33 @@ class DAQ_0DViewer_Mock(DAQ_Viewer_base):
             --------
             set_Mock_data
         """
-        self.set_Mock_data()
-        if param.name() == 'wait_time':
-            self.emit_status(ThreadCommand('update_main_settings', [['wait_time'], param.value(), 'value']))
+        with self.prefetcher.paused():
+            self.snapshot = snapshot(Mock0DSnapshot, self.settings)
+            if param.name() in iter_children(self.settings.child('prefetch'), []):
+                self.update_prefetcher()
+                return
+            if param.name() in iter_children(self.settings.child('instrumentation'), []):
+                self.timer.update_from_settings(self.settings.child('instrumentation'))
+                return
+            if param.name() in iter_children(self.settings.child('coupling'), []):
+                self.sample = sample_from_settings(self.settings.child('coupling'))
+                self.update_prefetcher()
+                return
+            if param.name() in iter_children(self.settings.child('faults'), []):
+                self.faults.update_from_settings(self.settings.child('faults'))
+                return
+            self.set_Mock_data()
+            if param.name() == 'wait_time':
+                self.emit_status(ThreadCommand('update_main_settings', [['wait_time'], param.value(), 'value']))
+
+    def update_prefetcher(self):
+        """Start or stop the prefetch thread according to the settings, not prefetching if coupled so that the
+        actuator positions are read when the data are grabbed and not up to depth frames before"""
+        use_prefetch = self.settings['prefetch', 'use_prefetch']
+        if use_prefetch and self.sample is not None:
+            self.emit_status(ThreadCommand('Update_Status', ['Prefetch is not used while coupled to the actuators',
+                                                             'log']))
+        self.prefetcher.update(use_prefetch and self.sample is None, self.settings['prefetch', 'depth'])
 
     def set_Mock_data(self):
         """
@@ -88,6 +136,7 @@ class DAQ_0DViewer_Mock(DAQ_Viewer_base):
         QtCore.QThread.msleep(500)
         self.ini_detector_init(old_controller=controller,
                                new_controller='Mock controller')
+        self.snapshot = snapshot(Mock0DSnapshot, self.settings)
 
         self.emit_status(ThreadCommand('show_splash', 'generating Mock Data'))
         QtCore.QThread.msleep(500)
@@ -101,15 +150,19 @@ class DAQ_0DViewer_Mock(DAQ_Viewer_base):
                                                                                dim='Data0D',
                                                                                labels=['Mock1', 'label2'])]))
         self.emit_status(ThreadCommand('close_splash'))
+        self.timer.update_from_settings(self.settings.child('instrumentation'))
+        self.sample = sample_from_settings(self.settings.child('coupling'))
+        self.update_prefetcher()
+        self.faults.update_from_settings(self.settings.child('faults'))
         initialized = True
         info = 'RAS'
         return info, initialized
 
     def close(self):
         """
-            not implemented.
+            Stop the eventual prefetch thread
         """
-        pass
+        self.prefetcher.stop()
 
     def grab_data(self, Naverage=1, **kwargs):
         """
@@ -127,28 +180,29 @@ class DAQ_0DViewer_Mock(DAQ_Viewer_base):
             =============== ======== ===============================================
 
         """
-        data_tot = []
-
-        for ind, data in enumerate(self.data_mock):
-            data = np.roll(data, self.ind_data)
-            if Naverage > 1:
-                data_tot.append(np.array([np.mean(data[0:Naverage - 1])]))
+        with self.timer.phase('total'):
+            if self.prefetcher.is_running:
+                with self.timer.phase('prefetch_wait'):
+                    data_tot = self.prefetcher.take(Naverage)
             else:
-                data_tot.append(np.array([data[0]]))
-
-        if self.settings.child('sep_viewers').value():
-            dat = DataToExport('Mock0D',
-                               data=[DataFromPlugins(name=f'Mock_{ind:03}', data=[data], dim='Data0D',
-                                                     labels=[f'mock data {ind:03}']) for ind, data in
-                                     enumerate(data_tot)])
-            self.dte_signal.emit(dat)
-
-        else:
-            self.dte_signal.emit(DataToExport('Mock0D',
-                                              data=[DataFromPlugins(name='Mock0D', data=data_tot,
-                                                                    dim='Data0D', labels=['dat0', 'data1'])]))
-        self.ind_data += 1
-        if self.settings['lcd']:
+                data_tot = self.average_data(Naverage)
+            acquisition_ns = time.time_ns()
+
+            with self.timer.phase('export'):
+                if self.snapshot.sep_viewers:
+                    dte = DataToExport('Mock0D',
+                                       data=[DataFromPlugins(name=f'Mock_{ind:03}', data=[data], dim='Data0D',
+                                                             labels=[f'mock data {ind:03}']) for ind, data in
+                                             enumerate(data_tot)])
+                else:
+                    dte = DataToExport('Mock0D',
+                                       data=[DataFromPlugins(name='Mock0D', data=data_tot,
+                                                             dim='Data0D', labels=['dat0', 'data1'])])
+            with self.timer.phase('emit'):
+                self.faults.emit(self.dte_signal.emit, dte, self.emit_status,
+                                 tag=lambda dte: self.tagger.tag(dte, acquisition_ns))
+        self.timer.emit_periodic_status(self.emit_status)
+        if self.snapshot.lcd:
             if not self.lcd_init:
                 self.emit_status(ThreadCommand('init_lcd', dict(labels=['dat0', 'data1'], Nvals=2, digits=6)))
                 QtWidgets.QApplication.processEvents()
@@ -156,6 +210,24 @@ class DAQ_0DViewer_Mock(DAQ_Viewer_base):
 
             self.emit_status(ThreadCommand('lcd', data_tot))
 
+    def average_data(self, Naverage: int):
+        data_tot = []
+
+        for ind, data in enumerate(self.data_mock):
+            with self.timer.phase('roll'):
+                data = np.roll(data, self.ind_data)
+            with self.timer.phase('average'):
+                if Naverage > 1:
+                    data_tot.append(np.array([np.mean(data[0:Naverage - 1])]))
+                else:
+                    data_tot.append(np.array([data[0]]))
+        if self.sample is not None:
+            with self.timer.phase('sample'):
+                signal = float(self.sample.signal())
+                data_tot = [data * signal for data in data_tot]
+        self.ind_data += 1
+        return data_tot
+
     def stop(self):
         """
             not implemented.
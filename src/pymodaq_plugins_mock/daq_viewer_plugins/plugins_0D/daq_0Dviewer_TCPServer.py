@@ -1,12 +1,13 @@
 from qtpy.QtCore import Signal
 from easydict import EasyDict as edict
 from collections import OrderedDict
-from pymodaq.control_modules.viewer_utility_classes import DAQ_Viewer_TCP_server
 from pymodaq.utils.daq_utils import ThreadCommand, getLineInfo
 from pymodaq.utils.data import DataFromPlugins, DataToExport
 
+from pymodaq_plugins_mock.daq_viewer_plugins.utility_classes import DAQ_Viewer_BinaryTCPServer, fan_out_parameters
 
-class DAQ_0DViewer_TCPServer(DAQ_Viewer_TCP_server):
+
+class DAQ_0DViewer_TCPServer(DAQ_Viewer_BinaryTCPServer):
     """
         ================= ==============================
         **Attributes**      **Type**
@@ -18,9 +19,12 @@ class DAQ_0DViewer_TCPServer(DAQ_Viewer_TCP_server):
 
         See Also
         --------
-        utility_classes.DAQ_TCP_server
+        utility_classes.DAQ_Viewer_BinaryTCPServer
     """
     params_GRABBER = []
+
+    params = DAQ_Viewer_BinaryTCPServer.params + fan_out_parameters
+
     command_server = Signal(list)
 
     def __init__(self, parent=None, params_state=None):
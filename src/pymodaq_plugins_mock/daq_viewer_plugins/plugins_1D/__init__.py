@@ -1,12 +1,8 @@
-import importlib
+"""The plugin modules are imported only when accessed, the plugins being listed by the manifest"""
 from pathlib import Path
-from pymodaq.utils.logger import set_logger
-logger = set_logger('viewer1D_plugins', add_to_console=False)
 
-for path in Path(__file__).parent.iterdir():
-    try:
-        if '__init__' not in str(path):
-            importlib.import_module('.' + path.stem, __package__)
-    except Exception as e:
-        logger.warning("{:} plugin couldn't be loaded due to some missing packages or errors: {:}".format(path.stem, str(e)))
-        pass
+from pymodaq_plugins_mock.manifest import lazy_plugins
+
+path = Path(__file__)  # the plugin modules are looked for in path.parent by pymodaq
+
+__getattr__ = lazy_plugins(__name__)
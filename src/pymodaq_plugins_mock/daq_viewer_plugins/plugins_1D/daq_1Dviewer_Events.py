@@ -0,0 +1,145 @@
+import time
+from typing import NamedTuple
+
+import numpy as np
+from qtpy.QtCore import QThread
+
+from pymodaq.control_modules.viewer_utility_classes import DAQ_Viewer_base, comon_parameters, main
+from pymodaq.utils.data import DataFromPlugins, DataToExport
+from pymodaq.utils.parameter.utils import iter_children
+
+from pymodaq_plugins_mock.hardware.events import (EVENT_DTYPE, EventGenerator, events_parameters, histogram_time,
+                                                  histogram_xy)
+from pymodaq_plugins_mock.hardware.frame_tags import FrameTagger
+from pymodaq_plugins_mock.hardware.instrumentation import PhaseTimer, instrumentation_parameters
+from pymodaq_plugins_mock.hardware.snapshot import snapshot
+
+
+class EventsSnapshot(NamedTuple):
+    """The settings read for each batch by DAQ_1DViewer_Events"""
+    period: int
+    emit_events: bool
+    histogram: str
+    time_bins: int
+    layout: str
+    nchannels: int
+    Nx: int
+    Ny: int
+
+
+SNAPSHOT_PATHS = {name: ('events', name) for name in ('layout', 'nchannels', 'Nx', 'Ny')}
+MIN_EVENTS = 2  # pymodaq considers the data of fewer points as Data0D (one point) or DataND (none)
+
+
+class DAQ_1DViewer_Events(DAQ_Viewer_base):
+    """Time tagger or event camera emitting sparse batches of Poisson distributed events
+
+    Each grab waits for the batch period then emits the events since the previous batch (see
+    :mod:`pymodaq_plugins_mock.hardware.events`):
+
+    * rate: the event rate of the batch (Data0D), with the number of events dropped so far as the dropped attribute
+      and the batch bounds as the start_ns and end_ns attributes
+    * events: the timestamp, x, y and value fields of the events (Data1D of one point per event, views of the
+      structured array of the batch), if Emit events. The number of events is the nevents attribute, batches of fewer
+      than MIN_EVENTS events being padded with null events (value 0 at the end of the batch) so as to stay Data1D
+    * on demand, the histogram of the batch along time (Data1D), or per channel (Data1D) or pixel (Data2D)
+    """
+    params = comon_parameters + [
+        {'title': 'Batch period (ms):', 'name': 'period', 'type': 'int', 'value': 10, 'min': 0},
+        {'title': 'Emit events:', 'name': 'emit_events', 'type': 'bool', 'value': True,
+         'tip': 'Emit the events themselves, otherwise only their rate and histogram'},
+        {'title': 'Histogram:', 'name': 'histogram', 'type': 'list', 'value': 'none',
+         'limits': ['none', 'time', 'xy'],
+         'tip': 'Histogram of each batch along time, or per channel or pixel'},
+        {'title': 'Time bins:', 'name': 'time_bins', 'type': 'int', 'value': 100, 'min': 1},
+    ] + events_parameters + instrumentation_parameters
+
+    def ini_attributes(self):
+        self.controller: EventGenerator = None
+        self.timer = PhaseTimer()
+        self.tagger = FrameTagger()
+        self.snapshot = snapshot(EventsSnapshot, self.settings, SNAPSHOT_PATHS)
+
+    def commit_settings(self, param):
+        self.snapshot = snapshot(EventsSnapshot, self.settings, SNAPSHOT_PATHS)
+        if param.name() in iter_children(self.settings.child('instrumentation'), []):
+            self.timer.update_from_settings(self.settings.child('instrumentation'))
+        elif param.name() in iter_children(self.settings.child('events'), []) and self.controller is not None:
+            self.controller.update_from_settings(self.settings.child('events'))
+
+    def ini_detector(self, controller=None):
+        self.ini_detector_init(controller, EventGenerator())
+        self.snapshot = snapshot(EventsSnapshot, self.settings, SNAPSHOT_PATHS)
+        self.controller.update_from_settings(self.settings.child('events'))
+        self.timer.update_from_settings(self.settings.child('instrumentation'))
+        end_ns = time.time_ns()
+        self.dte_signal_temp.emit(self.export(np.zeros((0,), dtype=EVENT_DTYPE), end_ns, end_ns))
+        self.controller.reset(end_ns)
+        return '', True
+
+    def close(self):
+        pass
+
+    def grab_data(self, Naverage=1, **kwargs):
+        """Emit the events since the previous batch once the batch period elapsed, Naverage being ignored"""
+        with self.timer.phase('total'):
+            settings = self.snapshot
+            if settings.period > 0:
+                with self.timer.phase('exposure'):
+                    QThread.msleep(settings.period)
+            start_ns = self.controller.last_ns
+            end_ns = time.time_ns()
+            with self.timer.phase('events'):
+                events = self.controller.generate(end_ns)
+            dte = self.export(events, end_ns if start_ns is None else start_ns, end_ns)
+            with self.timer.phase('emit'):
+                self.dte_signal.emit(self.tagger.tag(dte, end_ns))
+        self.timer.emit_periodic_status(self.emit_status)
+
+    def export(self, events: np.ndarray, start_ns: int, end_ns: int) -> DataToExport:
+        settings = self.snapshot
+        with self.timer.phase('export'):
+            rate = DataFromPlugins(name='rate', data=[np.array([len(events) * 1e9 / max(end_ns - start_ns, 1)])],
+                                   dim='Data0D', labels=['events/s'])
+            rate.add_extra_attribute(dropped=0 if self.controller is None else self.controller.dropped,
+                                     start_ns=start_ns, end_ns=end_ns)
+            data = [rate]
+            if settings.emit_events:
+                data.append(self.export_events(events, end_ns))
+        if settings.histogram != 'none':
+            with self.timer.phase('histogram'):
+                data.append(self.histogram(events, start_ns, end_ns))
+        return DataToExport('Events', data=data)
+
+    @staticmethod
+    def export_events(events: np.ndarray, end_ns: int) -> DataFromPlugins:
+        """The events of a batch as Data1D, padded with null events up to MIN_EVENTS"""
+        nevents = len(events)
+        if nevents < MIN_EVENTS:
+            padded = np.zeros((MIN_EVENTS,), dtype=EVENT_DTYPE)
+            padded['timestamp'] = end_ns
+            padded[:nevents] = events
+            events = padded
+        dwa = DataFromPlugins(name='events', data=[events[field] for field in EVENT_DTYPE.names], dim='Data1D',
+                              labels=list(EVENT_DTYPE.names))
+        dwa.add_extra_attribute(nevents=nevents)
+        return dwa
+
+    def histogram(self, events: np.ndarray, start_ns: int, end_ns: int) -> DataFromPlugins:
+        """Histogram of a batch according to the Histogram setting"""
+        settings = self.snapshot
+        if settings.histogram == 'time':
+            return DataFromPlugins(name='time_histogram', dim='Data1D', labels=['counts'],
+                                   data=[histogram_time(events, start_ns, end_ns, settings.time_bins)])
+        if settings.layout == 'channels':
+            return DataFromPlugins(name='histogram', dim='Data1D', labels=['counts'],
+                                   data=[histogram_xy(events, (1, settings.nchannels))[0]])
+        return DataFromPlugins(name='histogram', dim='Data2D', labels=['counts'],
+                               data=[histogram_xy(events, (settings.Ny, settings.Nx))])
+
+    def stop(self):
+        return ''
+
+
+if __name__ == '__main__':
+    main(__file__)
@@ -1,3 +1,6 @@
+import time
+from typing import NamedTuple, Tuple
+
 from qtpy.QtCore import QThread
 from qtpy import QtWidgets
 from pymodaq.control_modules.viewer_utility_classes import DAQ_Viewer_base, main
@@ -9,6 +12,29 @@ from pymodaq.utils.math_utils import gauss1D, linspace_step
 from pymodaq.control_modules.viewer_utility_classes import comon_parameters
 from pymodaq.utils.parameter.utils import iter_children
 
+from pymodaq_plugins_mock.hardware.faults import FaultInjector, fault_parameters
+from pymodaq_plugins_mock.hardware.frame_tags import FrameTagger
+from pymodaq_plugins_mock.hardware.instrumentation import PhaseTimer, instrumentation_parameters
+from pymodaq_plugins_mock.hardware.noise_bank import NoiseBank, noise_bank_parameters
+from pymodaq_plugins_mock.hardware.prefetch import FramePrefetcher, prefetch_parameters
+from pymodaq_plugins_mock.hardware.snapshot import snapshot
+
+
+class MockPeak(NamedTuple):
+    """The settings of one of the Mock groups of DAQ_1DViewer_Mock"""
+    Amp: float
+    x0: float
+    dx: float
+    n: int
+    amp_noise: float
+
+
+class Mock1DSnapshot(NamedTuple):
+    """The settings read for each spectrum by DAQ_1DViewer_Mock"""
+    rolling: int
+    multi: bool
+    peaks: Tuple[MockPeak, ...]
+
 
 class DAQ_1DViewer_Mock(DAQ_Viewer_base):
     """
@@ -37,7 +63,7 @@ class DAQ_1DViewer_Mock(DAQ_Viewer_base):
             {'title': 'x0:', 'name': 'x0', 'type': 'float', 'value': 515, },
             {'title': 'dx:', 'name': 'dx', 'type': 'float', 'value': 0.1, },
         ]},
-    ]
+    ] + prefetch_parameters + instrumentation_parameters + noise_bank_parameters + fault_parameters
     hardware_averaging = False
 
     def __init__(self, parent=None,
@@ -45,8 +71,15 @@ class DAQ_1DViewer_Mock(DAQ_Viewer_base):
         super().__init__(parent, params_state)
 
         self.x_axis: Axis = None
+        self._x_data: np.ndarray = None
         self.ind_data = 0
         self._update_x_axis = True
+        self.prefetcher = FramePrefetcher(lambda Naverage, previous: self.average_data(Naverage))
+        self.timer = PhaseTimer()
+        self.noise_bank = NoiseBank()
+        self.tagger = FrameTagger()
+        self.faults = FaultInjector()
+        self.update_snapshot()
 
     def commit_settings(self, param):
         """
@@ -61,12 +94,26 @@ class DAQ_1DViewer_Mock(DAQ_Viewer_base):
             --------
             set_Mock_data
         """
-        if param.name() in iter_children(self.settings.child('x_axis'), []):
-            if param.name() == 'x0':
-                self.get_spectro_wl()
-            self.set_x_axis()
-        else:
-            self.set_Mock_data()
+        with self.prefetcher.paused():
+            self.update_snapshot()
+            if param.name() in iter_children(self.settings.child('prefetch'), []):
+                self.prefetcher.update_from_settings(self.settings.child('prefetch'))
+                return
+            if param.name() in iter_children(self.settings.child('instrumentation'), []):
+                self.timer.update_from_settings(self.settings.child('instrumentation'))
+                return
+            if param.name() in iter_children(self.settings.child('noise_bank'), []):
+                self.noise_bank.update_from_settings(self.settings.child('noise_bank'))
+                return
+            if param.name() in iter_children(self.settings.child('faults'), []):
+                self.faults.update_from_settings(self.settings.child('faults'))
+                return
+            if param.name() in iter_children(self.settings.child('x_axis'), []):
+                if param.name() == 'x0':
+                    self.get_spectro_wl()
+                self.set_x_axis()
+            else:
+                self.set_Mock_data()
 
     def set_Mock_data(self):
         """
@@ -80,28 +127,29 @@ class DAQ_1DViewer_Mock(DAQ_Viewer_base):
             list
                 The computed data_mock list.
         """
-        ind = -1
+        settings = self.snapshot
         self.data_mock = []
         data = np.zeros((self.x_axis.size, ))
 
-        for param in self.settings.children():  #
-            if 'Mock' in param.name():
-                ind += 1
-
-                data_tmp =  \
-                    param['Amp'] * gauss1D(self.x_axis.get_data(), param.child('x0').value(),
-                                           param.child('dx').value(),
-                                           param.child('n').value())
+        for ind, peak in enumerate(settings.peaks):
+            with self.timer.phase('model'):
+                data_tmp = peak.Amp * gauss1D(self._x_data, peak.x0, peak.dx, peak.n)
                 if ind == 0:
-                    data_tmp = data_tmp * np.sin(self.x_axis.get_data() / 4) ** 2
-                data_tmp += param['amp_noise'] * np.random.rand((self.x_axis.size))
-                data_tmp = \
-                    1000 * np.roll(data_tmp, self.ind_data * self.settings['rolling'])
-                if self.settings['multi']:
-                    self.data_mock.append(data_tmp)
+                    data_tmp = data_tmp * np.sin(self._x_data / 4) ** 2
+            with self.timer.phase('noise'):
+                noise = self.noise_bank.draw(data_tmp.shape)
+                if noise is None:
+                    data_tmp += peak.amp_noise * np.random.rand((self.x_axis.size))
                 else:
-                    data += data_tmp
-        if not self.settings['multi']:
+                    data_tmp += peak.amp_noise * noise
+            with self.timer.phase('roll'):
+                data_tmp = \
+                    1000 * np.roll(data_tmp, self.ind_data * settings.rolling)
+            if settings.multi:
+                self.data_mock.append(data_tmp)
+            else:
+                data += data_tmp
+        if not settings.multi:
             self.data_mock.append(data)
         self.ind_data += 1
         return self.data_mock
@@ -113,8 +161,15 @@ class DAQ_1DViewer_Mock(DAQ_Viewer_base):
         self.x_axis = Axis(label='photon wavelength', units='nm',
                            data=linspace_step(x0 - (Npts - 1) * dx / 2, x0 + (Npts - 1) * dx / 2, dx),
                            index=0)
+        self._x_data = self.x_axis.get_data()
         self._update_x_axis = True
 
+    def update_snapshot(self):
+        """Take the snapshot of the settings read for each spectrum"""
+        self.snapshot = Mock1DSnapshot(
+            rolling=self.settings['rolling'], multi=self.settings['multi'],
+            peaks=tuple(snapshot(MockPeak, param) for param in self.settings.children() if 'Mock' in param.name()))
+
     def ini_detector(self, controller=None):
         """
             Initialisation procedure of the detector updating the status dictionnary.
@@ -140,6 +195,7 @@ class DAQ_1DViewer_Mock(DAQ_Viewer_base):
             self.settings.child('multi').setValue(True)
             self.settings.child('rolling').setValue(1)
 
+            self.update_snapshot()
             self.set_x_axis()
             self.set_Mock_data()
             # initialize viewers with the future type of data
@@ -148,6 +204,10 @@ class DAQ_1DViewer_Mock(DAQ_Viewer_base):
                                                                          dim='Data1D',
                                                                          axes=[self.x_axis],
                                                                          labels=['Mock1', 'Mock2']),]))
+            self.prefetcher.update_from_settings(self.settings.child('prefetch'))
+            self.timer.update_from_settings(self.settings.child('instrumentation'))
+            self.noise_bank.update_from_settings(self.settings.child('noise_bank'))
+            self.faults.update_from_settings(self.settings.child('faults'))
 
             initialized = True
             info = ''
@@ -155,9 +215,9 @@ class DAQ_1DViewer_Mock(DAQ_Viewer_base):
 
     def close(self):
         """
-            Not implemented.
+            Stop the eventual prefetch thread
         """
-        pass
+        self.prefetcher.stop()
 
     def grab_data(self, Naverage=1, **kwargs):
         """
@@ -181,23 +241,39 @@ class DAQ_1DViewer_Mock(DAQ_Viewer_base):
             set_Mock_data
         """
         Naverage = 1
+        with self.timer.phase('total'):
+            if self.prefetcher.is_running:
+                with self.timer.phase('prefetch_wait'):
+                    data_tot = self.prefetcher.take(Naverage)
+            else:
+                data_tot = self.average_data(Naverage)
+            acquisition_ns = time.time_ns()
+
+            with self.timer.phase('export'):
+                if not self._update_x_axis:
+                    dte = DataToExport('Mock1D',
+                                       data=[DataFromPlugins(name='Mock1D', data=data_tot, dim='Data1D',)])
+                else:
+                    dte = DataToExport('Mock1D',
+                                       data=[DataFromPlugins(name='Mock1D', data=data_tot, dim='Data1D',
+                                                             axes=[self.x_axis])])
+                    self._update_x_axis = False
+            with self.timer.phase('emit'):
+                self.faults.emit(self.dte_signal.emit, dte, self.emit_status,
+                                 tag=lambda dte: self.tagger.tag(dte, acquisition_ns))
+        self.timer.emit_periodic_status(self.emit_status)
+
+    def average_data(self, Naverage: int):
         data_tot = self.set_Mock_data()
         for ind in range(Naverage - 1):
             data_tmp = self.set_Mock_data()
 
-            for ind, data in enumerate(data_tmp):
-                data_tot[ind] += data
-
-        data_tot = [data / Naverage for data in data_tot]
+            with self.timer.phase('average'):
+                for ind, data in enumerate(data_tmp):
+                    data_tot[ind] += data
 
-        if not self._update_x_axis:
-            self.dte_signal.emit(DataToExport('Mock1D',
-                                              data=[DataFromPlugins(name='Mock1D', data=data_tot, dim='Data1D',)]))
-        else:
-            self.dte_signal.emit(DataToExport('Mock1D',
-                                              data=[DataFromPlugins(name='Mock1D', data=data_tot, dim='Data1D',
-                                                                    axes=[self.x_axis])]))
-            self._update_x_axis = False
+        with self.timer.phase('average'):
+            return [data / Naverage for data in data_tot]
 
     def stop(self):
         """
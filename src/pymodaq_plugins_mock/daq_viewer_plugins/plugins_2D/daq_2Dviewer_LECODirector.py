@@ -5,17 +5,177 @@ instrument plugin through TCP/IP using the LECO Protocol
 For this to work a coordinator must be instantiated can be done within the dashboard or directly
 running: `python -m pyleco.coordinators.coordinator`
 
+With the data stream enabled, the frames are not sent back through LECO but published by the actor on a separate
+publish/subscribe channel (see :mod:`pymodaq_plugins_mock.hardware.frame_stream`), LECO being used only for the
+commands. With prefetch also enabled, up to `buffer` frames are requested in advance during a continuous grab so that
+the frame rate is no more limited by the round trip of the commands. A single grab (a snap or a step of a scan) always
+drops the buffered frames and waits for a frame requested after it. Frames are requested in advance only once the
+actor has been seen publishing on the stream, an actor answering through LECO getting one request per grab.
 """
+import time
+from collections import deque
+from typing import Optional, Union
 
+from qtpy.QtCore import Qt, Signal
+
+import pymodaq.utils.parameter.utils as putils
+from pymodaq.utils.daq_utils import ThreadCommand, getLineInfo
+from pymodaq.utils.data import DataToExport
 from pymodaq.utils.leco.daq_xDviewer_LECODirector import DAQ_xDViewer_LECODirector, main
+from pymodaq.utils.tcp_ip.serializer import DeSerializer
+
+from pymodaq_plugins_mock.hardware.frame_stream import FrameSubscriber, stream_parameters
 
 
 class DAQ_2DViewer_LECODirector(DAQ_xDViewer_LECODirector):
     """A control module, which in the dashboard, allows to control a remote Viewer module"""
 
+    params = DAQ_xDViewer_LECODirector.params + stream_parameters
+
+    _frame_signal = Signal(object, bool)  # received frames, handed over from the receiving threads
+
     def __init__(self, parent=None, params_state=None, grabber_type: str = "2D", **kwargs) -> None:
         super().__init__(parent=parent, params_state=params_state, grabber_type=grabber_type,
                          **kwargs)
+        self.subscriber: FrameSubscriber = None
+        self.stale = 0  # frames discarded as too old, requested before a single grab or because the buffer was full
+        self.streaming: Optional[bool] = None  # whether the actor publishes on the stream, None until a frame is received
+        self._buffered = deque()  # (arrival time, dte) of the frames received but not requested by grab_data
+        self._demand = 0  # number of grab_data calls waiting for a frame
+        self._outstanding = 0  # number of frames requested to the actor and not yet received
+        self._discarded = 0  # number of outstanding frames requested before the last single grab
+        self._last_activity = 0.
+        self._frame_signal.connect(self._frame_received, Qt.QueuedConnection)
+
+    def ini_detector(self, controller=None):
+        status = super().ini_detector(controller)
+        self.update_stream()
+        return status
+
+    def commit_settings(self, param):
+        if param.name() in putils.iter_children(self.settings.child('data_stream'), []):
+            self.update_stream()
+        else:
+            self.commit_leco_settings(param)
+
+    def update_stream(self):
+        """(Re)start or stop the subscription to the data stream of the actor"""
+        if self.subscriber is not None:
+            self.subscriber.stop()
+            self.subscriber = None
+        self._buffered.clear()
+        self._demand = 0
+        self._outstanding = 0
+        self._discarded = 0
+        self.streaming = None
+        if self.settings['data_stream', 'use']:
+            self.subscriber = FrameSubscriber(self.settings['data_stream', 'address'], self.frame_received,
+                                              hwm=2 * self.settings['data_stream', 'buffer'],
+                                              error_callback=self.frame_failed)
+            self.subscriber.start()
+
+    def grab_data(self, Naverage=1, live=False, **kwargs):
+        """Emit the next frame requested by a continuous grab or request a new one
+
+        Frames are requested in advance only during a continuous grab (live) with prefetch enabled, the oldest buffered
+        frame being then emitted. Otherwise, the buffered and outstanding frames are dropped and a single frame is
+        requested.
+        """
+        if self.subscriber is None:
+            return super().grab_data(Naverage, **kwargs)
+        try:
+            max_age = self.settings['data_stream', 'max_age'] / 1000
+            now = time.perf_counter()
+            if self._outstanding and now - self._last_activity > max_age:
+                # requested frames lost (published before the subscription for instance)
+                self._outstanding = 0
+                self._discarded = 0
+            dte = None
+            if live and self.settings['data_stream', 'prefetch'] and self.streaming:
+                while self._buffered and now - self._buffered[0][0] > max_age:
+                    self._buffered.popleft()
+                    self.stale += 1
+                if self._buffered:
+                    dte = self._buffered.popleft()[1]
+                else:
+                    self._demand += 1
+                nrequests = max(0, self.settings['data_stream', 'buffer'] - self._outstanding - len(self._buffered))
+            else:
+                self.stale += len(self._buffered)
+                self._buffered.clear()
+                self._discarded += self._outstanding
+                self._outstanding = 0
+                self._demand = 1
+                nrequests = 1
+            if nrequests:
+                self._outstanding += nrequests
+                self._last_activity = now
+            self.controller.set_remote_name(self.communicator.full_name)
+            for _ in range(nrequests):
+                self.controller.send_data(grabber_type=self.grabber_type)
+            if dte is not None:
+                self.dte_signal.emit(dte)
+        except Exception as e:
+            self.emit_status(ThreadCommand('Update_Status', [getLineInfo() + str(e), "log"]))
+
+    def frame_received(self, dte: DataToExport):
+        """Called by the subscriber thread, hand the frame over to the thread of the plugin"""
+        self._frame_signal.emit(dte, True)
+
+    def frame_failed(self, error: Exception):
+        """Called by the subscriber thread when a message could not be received, hand it over too"""
+        self._frame_signal.emit(error, True)
+
+    def set_data(self, data: Union[list, str, None], additional_payload: Optional[list[bytes]] = None) -> None:
+        """Called by the listener thread with a frame sent back through LECO"""
+        if self.subscriber is None:
+            return super().set_data(data, additional_payload)
+        if isinstance(data, str):
+            deserializer = DeSerializer.from_b64_string(data)
+        elif additional_payload is not None:
+            deserializer = DeSerializer(additional_payload[0])
+        else:
+            raise NotImplementedError("Not implemented to set a list of values.")
+        self._frame_signal.emit(deserializer.dte_deserialization(), False)
+
+    def _frame_received(self, dte: Union[DataToExport, Exception], streamed: bool):
+        """Emit the frame if grab_data is waiting for it, buffer it otherwise
+
+        A message of the stream that could not be received is replaced by a new request if grab_data waits for it
+        """
+        if isinstance(dte, Exception):
+            self.emit_status(ThreadCommand('Update_Status', [f'Frame lost on the data stream: {dte}', 'log']))
+            self._outstanding = max(0, self._outstanding - 1)
+            if self._discarded:
+                self._discarded -= 1
+            elif self._demand and self.subscriber is not None:
+                self._outstanding += 1
+                self.controller.send_data(grabber_type=self.grabber_type)
+            return
+        if not streamed and self.streaming is not False:
+            self.emit_status(ThreadCommand('Update_Status', [
+                'The actor answers through LECO and not on the data stream, one frame is requested per grab', 'log']))
+        if self.streaming is None or not streamed:
+            self.streaming = streamed
+        self._outstanding = max(0, self._outstanding - 1)
+        self._last_activity = time.perf_counter()
+        if self._discarded:
+            self._discarded -= 1
+            self.stale += 1
+        elif self._demand:
+            self._demand -= 1
+            self.dte_signal.emit(dte)
+        else:
+            if len(self._buffered) >= self.settings['data_stream', 'buffer']:
+                self._buffered.popleft()
+                self.stale += 1
+            self._buffered.append((self._last_activity, dte))
+
+    def close(self) -> None:
+        if self.subscriber is not None:
+            self.subscriber.stop()
+            self.subscriber = None
+        super().close()
 
 
 if __name__ == '__main__':
@@ -1,3 +1,6 @@
+import time
+from typing import List, NamedTuple, Tuple
+
 from qtpy.QtCore import QThread, Slot, QRectF
 from qtpy import QtWidgets
 import numpy as np
@@ -6,6 +9,37 @@ from pymodaq.control_modules.viewer_utility_classes import DAQ_Viewer_base, main
 from pymodaq.utils.daq_utils import ThreadCommand, getLineInfo
 from pymodaq.utils.data import DataFromPlugins, Axis, DataToExport
 from pymodaq.utils.array_manipulation import crop_array_to_axis
+from pymodaq.utils.parameter.utils import iter_children
+
+from pymodaq_plugins_mock.hardware.faults import FaultInjector, fault_parameters
+from pymodaq_plugins_mock.hardware.frame_tags import FrameTagger
+from pymodaq_plugins_mock.hardware.instrumentation import PhaseTimer, instrumentation_parameters
+from pymodaq_plugins_mock.hardware.noise_bank import NoiseBank, noise_bank_parameters
+from pymodaq_plugins_mock.hardware.parallel import ParallelSynthesizer, parallel_parameters
+from pymodaq_plugins_mock.hardware.prefetch import FramePrefetcher, prefetch_parameters
+from pymodaq_plugins_mock.hardware.sample import SimulatedSample, coupling_parameters, sample_from_settings
+from pymodaq_plugins_mock.hardware.shm_transport import SharedFramePublisher, shm_publisher_parameters
+from pymodaq_plugins_mock.hardware.snapshot import snapshot
+
+
+class Mock2DSnapshot(NamedTuple):
+    """The settings read for each frame by DAQ_2DViewer_Mock"""
+    Nx: int
+    Ny: int
+    Amp: float
+    x0: float
+    y0: float
+    dx: float
+    dy: float
+    n: int
+    amp_noise: float
+    rolling: int
+    use_roi_select: bool
+    threshold: float
+    dtype: np.dtype
+    Nimagespannel: int
+    Nimagescolor: int
+    exposure: int
 
 
 class DAQ_2DViewer_Mock(DAQ_Viewer_base):
@@ -27,19 +61,39 @@ class DAQ_2DViewer_Mock(DAQ_Viewer_base):
         {'title': 'dy', 'name': 'dy', 'type': 'float', 'value': 40, 'default': 40, 'min': 1},
         {'title': 'n', 'name': 'n', 'type': 'int', 'value': 1, 'default': 1, 'min': 1},
         {'title': 'amp_noise', 'name': 'amp_noise', 'type': 'float', 'value': 4, 'default': 0.1, 'min': 0},
+        {'title': 'Data type:', 'name': 'dtype', 'type': 'list', 'value': 'float64',
+         'limits': ['float64', 'float32', 'uint16', 'uint8'],
+         'tip': 'Type of the emitted images, integer ones being digitized as by a camera'},
+        {'title': 'Exposure (ms):', 'name': 'exposure', 'type': 'int', 'value': 100, 'min': 0,
+         'tip': 'Simulated exposure time of each image, 0 for pipeline stress tests'},
 
         {'title': 'Cam. Prop.:', 'name': 'cam_settings', 'type': 'group', 'children': []},
-    ]
+    ] + prefetch_parameters + parallel_parameters + shm_publisher_parameters + instrumentation_parameters + \
+        noise_bank_parameters + coupling_parameters + fault_parameters
 
     def ini_attributes(self):
         self.controller: str = None
 
         self.x_axis = None
         self.y_axis = None
+        self.axes: List[Axis] = None
+        self._axes_shape = None
+        self._emitted_axes: List[Axis] = None
+        self._model: np.ndarray = None
+        self._model_key = None
         self.live = False
         self.ind_commit = 0
         self.ind_data = 0
         self._ROI = dict(position=[10, 10], size=[5, 5])
+        self.prefetcher = FramePrefetcher(lambda Naverage, previous: self.average_data(Naverage))
+        self.synthesizer = ParallelSynthesizer()
+        self.publisher: SharedFramePublisher = None
+        self.timer = PhaseTimer()
+        self.noise_bank = NoiseBank()
+        self.sample: SimulatedSample = None
+        self.tagger = FrameTagger()
+        self.faults = FaultInjector()
+        self.snapshot = snapshot(Mock2DSnapshot, self.settings)
 
     @Slot(QRectF)
     def ROISelect(self, roi_pos_size: QRectF):
@@ -60,7 +114,45 @@ class DAQ_2DViewer_Mock(DAQ_Viewer_base):
             --------
             set_Mock_data
         """
-        self.set_Mock_data()
+        with self.prefetcher.paused():
+            self.snapshot = snapshot(Mock2DSnapshot, self.settings)
+            if param.name() in iter_children(self.settings.child('prefetch'), []):
+                self.update_prefetcher()
+            elif param.name() in iter_children(self.settings.child('parallel'), []):
+                self.synthesizer.update_from_settings(self.settings.child('parallel'))
+            elif param.name() in iter_children(self.settings.child('shm_publisher'), []):
+                self.update_publisher()
+            elif param.name() in iter_children(self.settings.child('instrumentation'), []):
+                self.timer.update_from_settings(self.settings.child('instrumentation'))
+            elif param.name() in iter_children(self.settings.child('noise_bank'), []):
+                self.noise_bank.update_from_settings(self.settings.child('noise_bank'))
+            elif param.name() in iter_children(self.settings.child('coupling'), []):
+                self.sample = sample_from_settings(self.settings.child('coupling'))
+                self.update_prefetcher()
+            elif param.name() in iter_children(self.settings.child('faults'), []):
+                self.faults.update_from_settings(self.settings.child('faults'))
+            else:
+                self.set_Mock_data()
+
+    def update_prefetcher(self):
+        """Start or stop the prefetch thread according to the settings, not prefetching if coupled so that the
+        actuator positions are read when the frames are grabbed and not up to depth frames before"""
+        use_prefetch = self.settings['prefetch', 'use_prefetch']
+        if use_prefetch and self.sample is not None:
+            self.emit_status(ThreadCommand('Update_Status', ['Prefetch is not used while coupled to the actuators',
+                                                             'log']))
+        self.prefetcher.update(use_prefetch and self.sample is None, self.settings['prefetch', 'depth'])
+
+    def update_publisher(self):
+        """Create, recreate or close the shared memory publisher of the frames according to the settings"""
+        if self.publisher is not None:
+            self.publisher.close()
+            self.publisher = None
+        if self.settings['shm_publisher', 'publish']:
+            self.publisher = SharedFramePublisher(self.settings['shm_publisher', 'ring_name'],
+                                                  self.settings['shm_publisher', 'nslots'])
+            self.emit_status(ThreadCommand('Update_Status', [f'Publishing the frames into the shared memory ring '
+                                                             f'{self.publisher.name}', 'log']))
 
     def set_Mock_data(self):
         """
@@ -80,53 +172,135 @@ class DAQ_2DViewer_Mock(DAQ_Viewer_base):
             -------
                 The computed data mock.
         """
-        x_axis = np.linspace(0, self.settings.child('Nx').value(), self.settings.child('Nx').value(),
-                             endpoint=False)
-        y_axis = np.linspace(0, self.settings.child('Ny').value(), self.settings.child('Ny').value(),
-                             endpoint=False)
-        data_mock = self.settings.child('Amp').value() * (
-            mutils.gauss2D(x_axis, self.settings.child('x0').value(), self.settings.child('dx').value(),
-                          y_axis, self.settings.child('y0').value(), self.settings.child('dy').value(),
-                          self.settings.child('n').value())) + self.settings.child('amp_noise').value() * \
-                    np.random.rand(len(y_axis), len(x_axis))
-
-        for indy in range(data_mock.shape[0]):
-            data_mock[indy, :] = data_mock[indy, :] * np.sin(x_axis / 4) ** 2
-        data_mock = np.roll(data_mock, self.ind_data * self.settings.child('rolling').value(), axis=1)
-
-        if self.settings['use_roi_select']:
-            _, _, data = \
-                crop_array_to_axis(x_axis, y_axis, data_mock,
-                                   (self._ROI['position'][0], self._ROI['position'][0] + self._ROI['size'][0],
-                                    self._ROI['position'][1], self._ROI['position'][1] + self._ROI['size'][1]))
-
-
-            try:
-                self.image[self._ROI['position'][1]:self._ROI['position'][1] + self._ROI['size'][1]+1,
-                     self._ROI['position'][0]:self._ROI['position'][0] + self._ROI['size'][0]+1] = data
-
-            except Exception as e:
-                self.emit_status(ThreadCommand('Update_Status', [getLineInfo() + str(e), 'log']))
+        settings = self.snapshot
+        self.update_axes()
+        x_axis = self._x_data
+        y_axis = self._y_data
+        if self.synthesizer.is_running:
+            shift = self.ind_data * settings.rolling
+            with self.timer.phase('noise'):
+                noise = self.noise_bank.draw((len(y_axis), len(x_axis)), settings.amp_noise)
+            with self.timer.phase('model'):
+                # the workers get the spot displaced by the sample and draw the noise only if the bank is not used
+                # (or not ready yet)
+                amp, x0, y0 = self.get_spot()
+                frame = self.synthesizer.mock_2d(
+                    dict(settings._asdict(), Amp=amp, x0=x0, y0=y0,
+                         amp_noise=settings.amp_noise if noise is None else 0.), shift)
+            with self.timer.phase('noise'):
+                # the shared frame is overwritten by the next one, the noise is added while copying it
+                if noise is None:
+                    data_mock = frame.copy()
+                else:
+                    data_mock = np.multiply(noise, np.roll(self._modulation, shift))
+                    data_mock += frame
+        else:
+            with self.timer.phase('model'):
+                model = self.get_model()
+            with self.timer.phase('noise'):
+                noise = self.noise_bank.draw(model.shape, settings.amp_noise)
+                if noise is None:
+                    data_mock = model + settings.amp_noise * np.random.rand(len(y_axis), len(x_axis))
+                else:
+                    data_mock = model + noise
+
+            with self.timer.phase('modulation'):
+                data_mock *= self._modulation
+            with self.timer.phase('roll'):
+                data_mock = np.roll(data_mock, self.ind_data * settings.rolling, axis=1)
+
+        if settings.use_roi_select:
+            with self.timer.phase('roi'):
+                _, _, data = \
+                    crop_array_to_axis(x_axis, y_axis, data_mock,
+                                       (self._ROI['position'][0], self._ROI['position'][0] + self._ROI['size'][0],
+                                        self._ROI['position'][1], self._ROI['position'][1] + self._ROI['size'][1]))
+
+
+                try:
+                    self.image[self._ROI['position'][1]:self._ROI['position'][1] + self._ROI['size'][1]+1,
+                         self._ROI['position'][0]:self._ROI['position'][0] + self._ROI['size'][0]+1] = data
+
+                except Exception as e:
+                    self.emit_status(ThreadCommand('Update_Status', [getLineInfo() + str(e), 'log']))
         else:
 
             self.image = data_mock
 
         self.ind_data += 1
 
-        QThread.msleep(100)
-        self.x_axis = Axis(label='the x axis', data=x_axis, index=1)
-        self.y_axis = Axis(label='the y axis', data=y_axis, index=0)
+        if settings.exposure > 0:
+            with self.timer.phase('exposure'):
+                QThread.msleep(settings.exposure)
 
         return self.image
 
+    def get_model(self) -> np.ndarray:
+        """The noiseless gaussian image, recomputed only when its settings (or the actuator positions if coupled)
+        change
+
+        Same as Amp * gauss2D but C ordered (as are the noise and the emitted images) and read only. If coupled, the
+        gaussian is displaced and scaled by the simulated sample.
+        """
+        settings = self.snapshot
+        amp, x0, y0 = self.get_spot()
+        key = (amp, x0, settings.dx, y0, settings.dy, settings.n, self._axes_shape)
+        if key != self._model_key:
+            self._model = amp * np.outer(mutils.gauss1D(self._y_data, y0, settings.dy, settings.n),
+                                         mutils.gauss1D(self._x_data, x0, settings.dx, settings.n))
+            self._model.flags.writeable = False
+            self._model_key = key
+        return self._model
+
+    def get_spot(self) -> Tuple[float, float, float]:
+        """The amplitude and center (x0, y0) of the gaussian, displaced and scaled by the simulated sample at the
+        current actuator positions if coupled"""
+        settings = self.snapshot
+        amp, x0, y0 = settings.Amp, settings.x0, settings.y0
+        if self.sample is not None:
+            with self.timer.phase('sample'):
+                positions = self.sample.positions()
+                offset_x, offset_y = self.sample.offset(positions)
+                amp, x0, y0 = amp * self.sample.gain(positions), x0 + offset_x, y0 + offset_y
+        return float(amp), float(x0), float(y0)
+
+    def update_axes(self):
+        """Rebuild the axes if Nx or Ny changed, the data then getting the new axes when emitted"""
+        shape = (self.snapshot.Ny, self.snapshot.Nx)
+        if shape != self._axes_shape:
+            self._x_data = np.linspace(0, shape[1], shape[1], endpoint=False)
+            self._y_data = np.linspace(0, shape[0], shape[0], endpoint=False)
+            self._modulation = np.sin(self._x_data / 4) ** 2
+            self.x_axis = Axis(label='the x axis', data=self._x_data, index=1)
+            self.y_axis = Axis(label='the y axis', data=self._y_data, index=0)
+            self.axes = [self.y_axis, self.x_axis]
+            self._axes_shape = shape
+
+    def attach_axes(self, data: DataToExport) -> DataToExport:
+        """Give the axes to the data if they differ from the ones of the last emitted frame, the viewers keeping
+        the axes they got otherwise"""
+        if self._emitted_axes is not self.axes:
+            for dwa in data:
+                dwa.axes = self.axes
+            self._emitted_axes = self.axes
+        return data
+
     def ini_detector(self, controller=None):
         self.ini_detector_init(controller, "Mock controller")
+        self.snapshot = snapshot(Mock2DSnapshot, self.settings)
+        self.synthesizer.update_from_settings(self.settings.child('parallel'))
+        self.update_publisher()
 
         self.x_axis = self.get_xaxis()
         self.y_axis = self.get_yaxis()
 
         # initialize viewers with the future type of data but with 0value data
-        self.dte_signal_temp.emit(self.average_data(1, True))
+        self.dte_signal_temp.emit(self.average_data(1, True, axes=True))
+        self.timer.update_from_settings(self.settings.child('instrumentation'))
+        self.noise_bank.update_from_settings(self.settings.child('noise_bank'))
+        self.faults.update_from_settings(self.settings.child('faults'))
+        self.sample = sample_from_settings(self.settings.child('coupling'))
+        self.update_prefetcher()
 
         initialized = True
         info = 'Init'
@@ -134,9 +308,13 @@ class DAQ_2DViewer_Mock(DAQ_Viewer_base):
 
     def close(self):
         """
-            not implemented.
+            Stop the eventual prefetch thread and worker processes and destroy the shared memory ring
         """
-        pass
+        self.prefetcher.stop()
+        self.synthesizer.shutdown()
+        if self.publisher is not None:
+            self.publisher.close()
+            self.publisher = None
 
     def get_xaxis(self):
         self.set_Mock_data()
@@ -170,29 +348,75 @@ class DAQ_2DViewer_Mock(DAQ_Viewer_base):
 
         if self.live:
             while self.live:
-                data = self.average_data(Naverage)
-                QThread.msleep(100)
-                self.dte_signal.emit(data)
+                data = self.get_data(Naverage)
+                acquisition_ns = time.time_ns()
+                QThread.msleep(self.snapshot.exposure)
+                self.faults.emit(self.emit_frame, self.attach_axes(data), self.emit_status,
+                                 tag=lambda dte: self.tagger.tag(dte, acquisition_ns))
                 QtWidgets.QApplication.processEvents()
         else:
-            data = self.average_data(Naverage)
-            self.dte_signal.emit(data)
-
-    def average_data(self, Naverage, init=False):
+            with self.timer.phase('total'):
+                data = self.get_data(Naverage)
+                acquisition_ns = time.time_ns()
+                with self.timer.phase('axes'):
+                    self.attach_axes(data)
+                with self.timer.phase('emit'):
+                    self.faults.emit(self.emit_frame, data, self.emit_status,
+                                     tag=lambda dte: self.tagger.tag(dte, acquisition_ns))
+            self.timer.emit_periodic_status(self.emit_status)
+
+    def emit_frame(self, data: DataToExport):
+        """Publish a tagged frame, not dropped by the fault injection, then emit it"""
+        with self.timer.phase('publish'):
+            self.publish(data)
+        self.dte_signal.emit(data)
+
+    def publish(self, data: DataToExport):
+        """Write the frame into the shared memory ring if publishing, timestamped with its acquisition time
+
+        Only the first channel of the first data is published: all the channels of the Mock are the same image.
+        """
+        if self.publisher is not None and len(data) > 0:
+            acquisition_ns = getattr(data[0], 'acquisition_ns', None)
+            try:
+                self.publisher.publish(data[0][0], None if acquisition_ns is None else acquisition_ns * 1e-9)
+            except FileExistsError as e:
+                self.emit_status(ThreadCommand('Update_Status', [str(e), 'log']))
+                self.publisher = None
+                self.settings.child('shm_publisher', 'publish').setValue(False)
+
+    def get_data(self, Naverage: int) -> DataToExport:
+        """Get the next data either from the prefetch thread or computing them right now"""
+        if self.prefetcher.is_running:
+            with self.timer.phase('prefetch_wait'):
+                return self.prefetcher.take(Naverage)
+        return self.average_data(Naverage)
+
+    def average_data(self, Naverage, init=False, axes=False):
+        """Average Naverage images into a DataToExport, with the axes only if axes is True (see attach_axes)"""
         data = []  # list of image (at most 3 for red, green and blue channels)
         data_tmp = np.zeros_like(self.image)
         for ind in range(Naverage):
-            data_tmp += self.set_Mock_data()
-        data_tmp = data_tmp / Naverage
-
-        data_tmp = data_tmp * (data_tmp >= self.settings['threshold']) * (init is False)
-        for ind in range(self.settings['Nimagespannel']):
-            datatmptmp = []
-            for indbis in range(self.settings['Nimagescolor']):
-                datatmptmp.append(data_tmp)
-            data.append(DataFromPlugins(name='Mock2D_{:d}'.format(ind), data=datatmptmp, dim='Data2D',
-                                        axes=[self.y_axis, self.x_axis]))
-        return DataToExport('Mock2D', data=data)
+            image = self.set_Mock_data()
+            with self.timer.phase('average'):
+                data_tmp += image
+        with self.timer.phase('average'):
+            data_tmp = data_tmp / Naverage
+
+            settings = self.snapshot
+            data_tmp = data_tmp * (data_tmp >= settings.threshold) * (init is False)
+            dtype = settings.dtype
+            if dtype.kind == 'u':
+                data_tmp = np.clip(np.rint(data_tmp), 0, np.iinfo(dtype).max)
+            data_tmp = data_tmp.astype(dtype, copy=False)
+        with self.timer.phase('export'):
+            for ind in range(settings.Nimagespannel):
+                datatmptmp = []
+                for indbis in range(settings.Nimagescolor):
+                    datatmptmp.append(data_tmp)
+                data.append(DataFromPlugins(name='Mock2D_{:d}'.format(ind), data=datatmptmp, dim='Data2D',
+                                            axes=self.axes if axes else []))
+            return DataToExport('Mock2D', data=data)
 
     def stop(self):
         """
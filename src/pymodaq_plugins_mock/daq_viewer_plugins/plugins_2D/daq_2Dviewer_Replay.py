@@ -0,0 +1,17 @@
+from pymodaq.control_modules.viewer_utility_classes import main
+
+from pymodaq_plugins_mock.daq_viewer_plugins.utility_classes import DAQ_Viewer_Replay
+
+
+class DAQ_2DViewer_Replay(DAQ_Viewer_Replay):
+    """Play back recorded 2D frames of shape (Ny, Nx), or (C, Ny, Nx) for C channels
+
+    See Also
+    --------
+    utility_classes.DAQ_Viewer_Replay
+    """
+    grabber_type = '2D'
+
+
+if __name__ == '__main__':
+    main(__file__)
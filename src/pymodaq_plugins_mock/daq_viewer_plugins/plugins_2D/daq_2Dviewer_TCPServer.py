@@ -1,9 +1,11 @@
 from qtpy.QtCore import Signal, Slot
-from pymodaq.control_modules.viewer_utility_classes import DAQ_Viewer_TCP_server
 from pymodaq.utils.data import DataFromPlugins, Axis, DataToExport
 
+from pymodaq_plugins_mock.daq_viewer_plugins.utility_classes import DAQ_Viewer_BinaryTCPServer, fan_out_parameters
+from pymodaq_plugins_mock.hardware.codecs import codec_parameters
 
-class DAQ_2DViewer_TCPServer(DAQ_Viewer_TCP_server):
+
+class DAQ_2DViewer_TCPServer(DAQ_Viewer_BinaryTCPServer):
     """
         ================= ==============================
         **Attributes**      **Type**
@@ -15,11 +17,11 @@ class DAQ_2DViewer_TCPServer(DAQ_Viewer_TCP_server):
 
         See Also
         --------
-        utility_classes.DAQ_TCP_server
+        utility_classes.DAQ_Viewer_BinaryTCPServer
     """
     params_GRABBER = []
 
-    # params = DAQ_TCP_server.params
+    params = DAQ_Viewer_BinaryTCPServer.params + codec_parameters + fan_out_parameters
 
     command_server = Signal(list)
 
@@ -1,13 +1,51 @@
+import time
+from typing import List, NamedTuple
+
 from qtpy.QtCore import QThread
 from qtpy import QtWidgets
 import numpy as np
-import pymodaq.utils.daq_utils as utils
 from pymodaq.control_modules.viewer_utility_classes import DAQ_Viewer_base, main
 from easydict import EasyDict as edict
 from collections import OrderedDict
 from pymodaq.utils.daq_utils import ThreadCommand, getLineInfo
 from pymodaq.utils.data import Axis, DataFromPlugins, NavAxis, DataToExport
 from pymodaq.control_modules.viewer_utility_classes import comon_parameters
+from pymodaq.utils.parameter.utils import iter_children
+
+from pymodaq_plugins_mock.hardware.faults import FaultInjector, fault_parameters
+from pymodaq_plugins_mock.hardware.frame_tags import FrameTagger
+from pymodaq_plugins_mock.hardware.instrumentation import PhaseTimer, instrumentation_parameters
+from pymodaq_plugins_mock.hardware.nd_source import LazyNDSource, MemmapScratch
+from pymodaq_plugins_mock.hardware.parallel import ParallelSynthesizer, parallel_parameters
+from pymodaq_plugins_mock.hardware.prefetch import FramePrefetcher, prefetch_parameters
+from pymodaq_plugins_mock.hardware.snapshot import snapshot
+
+
+class MockNDSnapshot(NamedTuple):
+    """The settings of the lazy source and the ones read for each cube by DAQ_NDViewer_Mock"""
+    Nx: int
+    Ny: int
+    Nt: int
+    amp: float
+    x0: float
+    y0: float
+    dx: float
+    dy: float
+    n: int
+    wavelength: float
+    t0: float
+    dt: float
+    nt: int
+    amp_noise: float
+    rolling: int
+    use_memmap: bool
+    chunk_rows: int
+
+
+SNAPSHOT_PATHS = {**{name: ('spatial_settings', name) for name in ('Nx', 'Ny', 'amp', 'x0', 'y0', 'dx', 'dy', 'n')},
+                  **{name: ('temp_settings', name) for name in ('Nt', 't0', 'dt')},
+                  'wavelength': ('spatial_settings', 'lambda'), 'nt': ('temp_settings', 'n'),
+                  'use_memmap': ('memory_settings', 'use_memmap'), 'chunk_rows': ('memory_settings', 'chunk_rows')}
 
 
 class DAQ_NDViewer_Mock(DAQ_Viewer_base):
@@ -45,18 +83,39 @@ class DAQ_NDViewer_Mock(DAQ_Viewer_base):
             {'title': 'dt', 'name': 'dt', 'type': 'float', 'value': 20, 'default': 20, 'min': 1},
             {'title': 'n', 'name': 'n', 'type': 'int', 'value': 1, 'default': 1, 'min': 1},
         ]},
+        {'title': 'Memory:', 'name': 'memory_settings', 'type': 'group', 'children': [
+            {'title': 'Memory mapped:', 'name': 'use_memmap', 'type': 'bool', 'value': False,
+             'tip': 'If True, the data cube is written into a numpy.memmap scratch file and never lives in RAM'},
+            {'title': 'Scratch folder:', 'name': 'memmap_folder', 'type': 'browsepath', 'value': '',
+             'filetype': False, 'tip': 'Folder of the scratch file, the temporary folder is used if empty'},
+            {'title': 'Rows per chunk:', 'name': 'chunk_rows', 'type': 'int', 'value': 16, 'min': 1,
+             'tip': 'Number of navigation rows computed at once, sets the peak memory of the computation'},
+        ]},
 
         {'title': 'Cam. Prop.:', 'name': 'cam_settings', 'type': 'group', 'children': []},
-    ]
+    ] + prefetch_parameters + parallel_parameters + instrumentation_parameters + fault_parameters
 
     def __init__(self, parent=None,
                  params_state=None):  # init_params is a list of tuple where each tuple contains info on a 1D channel (Ntps,amplitude, width, position and noise)
         super().__init__(parent, params_state)
         self.x_axis = None
         self.y_axis = None
+        self.time_axis = None
+        self.axes: List[Axis] = None
+        self._axes_shape = None
+        self._emitted_axes: List[Axis] = None
+        self.image: np.ndarray = None
         self.live = False
         self.ind_commit = 0
         self.ind_data = 0
+        self.source = LazyNDSource()
+        self._scratch = MemmapScratch()
+        self.prefetcher = FramePrefetcher(self.average_data)
+        self.synthesizer = ParallelSynthesizer()
+        self.timer = PhaseTimer()
+        self.tagger = FrameTagger()
+        self.faults = FaultInjector()
+        self.snapshot = snapshot(MockNDSnapshot, self.settings, SNAPSHOT_PATHS)
 
     def commit_settings(self, param):
         """
@@ -69,16 +128,82 @@ class DAQ_NDViewer_Mock(DAQ_Viewer_base):
 
             See Also
             --------
-            set_Mock_data
+            set_source
+        """
+        with self.prefetcher.paused():
+            self.snapshot = snapshot(MockNDSnapshot, self.settings, SNAPSHOT_PATHS)
+            if param.name() in iter_children(self.settings.child('prefetch'), []):
+                self.prefetcher.update_from_settings(self.settings.child('prefetch'))
+                return
+            if param.name() in iter_children(self.settings.child('parallel'), []):
+                self.synthesizer.update_from_settings(self.settings.child('parallel'))
+                return
+            if param.name() in iter_children(self.settings.child('instrumentation'), []):
+                self.timer.update_from_settings(self.settings.child('instrumentation'))
+                return
+            if param.name() in iter_children(self.settings.child('faults'), []):
+                self.faults.update_from_settings(self.settings.child('faults'))
+                return
+            if param.name() == 'memmap_folder':
+                self._scratch.close()
+                self._scratch = MemmapScratch(param.value())
+            self.set_source()
+
+    def set_source(self):
+        """Update the lazy source of the data cube with the settings values
+
+        Nothing is computed here, the cube is only produced chunk by chunk when data are grabbed
+        """
+        shape = self.source.shape
+        for name in ('Nx', 'Ny', 'Nt', 'amp', 'x0', 'y0', 'dx', 'dy', 'n', 'wavelength', 't0', 'dt', 'nt',
+                     'amp_noise', 'rolling'):
+            setattr(self.source, name, getattr(self.snapshot, name))
+        if self.source.shape != shape:
+            self._scratch.close()
+
+        self.x_axis = self.source.x_axis
+        self.y_axis = self.source.y_axis
+        self.time_axis = self.source.time_axis
+        if self.source.shape != self._axes_shape:
+            self.axes = [Axis(data=self.x_axis, label='X space', index=1),
+                         Axis(data=self.y_axis, label='Y space', index=0),
+                         Axis(data=self.time_axis, label='time label', index=2)]
+            self._axes_shape = self.source.shape
+
+    def attach_axes(self, data: DataToExport) -> DataToExport:
+        """Give the axes to the data if they differ from the ones of the last emitted cube, the viewers keeping
+        the axes they got otherwise"""
+        if self._emitted_axes is not self.axes:
+            for dwa in data:
+                dwa.axes = self.axes
+            self._emitted_axes = self.axes
+        return data
+
+    def get_buffer(self, previous: np.ndarray = None) -> np.ndarray:
+        """Get the array where to write the next data cube
+
+        Parameters
+        ----------
+        previous: ndarray, optional
+            a buffer owned by the caller, reused if still compatible with the settings. Otherwise, either a new
+            array in RAM or a memory mapped scratch file no longer referenced by the consumers of the emitted data is
+            returned.
         """
-        self.set_Mock_data()
+        use_memmap = self.snapshot.use_memmap
+        if previous is not None and previous.shape == self.source.shape and \
+                isinstance(previous, np.memmap) == use_memmap:
+            return previous
+        if use_memmap:
+            return self._scratch.get_array(self.source.shape, self.source.dtype)
+        else:
+            return np.empty(self.source.shape, dtype=self.source.dtype)
 
     def set_Mock_data(self):
         """
-            | Set the x_axis and y_axis with a linspace distribution from settings parameters.
+            | Compute a single data cube from the lazy source, navigation tile per navigation tile.
             |
 
-            Once done, set the data mock with parameters :
+            The data mock is set with parameters :
                 * **Amp** : The amplitude
                 * **x0** : the origin of x
                 * **dx** : the derivative x pos
@@ -91,51 +216,26 @@ class DAQ_NDViewer_Mock(DAQ_Viewer_base):
             -------
                 The computed data mock.
         """
-        image = np.zeros((self.settings.child('spatial_settings', 'Ny').value(),
-                          self.settings.child('spatial_settings', 'Nx').value(),
-                          self.settings.child('temp_settings', 'Nt').value()))
-
-        self.time_axis = np.linspace(0, self.settings.child('temp_settings', 'Nt').value(),
-                                     self.settings.child('temp_settings', 'Nt').value(),
-                                     endpoint=False)
+        return self.average_frames(1)
 
-        self.x_axis = np.linspace(0, self.settings.child('spatial_settings', 'Nx').value(),
-                                  self.settings.child('spatial_settings', 'Nx').value(),
-                                  endpoint=False)
-        self.y_axis = np.linspace(0, self.settings.child('spatial_settings', 'Ny').value(),
-                                  self.settings.child('spatial_settings', 'Ny').value(),
-                                  endpoint=False)
+    def average_frames(self, Naverage: int, previous: np.ndarray = None) -> np.ndarray:
+        """Average Naverage data cubes into the buffer returned by get_buffer
 
-        data_mock = self.settings.child('spatial_settings', 'amp').value() * (
-            utils.gauss2D(self.x_axis, self.settings.child('spatial_settings', 'x0').value(),
-                          self.settings.child('spatial_settings', 'dx').value(),
-                          self.y_axis, self.settings.child('spatial_settings', 'y0').value(),
-                          self.settings.child('spatial_settings', 'dy').value(),
-                          self.settings.child('spatial_settings', 'n').value())) + \
-            self.settings.child(('amp_noise')).value() * \
-            np.random.rand(len(self.y_axis), len(self.x_axis))
-
-        for indy in range(data_mock.shape[0]):
-            data_mock[indy, :] = data_mock[indy, :] * np.sin(
-                self.x_axis / self.settings.child('spatial_settings', 'lambda').value()) ** 2
-
-        ind = 0
-        for indy in range(data_mock.shape[0]):
-            for indx in range(data_mock.shape[1]):
-                image[indy, indx, :] = data_mock[indy, indx] * \
-                    utils.gauss1D(self.time_axis, self.settings.child('temp_settings', 't0').value(),
-                                  self.settings.child('temp_settings', 'dt').value(),
-                                  self.settings.child('temp_settings', 'n').value()) * \
-                    np.sin(np.roll(self.time_axis, ind) / 4) ** 2
-                ind += 1
-
-        image = np.roll(image, self.ind_data * self.settings.child(('rolling')).value(), axis=1)
-
-        self.image = image
-
-        self.ind_data += 1
+        The navigation rows are computed by the worker processes if the process pool is used. The model, noise,
+        roll and averaging being fused chunk per chunk by the source, they are timed as a single model phase
+        """
+        with self.timer.phase('model'):
+            if self.synthesizer.is_running:
+                self.image = self.synthesizer.average_nd(self.source, Naverage, self.ind_data,
+                                                         self.get_buffer(previous),
+                                                         rows=self.snapshot.chunk_rows)
+            else:
+                self.image = self.source.average(Naverage, self.ind_data, self.get_buffer(previous),
+                                                 rows=self.snapshot.chunk_rows)
+        self.ind_data += Naverage
 
-        QThread.msleep(100)
+        with self.timer.phase('exposure'):
+            QThread.msleep(100 * Naverage)
 
         return self.image
 
@@ -156,7 +256,12 @@ class DAQ_NDViewer_Mock(DAQ_Viewer_base):
         else:
             self.controller = "Mock controller"
 
-        self.set_Mock_data()
+        self.snapshot = snapshot(MockNDSnapshot, self.settings, SNAPSHOT_PATHS)
+        self.set_source()
+        self.synthesizer.update_from_settings(self.settings.child('parallel'))
+        self.prefetcher.update_from_settings(self.settings.child('prefetch'))
+        self.timer.update_from_settings(self.settings.child('instrumentation'))
+        self.faults.update_from_settings(self.settings.child('faults'))
         # # initialize viewers with the future type of data
         # self.dte_signal_temp.emit(DataToExport('MockND',
         #                                        data=[DataFromPlugins(name='MockND', data=[np.zeros((128, 30, 10))],
@@ -168,9 +273,11 @@ class DAQ_NDViewer_Mock(DAQ_Viewer_base):
 
     def close(self):
         """
-            not implemented.
+            Stop the eventual prefetch thread and worker processes and release the memory mapped scratch files
         """
-        pass
+        self.prefetcher.stop()
+        self.synthesizer.shutdown()
+        self._scratch.close()
 
     def grab_data(self, Naverage=1, **kwargs):
         """
@@ -196,27 +303,44 @@ class DAQ_NDViewer_Mock(DAQ_Viewer_base):
 
         if self.live:
             while self.live:
-                data = self.average_data(Naverage)
+                data = self.get_data(Naverage)
+                acquisition_ns = time.time_ns()
                 QThread.msleep(100)
-                self.dte_signal.emit(data)
+                self.faults.emit(self.dte_signal.emit, self.attach_axes(data), self.emit_status,
+                                 tag=lambda dte: self.tagger.tag(dte, acquisition_ns))
                 QtWidgets.QApplication.processEvents()
         else:
-            data = self.average_data(Naverage)
-            QThread.msleep(000)
-            self.dte_signal.emit(data)
-
-    def average_data(self, Naverage):
-        data_tmp = np.zeros_like(self.image)
-        for ind in range(Naverage):
-            data_tmp += self.set_Mock_data()
-        data_tmp = data_tmp / Naverage
-
-        data = DataToExport('MockND',
-                            data=[DataFromPlugins(name='MockND_{:d}'.format(ind), data=[data_tmp], dim='DataND',
-                                                  nav_indexes=(0, 1),
-                                                  axes=[Axis(data=self.x_axis, label='X space', index=1),
-                                                        Axis(data=self.y_axis, label='Y space', index=0),
-                                                        Axis(data=self.time_axis, label='time label', index=2)])])
+            with self.timer.phase('total'):
+                data = self.get_data(Naverage)
+                acquisition_ns = time.time_ns()
+                QThread.msleep(000)
+                with self.timer.phase('axes'):
+                    self.attach_axes(data)
+                with self.timer.phase('emit'):
+                    self.faults.emit(self.dte_signal.emit, data, self.emit_status,
+                                     tag=lambda dte: self.tagger.tag(dte, acquisition_ns))
+            self.timer.emit_periodic_status(self.emit_status)
+
+    def get_data(self, Naverage: int) -> DataToExport:
+        """Get the next data either from the prefetch thread or computing them right now"""
+        if self.prefetcher.is_running:
+            with self.timer.phase('prefetch_wait'):
+                return self.prefetcher.take(Naverage)
+        return self.average_data(Naverage)
+
+    def average_data(self, Naverage, previous: DataToExport = None):
+        """Average Naverage cubes, reusing the array of the previous data if given (prefetch mode)
+
+        The data are without axes, given when emitted only if they changed (see attach_axes)
+        """
+        data_tmp = self.average_frames(Naverage, None if previous is None else previous.data[0].data[0])
+        if isinstance(data_tmp, np.memmap):
+            data_tmp.flush()
+
+        with self.timer.phase('export'):
+            data = DataToExport('MockND',
+                                data=[DataFromPlugins(name='MockND_0', data=[data_tmp], dim='DataND',
+                                                      nav_indexes=(0, 1))])
         return data
 
     def stop(self):
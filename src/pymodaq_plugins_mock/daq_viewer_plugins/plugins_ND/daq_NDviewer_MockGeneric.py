@@ -0,0 +1,145 @@
+import time
+from typing import List
+
+import numpy as np
+from pymodaq.control_modules.viewer_utility_classes import DAQ_Viewer_base, comon_parameters, main
+from pymodaq.utils.data import Axis, DataFromPlugins, DataToExport
+from pymodaq.utils.parameter.utils import iter_children
+
+from pymodaq_plugins_mock.hardware.frame_tags import FrameTagger
+from pymodaq_plugins_mock.hardware.nd_source import SeparableNDSource
+from pymodaq_plugins_mock.hardware.prefetch import FramePrefetcher, prefetch_parameters
+
+
+def axis_group(kind: str, index: int, size: int) -> dict:
+    """Get the settings group of one separable axis
+
+    Parameters
+    ----------
+    kind: str
+        either 'nav' or 'sig'
+    index: int
+        index of the axis within its kind
+    size: int
+        default number of points along the axis
+    """
+    return {'title': f'{kind.capitalize()} axis {index}:', 'name': f'{kind}{index:02d}', 'type': 'group',
+            'children': [
+                {'title': 'Size', 'name': 'size', 'type': 'int', 'value': size, 'min': 1},
+                {'title': 'x0', 'name': 'x0', 'type': 'float', 'value': size / 2},
+                {'title': 'dx', 'name': 'dx', 'type': 'float', 'value': max(size / 4, 1), 'min': 0.1},
+                {'title': 'n', 'name': 'n', 'type': 'int', 'value': 1, 'min': 1},
+            ]}
+
+
+class DAQ_NDViewer_MockGeneric(DAQ_Viewer_base):
+    """Virtual instrument generating ND data with any number of navigation and signal axes
+
+    Each axis has its own gaussian profile and the data is their outer product (computed in one broadcasted
+    operation) plus some noise. Navigation axes come first in the data shape.
+    """
+
+    params = comon_parameters + [
+        {'title': 'Amp', 'name': 'amp', 'type': 'float', 'value': 20, 'default': 20, 'min': 0},
+        {'title': 'amp_noise', 'name': 'amp_noise', 'type': 'float', 'value': 1, 'default': 1, 'min': 0},
+        {'title': 'N nav. axes:', 'name': 'Nnav', 'type': 'int', 'value': 3, 'default': 3, 'min': 0},
+        {'title': 'N sig. axes:', 'name': 'Nsig', 'type': 'int', 'value': 2, 'default': 2, 'min': 1,
+         'tip': 'PyMoDAQ viewers display up to 2 signal axes'},
+        {'title': 'Navigation axes:', 'name': 'nav_axes', 'type': 'group',
+         'children': [axis_group('nav', ind, size) for ind, size in enumerate((10, 20, 5))]},
+        {'title': 'Signal axes:', 'name': 'sig_axes', 'type': 'group',
+         'children': [axis_group('sig', ind, size) for ind, size in enumerate((64, 32))]},
+    ] + prefetch_parameters
+
+    def ini_attributes(self):
+        self.controller: str = None
+        self.source: SeparableNDSource = None
+        self.axes: List[Axis] = []
+        self.prefetcher = FramePrefetcher(self.average_data)
+        self.tagger = FrameTagger()
+
+    def commit_settings(self, param):
+        """Rebuild the axes settings if their number changed then update the source"""
+        with self.prefetcher.paused():
+            if param.name() in iter_children(self.settings.child('prefetch'), []):
+                self.prefetcher.update_from_settings(self.settings.child('prefetch'))
+                return
+            if param.name() == 'Nnav':
+                self.update_axes_settings('nav', param.value())
+            elif param.name() == 'Nsig':
+                self.update_axes_settings('sig', max(param.value(), 1))  # the data have at least one signal axis
+            self.set_source()
+
+    def update_axes_settings(self, kind: str, naxes: int):
+        """Add or remove axis groups so that there are naxes of the given kind"""
+        group = self.settings.child(f'{kind}_axes')
+        children = group.children()
+        for child in children[naxes:]:
+            group.removeChild(child)
+        group.addChildren([axis_group(kind, ind, 10) for ind in range(len(children), naxes)])
+
+    def set_source(self):
+        """Build the separable source and the axes from the settings"""
+        nav_groups = self.settings.child('nav_axes').children()
+        sig_groups = self.settings.child('sig_axes').children()
+        self.source = SeparableNDSource([group['size'] for group in nav_groups],
+                                        [group['size'] for group in sig_groups])
+        self.source.amp = self.settings['amp']
+        self.source.amp_noise = self.settings['amp_noise']
+
+        self.axes = []
+        for index, group in enumerate(nav_groups + sig_groups):
+            self.source.set_profile(index, group['x0'], group['dx'], group['n'])
+            self.axes.append(Axis(label=group.title()[:-1], data=np.arange(group['size'], dtype=float),
+                                  index=index))
+
+    def ini_detector(self, controller=None):
+        self.ini_detector_init(controller, "Mock controller")
+        self.set_source()
+        self.prefetcher.update_from_settings(self.settings.child('prefetch'))
+
+        initialized = True
+        info = 'Init'
+        return info, initialized
+
+    def close(self):
+        """
+            Stop the eventual prefetch thread
+        """
+        self.prefetcher.stop()
+
+    def grab_data(self, Naverage=1, **kwargs):
+        """Average Naverage frames of the separable source and emit them
+
+        Parameters
+        ----------
+        Naverage: int
+            Number of frames to average
+        """
+        if self.prefetcher.is_running:
+            data = self.prefetcher.take(Naverage)
+        else:
+            data = self.average_data(Naverage)
+        acquisition_ns = time.time_ns()
+        self.dte_signal.emit(self.tagger.tag(
+            DataToExport('MockGeneric', data=[DataFromPlugins(name='MockGeneric', data=[data], dim='DataND',
+                                                              nav_indexes=self.source.nav_indexes,
+                                                              axes=self.axes)]),
+            acquisition_ns))
+
+    def average_data(self, Naverage: int, previous: np.ndarray = None) -> np.ndarray:
+        """Average Naverage frames, reusing the previous array if given and still of the right shape"""
+        source = self.source
+        if previous is not None and previous.shape != source.shape:
+            previous = None
+        return source.average(Naverage, out=previous)
+
+    def stop(self):
+        """
+            not implemented.
+        """
+        return ""
+
+
+if __name__ == '__main__':
+    main(__file__, init=True)
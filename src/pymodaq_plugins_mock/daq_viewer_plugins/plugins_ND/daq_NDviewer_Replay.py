@@ -0,0 +1,28 @@
+import numpy as np
+
+from pymodaq.control_modules.viewer_utility_classes import main
+from pymodaq.utils.data import DataFromPlugins
+
+from pymodaq_plugins_mock.daq_viewer_plugins.utility_classes import DAQ_Viewer_Replay
+
+
+class DAQ_NDViewer_Replay(DAQ_Viewer_Replay):
+    """Play back recorded ND frames, their first axes being navigation axes as set by the Navigation axes setting
+
+    See Also
+    --------
+    utility_classes.DAQ_Viewer_Replay
+    """
+    grabber_type = 'ND'
+    params = DAQ_Viewer_Replay.params + [
+        {'title': 'Navigation axes:', 'name': 'nav_axes', 'type': 'int', 'value': 0, 'min': 0,
+         'tip': 'Number of the first axes of the frames being navigation axes'},
+    ]
+
+    def data_from_frame(self, frame: np.ndarray) -> DataFromPlugins:
+        return DataFromPlugins(name='Replay', data=[frame], dim='DataND',
+                               nav_indexes=tuple(range(min(self.settings['nav_axes'], frame.ndim))))
+
+
+if __name__ == '__main__':
+    main(__file__)
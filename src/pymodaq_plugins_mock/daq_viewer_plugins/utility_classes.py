@@ -0,0 +1,497 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Base classes shared by the viewer plugins of this package
+"""
+import selectors
+import socket
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Set
+
+import numpy as np
+from qtpy.QtCore import Qt, Signal
+
+from pymodaq.control_modules.viewer_utility_classes import DAQ_Viewer_base, DAQ_Viewer_TCP_server, comon_parameters
+from pymodaq.utils.daq_utils import ThreadCommand
+from pymodaq.utils.data import DataFromPlugins, DataToExport
+from pymodaq.utils.parameter.utils import iter_children
+from pymodaq.utils.tcp_ip.mysocket import Socket
+from pymodaq.utils.tcp_ip.serializer import DeSerializer
+
+from pymodaq_plugins_mock.hardware.frame_tags import FrameTagger
+from pymodaq_plugins_mock.hardware.instrumentation import PhaseTimer, instrumentation_parameters
+from pymodaq_plugins_mock.hardware.prefetch import FramePrefetcher
+from pymodaq_plugins_mock.hardware.replay import ReplayClock, ReplayFrame, ReplaySource, replay_parameters
+from pymodaq_plugins_mock.hardware.snapshot import snapshot
+from pymodaq_plugins_mock.hardware.tcp_frames import Frame, FrameReceiver, decode_frames, recv_exactly_into
+
+fan_out_parameters = [
+    {'title': 'Fan out:', 'name': 'fan_out', 'type': 'group', 'expanded': False, 'children': [
+        {'title': 'Enabled:', 'name': 'enabled', 'type': 'bool', 'value': False,
+         'tip': 'Request data from all the connected grabbers concurrently and gather their answers'},
+        {'title': 'Timeout (ms):', 'name': 'timeout', 'type': 'int', 'value': 1000, 'min': 1,
+         'tip': 'Grabbers not answering in time are skipped until they answer'},
+    ]},
+]
+
+
+def recv_string(sock) -> str:
+    """Read a serialized string from a socket, raising ConnectionError if the connection is closed"""
+    length = bytearray(4)
+    recv_exactly_into(sock, length)
+    message = bytearray(int.from_bytes(length, 'big'))
+    recv_exactly_into(sock, message)
+    return message.decode()
+
+
+class DAQ_Viewer_BinaryTCPServer(DAQ_Viewer_TCP_server):
+    """TCP server viewer accepting, in addition to serialized DataToExport, binary frames from its grabber
+
+    A grabber willing to use binary frames sends once the 'Binary Frames' message after having sent its client
+    type. It then answers each 'Send Data xD' command by the 'Done' message followed by a binary message as sent by
+    :func:`pymodaq_plugins_mock.hardware.tcp_frames.send_arrays`. The arrays are received directly into
+    preallocated arrays, each being reused once its consumers released it.
+
+    If the plugin settings include the codec_parameters group, frames can also be compressed: the grabber sends the
+    'Codecs' message followed by the list of the codecs it supports, the server answers with the 'Codec' message
+    followed by the name of the codec to be used and the compression level (an int), whenever they change.
+    Compressed frames are decoded by a pool of threads, off the plugin thread, then emitted in order from the
+    plugin thread.
+
+    If the plugin settings include the fan_out_parameters group and fan out is enabled, many grabbers can be
+    connected: each grab request is sent to all of them at once and their answers are gathered (with a timeout per
+    grabber) into one DataToExport, the data of the grabber of index i being named TCPServer{i}. The total latency
+    is then the one of the slowest grabber and not the sum of their latencies. A grabber answering too late is
+    skipped, its late answer being discarded before it is requested again. For Naverage > 1, Naverage requests are
+    gathered in turn, the answers of each grabber being averaged.
+    """
+    message_list = DAQ_Viewer_TCP_server.message_list + ['Binary Frames', 'Codecs', 'Codec']
+    _decoded = Signal(object)  # the decoded data, or the exception raised, from the decoder thread
+
+    def __init__(self, parent=None, params_state=None, grabber_type='2D'):
+        super().__init__(parent, params_state, grabber_type=grabber_type)
+        self.frame_receiver = FrameReceiver()
+        self._binary_sockets: Set[socket.socket] = set()
+        self._client_codecs: Dict[socket.socket, List[str]] = dict()
+        self._codec_pool: ThreadPoolExecutor = None
+        self._decoder: ThreadPoolExecutor = None
+        self._fan_out_receivers: Dict[socket.socket, FrameReceiver] = dict()
+        self._late: Set[socket.socket] = set()
+        self._decoded.connect(self._emit_decoded, Qt.QueuedConnection)
+
+    def _has_group(self, name: str) -> bool:
+        return name in [child.name() for child in self.settings.children()]
+
+    @property
+    def has_codec_settings(self) -> bool:
+        return self._has_group('codec_settings')
+
+    @property
+    def fan_out(self) -> bool:
+        return self._has_group('fan_out') and self.settings['fan_out', 'enabled']
+
+    def process_cmds(self, command, command_sock=None):
+        if command == 'Binary Frames':
+            if command_sock is not None:
+                self._binary_sockets.add(command_sock.socket)
+        elif command == 'Codecs':
+            if command_sock is not None:
+                self._client_codecs[command_sock.socket] = DeSerializer(command_sock).list_deserialization()
+                self.send_codec(command_sock)
+        else:
+            super().process_cmds(command, command_sock)
+
+    def get_codec(self, sock: Socket) -> str:
+        """The codec to be used by the client of the given socket: the one of the settings if it supports it"""
+        codec = self.settings['codec_settings', 'codec'] if self.has_codec_settings else 'none'
+        return codec if codec in self._client_codecs.get(sock.socket, []) else 'none'
+
+    def send_codec(self, sock: Socket):
+        self.send_command(sock, 'Codec')
+        sock.check_sended_with_serializer(self.get_codec(sock))
+        sock.check_sended_with_serializer(self.settings['codec_settings', 'level'] if self.has_codec_settings else 1)
+
+    def commit_settings(self, param):
+        if self.has_codec_settings and param.name() in iter_children(self.settings.child('codec_settings'), []):
+            if param.name() == 'nworkers':
+                self.stop_codec_pools()  # started again with the new number of workers by the next grab
+                return
+            for client in self.connected_clients:
+                if client['socket'].socket in self._client_codecs:
+                    self.send_codec(client['socket'])
+        else:
+            super().commit_settings(param)
+
+    def remove_client(self, sock: Socket):
+        self._binary_sockets.discard(sock.socket)
+        self._client_codecs.pop(sock.socket, None)
+        self._fan_out_receivers.pop(sock.socket, None)
+        self._late.discard(sock.socket)
+        super().remove_client(sock)
+
+    def init_server(self):
+        super().init_server()
+        self.serversocket.listen(socket.SOMAXCONN)  # many grabbers may connect at once when fanning out
+
+    def set_connected_clients_table(self):
+        """Reimplemented so that clients of the same type are all listed"""
+        clients = OrderedDict()
+        for client in self.connected_clients:
+            try:
+                address = str(client['socket'].getsockname())
+            except Exception:
+                address = "unconnected invalid socket"
+            key = client['type']
+            index = 1
+            while key in clients:
+                key = f"{client['type']}_{index}"
+                index += 1
+            clients[key] = address
+        return clients
+
+    def select(self, rlist, wlist=[], xlist=[], timeout=0):
+        """Reimplemented so that the late answers of fanned out grabbers are left to :meth:`gather`"""
+        if self._late:
+            rlist = [sock for sock in rlist if sock.socket not in self._late]
+        return super().select(rlist, wlist, xlist, timeout)
+
+    def start_codec_pools(self):
+        if self._codec_pool is None:
+            nworkers = self.settings['codec_settings', 'nworkers'] if self.has_codec_settings else 1
+            self._codec_pool = ThreadPoolExecutor(nworkers, thread_name_prefix='mock_codec')
+            self._decoder = ThreadPoolExecutor(1, thread_name_prefix='mock_decoder')
+
+    def stop_codec_pools(self):
+        if self._codec_pool is not None:
+            self._decoder.shutdown(wait=True)
+            self._codec_pool.shutdown(wait=True)
+            self._codec_pool = None
+            self._decoder = None
+
+    def close(self):
+        super().close()
+        self.stop_codec_pools()
+
+    def grab_data(self, Naverage=1, **kwargs):
+        if self.fan_out and len(self.grabber_sockets()) > 0:
+            try:
+                self.data_ready(self.gather(Naverage))
+            except Exception as e:
+                self.emit_status(ThreadCommand("Update_Status", [str(e), 'log']))
+        else:
+            super().grab_data(Naverage, **kwargs)
+
+    def grabber_sockets(self) -> List[Socket]:
+        return [client['socket'] for client in self.connected_clients if client['type'] == self.client_type]
+
+    def gather(self, Naverage: int = 1) -> DataToExport:
+        """Gather the answers of all the grabbers to Naverage grab requests, the answers of each being averaged"""
+        grabbers = self.grabber_sockets()
+        answers: Dict[socket.socket, List[DataFromPlugins]] = dict()
+        counts: Dict[socket.socket, int] = dict()
+        for _ in range(Naverage):
+            connected = {sock.socket for sock in self.grabber_sockets()}
+            for raw, answer in self.gather_once([sock for sock in grabbers if sock.socket in connected]).items():
+                counts[raw] = counts.get(raw, 0) + 1
+                if raw not in answers:
+                    if Naverage > 1:  # summed into copies, the received arrays being reused by the next answers
+                        for dwa in answer:
+                            dwa.data = [np.array(array, dtype=float) for array in dwa.data]
+                    answers[raw] = answer
+                else:
+                    for total, dwa in zip(answers[raw], answer):
+                        for array, added in zip(total.data, dwa.data):
+                            array += added
+
+        data = []
+        for index, sock in enumerate(grabbers):
+            for dwa in answers.get(sock.socket, []):
+                if counts[sock.socket] > 1:
+                    dwa.data = [array / counts[sock.socket] for array in dwa.data]
+                dwa.name = f'TCPServer{index}'
+                data.append(dwa)
+        return DataToExport('TCPServer', data=data)
+
+    def gather_once(self, grabbers: List[Socket]) -> Dict[socket.socket, List[DataFromPlugins]]:
+        """Send the grab request to the grabbers, then gather their answers until the timeout"""
+        for sock in grabbers:
+            if sock.socket not in self._late:
+                self.send_command(sock, f'Send Data {self.grabber_type}')
+        deadline = time.perf_counter() + self.settings['fan_out', 'timeout'] / 1000
+        pending = {sock.socket: sock for sock in grabbers}
+        answers: Dict[socket.socket, List] = dict()
+        with selectors.DefaultSelector() as selector:
+            for raw in pending:
+                selector.register(raw, selectors.EVENT_READ)
+            while pending and time.perf_counter() < deadline:
+                for key, _ in selector.select(deadline - time.perf_counter()):
+                    sock = pending[key.fileobj]
+                    try:
+                        answer = self.read_answer(sock, deadline)
+                    except (OSError, ValueError) as e:  # closed, timed out within a message or garbled
+                        self.emit_status(ThreadCommand("Update_Status", [f'Grabber dropped: {e}', 'log']))
+                        answer = []
+                        self.remove_client(sock)
+                    if answer is None:
+                        continue
+                    selector.unregister(key.fileobj)
+                    del pending[key.fileobj]
+                    if key.fileobj in self._late:  # answer to a previous request
+                        self._late.discard(key.fileobj)
+                    else:
+                        answers[key.fileobj] = answer
+        for index, sock in enumerate(grabbers):
+            if sock.socket in pending:
+                if sock.socket not in self._late:
+                    self.emit_status(ThreadCommand("Update_Status", [f'Grabber {index} timed out', 'log']))
+                self._late.add(sock.socket)
+        return answers
+
+    def read_answer(self, sock: Socket, deadline: float) -> Optional[List[DataFromPlugins]]:
+        """Read a message of a grabber, returning its data if this is the answer to a grab request, else None
+
+        Raises
+        ------
+        ConnectionError if the grabber disconnected
+        TimeoutError if the message is not fully received before the deadline
+        """
+        sock.socket.settimeout(max(deadline - time.perf_counter(), 0.01))
+        try:
+            message = recv_string(sock)
+            if message == 'Done':
+                if sock.socket not in self._binary_sockets:
+                    return super().read_data(sock).data
+                self.start_codec_pools()
+                frames = self._fan_out_receivers.setdefault(sock.socket, FrameReceiver()).receive(
+                    sock, executor=self._codec_pool)
+                return self.frames_to_dte(frames).data
+            elif message == 'Quit':
+                raise ConnectionError('socket disconnect by user')
+            elif message in ['Info', 'Infos', 'Info_xml']:
+                # process_cmds would read their content from the first grabber, not from this one
+                self.read_client_info(message, sock)
+                return None
+        finally:
+            sock.socket.settimeout(None)
+        self.process_cmds(message, command_sock=sock)
+        return None
+
+    def read_client_info(self, message: str, sock: Socket):
+        """Read the content of an 'Info', 'Infos' or 'Info_xml' message from the socket of the grabber sending it
+
+        Raises
+        ------
+        OSError if the content cannot be received
+        """
+        readers = dict(Info=self.read_info, Infos=self.read_infos, Info_xml=self.read_info_xml)
+        try:
+            readers[message](sock)
+        except OSError:
+            raise
+        except Exception as e:  # invalid content, fully received though
+            self.emit_status(ThreadCommand("Update_Status", [str(e), 'log']))
+
+    def command_done(self, command_sock):
+        """Read the binary frames of the grabber, encoded frames being decoded and emitted by the decoder thread"""
+        sock = self.find_socket_within_connected_clients(self.client_type)
+        if command_sock is not None or sock is None or sock.socket not in self._binary_sockets:
+            super().command_done(command_sock)
+            return
+        try:
+            frames = self.frame_receiver.receive(sock, decode=False)
+            if any(frame.payload is not None for frame in frames):
+                self.start_codec_pools()
+                self._decoder.submit(self._decode_and_emit, frames)
+            else:
+                self.data_ready(self.frames_to_dte(frames))
+        except Exception as e:
+            self.emit_status(ThreadCommand("Update_Status", [str(e), 'log']))
+
+    def _decode_and_emit(self, frames: List[Frame]):
+        """Decode the frames in the decoder thread, they are emitted from the plugin thread"""
+        try:
+            self._decoded.emit(self.frames_to_dte(decode_frames(frames, self._codec_pool)))
+        except Exception as e:
+            self._decoded.emit(e)
+
+    def _emit_decoded(self, decoded):
+        if isinstance(decoded, Exception):
+            self.emit_status(ThreadCommand("Update_Status", [str(decoded), 'log']))
+        else:
+            self.data_ready(decoded)
+
+    def read_data(self, sock: Socket) -> DataToExport:
+        """Read data from the socket, either as binary frames or as a serialized DataToExport"""
+        if sock.socket in self._binary_sockets:
+            self.start_codec_pools()
+            return self.frames_to_dte(self.frame_receiver.receive(sock, executor=self._codec_pool))
+        return super().read_data(sock)
+
+    def frames_to_dte(self, frames: List[Frame]) -> DataToExport:
+        """Wrap received frames into a DataToExport, the sequence number and timestamp being added as attributes"""
+        seq = frames[0].seq if len(frames) > 0 else -1
+        timestamp = frames[0].timestamp if len(frames) > 0 else 0.
+        return DataToExport('TCPServer',
+                            data=[DataFromPlugins(name='TCPServer', data=[frame.array for frame in frames],
+                                                  dim=f'Data{self.grabber_type}', seq=seq, timestamp=timestamp)])
+
+
+class ReplaySnapshot(NamedTuple):
+    """The settings read for each frame by the replay viewers"""
+    pacing: str
+    speed: float
+    period: float
+    loop: bool
+
+
+class DAQ_Viewer_Replay(DAQ_Viewer_base):
+    """Viewer playing back the frames recorded in a file, see :mod:`pymodaq_plugins_mock.hardware.replay`
+
+    The frames have the dimensionality of the viewer type, possibly with a first axis of channels (for instance
+    (C, Ny, Nx) for a 2D viewer); all of a frame is the data of an ND viewer. They are read in advance by a
+    FramePrefetcher then paced in grab_data. Each emitted frame has, in addition to the attributes set by the
+    FrameTagger, its index in the file as the replay_index attribute.
+
+    A change of Naverage discards the frames read in advance, the file being then read again from the frame following
+    the last emitted one, so that no recorded frame is skipped.
+    """
+    grabber_type = '2D'
+    params = comon_parameters + replay_parameters + instrumentation_parameters
+
+    def ini_attributes(self):
+        self.controller: ReplaySource = None
+        self.prefetcher = FramePrefetcher(
+            lambda Naverage, previous: self.read_frame(Naverage, None if previous is None else previous.data))
+        self.clock = ReplayClock()
+        self.timer = PhaseTimer()
+        self.tagger = FrameTagger()
+        self.finished = False
+        self.next_index = 0  # index in the file of the frame following the last emitted one
+        self.snapshot = snapshot(ReplaySnapshot, self.settings.child('replay'))
+
+    def commit_settings(self, param):
+        """Reopen the file if one of its settings changed, the replay starting again from its first frame"""
+        # the frames read in advance are still replayed, the file being read sequentially
+        with self.prefetcher.paused(flush=False):
+            self.snapshot = snapshot(ReplaySnapshot, self.settings.child('replay'))
+            if param.name() in iter_children(self.settings.child('instrumentation'), []):
+                self.timer.update_from_settings(self.settings.child('instrumentation'))
+            elif param.name() == 'readahead':
+                self.update_readahead()
+            elif param.name() in ('pacing', 'speed', 'period'):
+                self.clock.reset()
+            elif param.name() in ['path', 'timestamps_path'] + iter_children(self.settings.child('replay', 'raw'), []):
+                if self.controller is not None:
+                    try:
+                        self.open_source()
+                    except (OSError, ValueError) as e:
+                        self.emit_status(ThreadCommand('Update_Status', [str(e), 'log']))
+
+    def check_frame_shape(self, frame_shape: tuple):
+        ndim = len(frame_shape)
+        if self.grabber_type != 'ND' and ndim not in (int(self.grabber_type[0]), int(self.grabber_type[0]) + 1):
+            raise ValueError(f'Frames of shape {frame_shape} cannot be replayed by a {self.grabber_type} viewer')
+
+    def open_source(self):
+        """(Re)open the replayed file, the replay starting from its first frame"""
+        self.prefetcher.stop()
+        source = ReplaySource.from_settings(self.settings.child('replay'))
+        self.check_frame_shape(source.frame_shape)
+        self.controller = source
+        self.clock.reset()
+        self.finished = False
+        self.next_index = 0
+        self.update_readahead()
+
+    def update_readahead(self):
+        readahead = self.settings['replay', 'readahead']
+        self.prefetcher.update(readahead > 0 and self.controller is not None, depth=max(1, readahead))
+
+    def ini_detector(self, controller=None):
+        try:
+            source = ReplaySource.from_settings(self.settings.child('replay'))
+            self.check_frame_shape(source.frame_shape)
+        except (OSError, ValueError) as e:
+            return str(e), False
+        self.ini_detector_init(controller, source)
+        self.snapshot = snapshot(ReplaySnapshot, self.settings.child('replay'))
+        self.timer.update_from_settings(self.settings.child('instrumentation'))
+        self.clock.reset()
+        self.finished = False
+        self.next_index = 0
+        self.dte_signal_temp.emit(DataToExport('Replay', data=[self.data_from_frame(
+            np.zeros(self.controller.frame_shape, self.controller.frames.dtype))]))
+        self.update_readahead()
+        return f'{len(self.controller)} frames of shape {self.controller.frame_shape}', True
+
+    def close(self):
+        """Stop the readahead thread"""
+        self.clock.interrupt()
+        self.prefetcher.stop()
+
+    def read_frame(self, Naverage: int, out: Optional[np.ndarray] = None) -> ReplayFrame:
+        settings = self.snapshot
+        return self.controller.read(Naverage, out, settings.loop, settings.period * 1e-3)
+
+    def data_from_frame(self, frame: np.ndarray) -> DataFromPlugins:
+        """Wrap a frame into the data of the viewer type, its first axis being the channels if any"""
+        if self.grabber_type == '0D':
+            data = [np.array([value]) for value in np.atleast_1d(frame)]
+        elif frame.ndim == int(self.grabber_type[0]):
+            data = [frame]
+        else:
+            data = list(frame)
+        return DataFromPlugins(name='Replay', data=data, dim=f'Data{self.grabber_type}')
+
+    def grab_data(self, Naverage=1, **kwargs):
+        """Emit the next frame at its time
+
+        If the end of the file was reached and not looping, nothing is emitted but a stop status, so that the grab
+        does not wait for data that will never come.
+        """
+        if self.finished:
+            self.emit_end_of_file()
+            return
+        if self.clock.interrupted:  # stopped since the last grab, the pacing starts again
+            self.clock.reset()
+        with self.timer.phase('total'):
+            try:
+                with self.timer.phase('read'):
+                    if self.prefetcher.is_running:
+                        if Naverage != self.prefetcher.Naverage:
+                            with self.prefetcher.paused(flush=False):
+                                # the frames read in advance are discarded, read them again
+                                self.prefetcher.set_naverage(Naverage)
+                                self.controller.index = self.next_index
+                        frame = self.prefetcher.take(Naverage)
+                    else:
+                        frame = self.read_frame(Naverage)
+            except EOFError:
+                self.finished = True
+                self.emit_end_of_file()
+                return
+            self.next_index = frame.index + 1
+            settings = self.snapshot
+            if settings.pacing == 'recorded':
+                with self.timer.phase('pacing'):
+                    self.clock.wait(frame.timestamp, settings.speed)
+            acquisition_ns = time.time_ns()
+            with self.timer.phase('export'):
+                dwa = self.data_from_frame(frame.data)
+                dwa.add_extra_attribute(replay_index=frame.index)
+                dte = DataToExport('Replay', data=[dwa])
+            with self.timer.phase('emit'):
+                self.dte_signal.emit(self.tagger.tag(dte, acquisition_ns))
+        self.timer.emit_periodic_status(self.emit_status)
+
+    def emit_end_of_file(self):
+        self.emit_status(ThreadCommand('Update_Status', ['End of the replayed file', 'log']))
+        self.emit_status(ThreadCommand('stop'))
+
+    def stop(self):
+        """Interrupt the pacing of the frame being grabbed, if any"""
+        self.clock.interrupt()
+        return ''
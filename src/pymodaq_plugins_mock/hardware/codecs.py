@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Frame codecs of the binary TCP frames.
+
+* none: the raw buffer of the array
+* zlib: the buffer compressed using zlib
+* shuffle_zlib: the bytes of the items are first regrouped by significance (byte-shuffle filter) then compressed
+  using zlib. The most significant bytes of integer camera frames being very redundant, this compresses much better.
+
+The buffer is split into independent blocks so that they can be (de)compressed in parallel by a pool of threads
+(zlib releasing the GIL). An encoded payload is a table (block count on 4 bytes, raw size of the blocks on 8 bytes
+then the compressed size of each block on 8 bytes) followed by the compressed blocks.
+"""
+import struct
+import zlib
+from concurrent.futures import Executor
+from typing import List, Optional, Union
+
+import numpy as np
+
+CODECS = ('none', 'zlib', 'shuffle_zlib')
+BLOCK_TABLE = struct.Struct('!IQ')
+BLOCK_SIZE = struct.Struct('!Q')
+
+codec_parameters = [
+    {'title': 'Frame codec:', 'name': 'codec_settings', 'type': 'group', 'expanded': False, 'children': [
+        {'title': 'Codec:', 'name': 'codec', 'type': 'list', 'limits': list(CODECS), 'value': 'none',
+         'tip': 'Codec asked to the grabbers sending binary frames, if they support it'},
+        {'title': 'Level:', 'name': 'level', 'type': 'int', 'value': 1, 'min': 1, 'max': 9},
+        {'title': 'Workers:', 'name': 'nworkers', 'type': 'int', 'value': 4, 'min': 1,
+         'tip': 'Number of threads decompressing the blocks of the frames'},
+    ]},
+]
+
+
+def codec_id(codec: Union[str, int]) -> int:
+    """Get the id of a codec on the wire from its name (or id)
+
+    Raises
+    ------
+    ValueError if the codec is unknown
+    """
+    if isinstance(codec, str):
+        if codec not in CODECS:
+            raise ValueError(f'Unknown codec {codec}, should be one of {CODECS}')
+        return CODECS.index(codec)
+    if not 0 <= codec < len(CODECS):
+        raise ValueError(f'Unknown codec id {codec}')
+    return int(codec)
+
+
+def shuffle(data: np.ndarray, itemsize: int) -> np.ndarray:
+    """Regroup the bytes of the items by significance: all first bytes, then all second bytes..."""
+    return np.ascontiguousarray(data.reshape((-1, itemsize)).T)
+
+
+def unshuffle(data: np.ndarray, itemsize: int, out: np.ndarray):
+    """Inverse of shuffle, writing the bytes of the items into out"""
+    out.reshape((-1, itemsize))[:] = data.reshape((itemsize, -1)).T
+
+
+def _block_size(itemsize: int, block_size: int) -> int:
+    """The block size rounded to whole items"""
+    return max(itemsize, block_size // itemsize * itemsize)
+
+
+def _blocks(nbytes: int, block_size: int) -> List[slice]:
+    return [slice(start, min(start + block_size, nbytes)) for start in range(0, nbytes, block_size)]
+
+
+def _map(executor: Optional[Executor], function, *iterables) -> list:
+    return list(map(function, *iterables) if executor is None else executor.map(function, *iterables))
+
+
+def encode(array: np.ndarray, codec: Union[str, int], level: int = 1, block_size: int = 1 << 22,
+           executor: Optional[Executor] = None) -> List[Union[bytes, memoryview]]:
+    """Encode a C contiguous array
+
+    Parameters
+    ----------
+    array: ndarray
+    codec: str or int
+        name or id of the codec
+    level: int
+        zlib compression level
+    block_size: int
+        number of raw bytes per block
+    executor: concurrent.futures.Executor, optional
+        if given, the blocks are compressed in parallel by the executor
+
+    Returns
+    -------
+    list of bytes like: the buffers of the payload, to be sent one after the other
+    """
+    raw = array.reshape(-1).view(np.uint8)
+    codec = codec_id(codec)
+    if codec == 0:
+        return [memoryview(raw)]
+    itemsize = array.dtype.itemsize
+
+    def compress(block: slice) -> bytes:
+        data = raw[block]
+        if codec == 2:
+            data = shuffle(data, itemsize)
+        return zlib.compress(data, level)
+
+    block_size = _block_size(itemsize, block_size)
+    compressed = _map(executor, compress, _blocks(raw.size, block_size))
+    table = BLOCK_TABLE.pack(len(compressed), block_size) + \
+        b''.join(BLOCK_SIZE.pack(len(block)) for block in compressed)
+    return [table] + compressed
+
+
+def payload_size(buffers: List[Union[bytes, memoryview]]) -> int:
+    return sum(memoryview(buffer).nbytes for buffer in buffers)
+
+
+def decode(payload: Union[bytes, bytearray, memoryview], codec: Union[str, int], out: np.ndarray,
+           executor: Optional[Executor] = None) -> np.ndarray:
+    """Decode a payload into the C contiguous array out (of the right shape and dtype)
+
+    Raises
+    ------
+    ValueError if the payload does not match out
+    """
+    raw = out.reshape(-1).view(np.uint8)
+    payload = memoryview(payload).cast('B')
+    codec = codec_id(codec)
+    if codec == 0:
+        if payload.nbytes != raw.size:
+            raise ValueError('Payload size does not match the array size')
+        raw[:] = np.frombuffer(payload, np.uint8)
+        return out
+    itemsize = out.dtype.itemsize
+    nblocks, block_size = BLOCK_TABLE.unpack_from(payload)
+    blocks = _blocks(raw.size, block_size)
+    if len(blocks) != nblocks:
+        raise ValueError('Payload blocks do not match the array size')
+    offset = BLOCK_TABLE.size + nblocks * BLOCK_SIZE.size
+    compressed = []
+    for index in range(nblocks):
+        size, = BLOCK_SIZE.unpack_from(payload, BLOCK_TABLE.size + index * BLOCK_SIZE.size)
+        compressed.append(payload[offset:offset + size])
+        offset += size
+
+    def decompress(block: memoryview, target: slice):
+        data = np.frombuffer(zlib.decompress(block), np.uint8)
+        if data.size != target.stop - target.start:
+            raise ValueError('Decompressed block size does not match the array size')
+        if codec == 2:
+            unshuffle(data, itemsize, raw[target])
+        else:
+            raw[target] = data
+
+    _map(executor, decompress, compressed, blocks)
+    return out
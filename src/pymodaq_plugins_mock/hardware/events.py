@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Sparse event streams, as produced by time taggers (photon counting on a few channels) or event cameras (pixels
+reporting changes), simulated as a Poisson process.
+
+The events of a batch are a structured array of EVENT_DTYPE: the timestamp in ns since the epoch, the x (pixel
+column or channel) and y (pixel row, 0 for channels) coordinates and the value (1 for photons, the polarity +1/-1 for
+event cameras). Each batch holds the events since the previous one, so that the event rate does not depend on the
+rate of the batches, up to the size of the buffer: events beyond it are counted as dropped, as a hardware FIFO would.
+
+The timestamps of a batch are drawn sorted in O(n), as the normalized cumulative sums of exponential variables, the
+coordinates uniformly for channels or as a gaussian spot for pixels.
+"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+from pymodaq.utils.parameter import Parameter
+
+
+EVENT_DTYPE = np.dtype([('timestamp', '<i8'), ('x', '<u2'), ('y', '<u2'), ('value', '<f4')])
+
+events_parameters = [
+    {'title': 'Events:', 'name': 'events', 'type': 'group', 'children': [
+        {'title': 'Rate (events/s):', 'name': 'rate', 'type': 'float', 'value': 1e5, 'min': 0., 'max': 1e9},
+        {'title': 'Layout:', 'name': 'layout', 'type': 'list', 'value': 'channels', 'limits': ['channels', 'pixels'],
+         'tip': 'Time tagger channels or event camera pixels'},
+        {'title': 'Channels:', 'name': 'nchannels', 'type': 'int', 'value': 4, 'min': 1, 'max': 65535},
+        {'title': 'Nx:', 'name': 'Nx', 'type': 'int', 'value': 256, 'min': 1, 'max': 65535},
+        {'title': 'Ny:', 'name': 'Ny', 'type': 'int', 'value': 256, 'min': 1, 'max': 65535},
+        {'title': 'Buffer (events):', 'name': 'buffer', 'type': 'int', 'value': 10_000_000, 'min': 1,
+         'tip': 'Maximum number of events of a batch, the following ones being dropped'},
+    ]},
+]
+
+
+class EventGenerator:
+    """Generate batches of Poisson distributed events
+
+    Parameters
+    ----------
+    rate: float
+        the mean number of events per second
+    layout: str
+        'channels' or 'pixels'
+    nchannels: int
+        the number of channels of the channels layout
+    shape: tuple of int
+        the (Ny, Nx) shape of the pixels layout
+    buffer: int
+        the maximum number of events of a batch
+    seed: int, optional
+    """
+
+    def __init__(self, rate: float = 1e5, layout: str = 'channels', nchannels: int = 4,
+                 shape: Tuple[int, int] = (256, 256), buffer: int = 10_000_000, seed: Optional[int] = None):
+        self.rate = rate
+        self.layout = layout
+        self.nchannels = nchannels
+        self.shape = shape
+        self.buffer = buffer
+        self._rng = np.random.default_rng(seed)
+        self.dropped = 0
+        self.last_ns: Optional[int] = None
+
+    def update_from_settings(self, settings: Parameter):
+        """Apply the values of a group created from events_parameters"""
+        self.rate = settings['rate']
+        self.layout = settings['layout']
+        self.nchannels = settings['nchannels']
+        self.shape = (settings['Ny'], settings['Nx'])
+        self.buffer = settings['buffer']
+
+    def reset(self, start_ns: Optional[int] = None):
+        """Start the next batch at start_ns, the dropped events being reset"""
+        self.last_ns = start_ns
+        self.dropped = 0
+
+    def generate(self, end_ns: int, start_ns: Optional[int] = None) -> np.ndarray:
+        """The events from the end of the previous batch (or start_ns) to end_ns, sorted by timestamp
+
+        Returns
+        -------
+        ndarray: structured array of EVENT_DTYPE
+        """
+        start_ns = (end_ns if self.last_ns is None else self.last_ns) if start_ns is None else start_ns
+        self.last_ns = end_ns
+        duration_ns = max(end_ns - start_ns, 0)
+        nevents = int(self._rng.poisson(self.rate * duration_ns * 1e-9))
+        kept = min(nevents, self.buffer)
+        self.dropped += nevents - kept
+        events = np.empty((kept,), dtype=EVENT_DTYPE)
+        if nevents == 0:
+            return events
+        # sorted uniform times: the first kept of nevents, as normalized cumulative sums of exponential variables
+        gaps = self._rng.standard_exponential(kept + 1)
+        times = np.cumsum(gaps)
+        total = times[-1] + self._rng.gamma(nevents - kept, 1.) if nevents > kept else times[-1]
+        events['timestamp'] = start_ns + (times[:-1] * (duration_ns / total)).astype(np.int64)
+        if self.layout == 'channels':
+            events['x'] = self._rng.integers(0, self.nchannels, kept, dtype=np.uint16)
+            events['y'] = 0
+            events['value'] = 1.
+        else:
+            for field, size in zip(('y', 'x'), self.shape):
+                events[field] = np.clip(self._rng.normal(size / 2, size / 6, kept), 0, size - 1)
+            events['value'] = self._rng.integers(0, 2, kept, dtype=np.int8) * 2 - 1
+        return events
+
+
+def histogram_time(events: np.ndarray, start_ns: int, end_ns: int, bins: int = 100) -> np.ndarray:
+    """Number of events per time bin between start_ns and end_ns"""
+    if end_ns <= start_ns:
+        return np.zeros((bins,), dtype=np.int64)
+    indexes = (events['timestamp'] - start_ns) * bins // (end_ns - start_ns)
+    return np.bincount(np.clip(indexes, 0, bins - 1), minlength=bins)
+
+
+def histogram_xy(events: np.ndarray, shape: Tuple[int, int], weighted: bool = False) -> np.ndarray:
+    """Number of events (or sum of their values if weighted) per (y, x) pixel or channel"""
+    flat = events['y'].astype(np.intp) * shape[1] + events['x']
+    return np.bincount(flat, weights=events['value'] if weighted else None,
+                       minlength=shape[0] * shape[1]).reshape(shape)
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Seeded injection of hardware misbehaviour into the Mock plugins, to measure how acquisition pipelines degrade under
+realistic jitter: the Mocks are otherwise perfectly regular and hide tail latency problems.
+
+A FaultInjector adds to each call it is applied to:
+
+* a latency drawn from a distribution: fixed, normal (clipped at 0), lognormal or pareto (heavy tailed), the shape
+  being the sigma of the lognormal (its median being the latency) or the alpha of the pareto (its minimum being the
+  latency)
+* sporadic stalls of a fixed duration
+* dropped frames: the frame is tagged (so that a FrameChecker counts it as dropped) but not emitted, the next frame
+  being emitted in its place
+* communication errors, raised as InjectedFault, or logged when emitting a frame, the next frame being then emitted
+  in its place
+* slow moves, the time constant of a move of ActuatorWrapperWithTauMultiAxes being multiplied by a factor
+
+All the random draws come from a generator seeded by the seed setting, in a fixed number per call, so that the same
+sequence of calls gets the same faults from one run to the other.
+"""
+import time
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from pymodaq.utils.daq_utils import ThreadCommand
+from pymodaq.utils.parameter import Parameter
+
+
+fault_parameters = [
+    {'title': 'Fault injection:', 'name': 'faults', 'type': 'group', 'expanded': False, 'children': [
+        {'title': 'Enabled:', 'name': 'inject', 'type': 'bool', 'value': False},
+        {'title': 'Seed:', 'name': 'seed', 'type': 'int', 'value': 0, 'min': 0},
+        {'title': 'Latency:', 'name': 'distribution', 'type': 'list', 'value': 'none',
+         'limits': ['none', 'fixed', 'normal', 'lognormal', 'pareto'],
+         'tip': 'Distribution of the latency added to each call'},
+        {'title': 'Latency (ms):', 'name': 'latency', 'type': 'float', 'value': 1., 'min': 0.,
+         'tip': 'Fixed value, mean (normal), median (lognormal) or minimum (pareto) of the latency'},
+        {'title': 'Jitter (ms):', 'name': 'jitter', 'type': 'float', 'value': 0.2, 'min': 0.,
+         'tip': 'Standard deviation of the normal latency'},
+        {'title': 'Shape:', 'name': 'shape', 'type': 'float', 'value': 1., 'min': 1e-3,
+         'tip': 'Sigma of the lognormal latency, alpha of the pareto one (the lower, the heavier the tail)'},
+        {'title': 'Stall probability:', 'name': 'stall_probability', 'type': 'float', 'value': 0., 'min': 0.,
+         'max': 1.},
+        {'title': 'Stall (ms):', 'name': 'stall', 'type': 'float', 'value': 500., 'min': 0.},
+        {'title': 'Drop probability:', 'name': 'drop_probability', 'type': 'float', 'value': 0., 'min': 0.,
+         'max': 1.},
+        {'title': 'Error probability:', 'name': 'error_probability', 'type': 'float', 'value': 0., 'min': 0.,
+         'max': 1.},
+        {'title': 'Slow move probability:', 'name': 'slow_probability', 'type': 'float', 'value': 0., 'min': 0.,
+         'max': 1.},
+        {'title': 'Slow move factor:', 'name': 'slow_factor', 'type': 'float', 'value': 5., 'min': 1.},
+    ]},
+]
+
+
+class InjectedFault(ConnectionError):
+    """A communication error injected by a FaultInjector"""
+
+
+class FaultInjector:
+    """Draw and apply latencies, stalls, drops, errors and slow moves
+
+    Parameters are the ones of fault_parameters, latency, jitter and stall being in ms. Counters of the injected
+    faults since the last update are kept in counts.
+
+    Attributes
+    ----------
+    max_retries: int
+        the number of frames emitted in place of dropped or failed ones in a row before giving up the emission
+    """
+    max_retries = 100
+
+    def __init__(self, inject: bool = False, seed: int = 0, distribution: str = 'none', latency: float = 1.,
+                 jitter: float = 0.2, shape: float = 1., stall_probability: float = 0., stall: float = 500.,
+                 drop_probability: float = 0., error_probability: float = 0., slow_probability: float = 0.,
+                 slow_factor: float = 5.):
+        self.update(inject, seed, distribution, latency, jitter, shape, stall_probability, stall, drop_probability,
+                    error_probability, slow_probability, slow_factor)
+
+    def update(self, inject: bool, seed: int, distribution: str, latency: float, jitter: float, shape: float,
+               stall_probability: float, stall: float, drop_probability: float, error_probability: float,
+               slow_probability: float, slow_factor: float):
+        """Set the faults to inject, the generator being seeded again and the counts reset"""
+        self.enabled = inject
+        self.seed = seed
+        self.distribution = distribution
+        self.latency_ms = latency
+        self.jitter_ms = jitter
+        self.shape = shape
+        self.stall_probability = stall_probability
+        self.stall_ms = stall
+        self.drop_probability = drop_probability
+        self.error_probability = error_probability
+        self.slow_probability = slow_probability
+        self.slow_factor = slow_factor
+        self._rng = np.random.default_rng(seed)
+        self.counts: Dict[str, int] = dict(calls=0, stalls=0, dropped=0, errors=0, slowed=0)
+
+    def update_from_settings(self, settings: Parameter):
+        """Same as update but using the values of a group created from fault_parameters"""
+        self.update(*(settings[child['name']] for child in fault_parameters[0]['children']))
+
+    def draw_latency(self) -> float:
+        """The latency of a call in s, stall included"""
+        uniform, stalled = self._rng.random(2)
+        normal = self._rng.standard_normal()
+        if self.distribution == 'fixed':
+            latency = self.latency_ms
+        elif self.distribution == 'normal':
+            latency = max(0., self.latency_ms + self.jitter_ms * normal)
+        elif self.distribution == 'lognormal':
+            latency = self.latency_ms * float(np.exp(self.shape * normal))
+        elif self.distribution == 'pareto':
+            latency = self.latency_ms * float((1 - uniform) ** (-1 / self.shape))
+        else:
+            latency = 0.
+        if stalled < self.stall_probability:
+            self.counts['stalls'] += 1
+            latency += self.stall_ms
+        return latency * 1e-3
+
+    def delay(self) -> float:
+        """Sleep for the drawn latency, returning it (s)"""
+        if not self.enabled:
+            return 0.
+        latency = self.draw_latency()
+        if latency > 0:
+            time.sleep(latency)
+        return latency
+
+    def check(self, operation: str = 'communication'):
+        """Raise InjectedFault with the error probability"""
+        if self.enabled and self._rng.random() < self.error_probability:
+            self.counts['errors'] += 1
+            raise InjectedFault(f'Injected error during {operation}')
+
+    def slowdown(self) -> float:
+        """The factor of the time constant of a move, the slow move factor with the slow move probability"""
+        if self.enabled and self._rng.random() < self.slow_probability:
+            self.counts['slowed'] += 1
+            return self.slow_factor
+        return 1.
+
+    def emit(self, emit: Callable[[object], None], data, emit_status: Optional[Callable[[ThreadCommand], None]] = None,
+             operation: str = 'grab', tag: Optional[Callable[[object], object]] = None) -> bool:
+        """Emit data through emit after the latency, a dropped or failed frame being replaced by the next one
+
+        A dropped frame, or one whose emission failed (the error being logged), is tagged but not emitted and the
+        frame is emitted again, tagged as the next one: the consumers see a gap in the sequence numbers but a grab
+        waiting for data is not left waiting. After max_retries replacements in a row, nothing is emitted but a stop
+        status, stopping the grab.
+
+        Parameters
+        ----------
+        emit: callable
+            for instance the emit method of the dte_signal of a plugin
+        data: object
+            the data to emit
+        emit_status: callable
+            the emit_status method of the plugin, used to log the injected errors
+        operation: str
+            the name of the operation in the error messages
+        tag: callable
+            returning the data tagged as the next frame, for instance the tag method of a FrameTagger, called for each
+            frame emitted or not
+
+        Returns
+        -------
+        bool: True if the data were emitted
+        """
+        if tag is None:
+            tag = lambda frame: frame
+        if not self.enabled:
+            emit(tag(data))
+            return True
+        self.counts['calls'] += 1
+        for _ in range(self.max_retries + 1):
+            self.delay()
+            frame = tag(data)
+            dropped = self._rng.random() < self.drop_probability
+            try:
+                self.check(operation)
+            except InjectedFault as e:
+                if emit_status is not None:
+                    emit_status(ThreadCommand('Update_Status', [str(e), 'log']))
+                continue
+            if dropped:
+                self.counts['dropped'] += 1
+                continue
+            emit(frame)
+            return True
+        if emit_status is not None:
+            emit_status(ThreadCommand('Update_Status', [f'Too many injected faults during {operation}', 'log']))
+            emit_status(ThreadCommand('stop'))
+        return False
+
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Publish/subscribe data channel for the frames of a remote module, next to its LECO control channel.
+
+A message is a multipart zmq message: the topic, a json descriptor (sequence number, timestamp and, for each data,
+its name, dim, labels and number of arrays) then, for each array, its binary header as defined in
+:mod:`pymodaq_plugins_mock.hardware.tcp_frames` and its raw buffer. Arrays are sent and received without copy.
+"""
+import json
+import threading
+import time
+from typing import Callable, Optional
+
+import numpy as np
+import zmq
+
+from pymodaq.utils.data import DataFromPlugins, DataToExport
+from pymodaq.utils.logger import set_logger
+
+from pymodaq_plugins_mock.hardware.tcp_frames import as_bytes, pack_header, unpack_header
+
+logger = set_logger('frame_stream', add_to_console=False)
+
+TOPIC = b'frames'
+
+stream_parameters = [
+    {'title': 'Data stream:', 'name': 'data_stream', 'type': 'group', 'expanded': False, 'children': [
+        {'title': 'Use stream:', 'name': 'use', 'type': 'bool', 'value': False,
+         'tip': 'Receive the frames on a publish/subscribe channel, LECO being used only for the commands'},
+        {'title': 'Address:', 'name': 'address', 'type': 'str', 'value': 'tcp://localhost:5570',
+         'tip': 'Address of the publisher of the actor'},
+        {'title': 'Prefetch:', 'name': 'prefetch', 'type': 'bool', 'value': False,
+         'tip': 'Request frames in advance during a continuous grab. The frames emitted may then have been acquired '
+                'before the last change of the setup, single grabs (as in scans) always request a new frame'},
+        {'title': 'Buffer:', 'name': 'buffer', 'type': 'int', 'value': 4, 'min': 1,
+         'tip': 'Maximum number of frames requested in advance and buffered when prefetching'},
+        {'title': 'Max age (ms):', 'name': 'max_age', 'type': 'int', 'value': 1000, 'min': 1,
+         'tip': 'Buffered frames older than this are discarded'},
+    ]},
+]
+
+
+class FramePublisher:
+    """Publish DataToExport on a zmq XPUB socket
+
+    The subscriptions are tracked so that frames requested by a subscriber just connected are not lost: while there
+    is no subscriber, publish first waits up to subscriber_timeout for one.
+
+    Parameters
+    ----------
+    address: str
+        address to bind to, for instance tcp://*:5570
+    hwm: int
+        number of messages queued per subscriber before dropping new ones
+    subscriber_timeout: float
+        in seconds
+    context: zmq.Context, optional
+
+    Attributes
+    ----------
+    subscribers: int
+        number of subscriptions to the frames
+    """
+
+    def __init__(self, address: str, hwm: int = 8, subscriber_timeout: float = 1.,
+                 context: Optional[zmq.Context] = None):
+        self.socket = (context or zmq.Context.instance()).socket(zmq.XPUB)
+        self.socket.setsockopt(zmq.SNDHWM, hwm)
+        self.socket.setsockopt(zmq.LINGER, 0)
+        self.socket.setsockopt(zmq.XPUB_VERBOSER, 1)
+        self.socket.bind(address)
+        self.address = self.socket.getsockopt_string(zmq.LAST_ENDPOINT)
+        self.subscriber_timeout = subscriber_timeout
+        self.subscribers = 0
+        self.seq = 0
+
+    def update_subscribers(self, timeout: float = 0.):
+        """Process the (un)subscriptions received, waiting up to timeout (in seconds) for the first one"""
+        while self.socket.poll(int(timeout * 1000), zmq.POLLIN):
+            message = self.socket.recv()
+            if message[1:] == TOPIC:
+                self.subscribers += 1 if message[0] == 1 else -1
+            timeout = 0.
+
+    def publish(self, dte: DataToExport, timestamp: Optional[float] = None) -> int:
+        """Publish the data with the next sequence number, returned"""
+        self.update_subscribers(0. if self.subscribers else self.subscriber_timeout)
+        seq = self.seq
+        self.seq += 1
+        descriptor = dict(seq=seq, timestamp=time.time() if timestamp is None else timestamp,
+                          data=[dict(name=dwa.name, dim=dwa.dim.name, labels=dwa.labels, narrays=len(dwa))
+                                for dwa in dte])
+        frames = [TOPIC, json.dumps(descriptor).encode()]
+        for dwa in dte:
+            for array in dwa:
+                array = np.ascontiguousarray(array)
+                frames += [pack_header(array, seq, descriptor['timestamp']), as_bytes(array)]
+        self.socket.send_multipart(frames, copy=False)
+        return seq
+
+    def close(self):
+        self.socket.close()
+
+
+class FrameSubscriber:
+    """Receive, in a background thread, the frames of a FramePublisher
+
+    Parameters
+    ----------
+    address: str
+        address of the publisher, for instance tcp://localhost:5570
+    callback: callable
+        called from the receiving thread with the received DataToExport, its data having seq and timestamp
+        attributes
+    hwm: int
+        number of messages queued before the publisher drops new ones
+    error_callback: callable, optional
+        called from the receiving thread with the exception raised by the decoding of a message or by the callback,
+        the message being then skipped, or by the socket, the reception being then stopped. The exception is logged
+        in any case.
+
+    Attributes
+    ----------
+    received: int
+    dropped: int
+        number of frames missing in the sequence
+    errors: int
+        number of messages skipped because of an exception
+    error: Exception
+        the last exception, None if none
+    """
+
+    def __init__(self, address: str, callback: Callable[[DataToExport], None], hwm: int = 8,
+                 context: Optional[zmq.Context] = None,
+                 error_callback: Optional[Callable[[Exception], None]] = None):
+        self.address = address
+        self.callback = callback
+        self.error_callback = error_callback
+        self.socket = (context or zmq.Context.instance()).socket(zmq.SUB)
+        self.socket.setsockopt(zmq.RCVHWM, hwm)
+        self.socket.setsockopt(zmq.LINGER, 0)
+        self.socket.setsockopt(zmq.SUBSCRIBE, TOPIC)
+        self.received = 0
+        self.dropped = 0
+        self.errors = 0
+        self.error: Optional[Exception] = None
+        self._last_seq: Optional[int] = None
+        self._running = threading.Event()
+        self._thread = threading.Thread(target=self._receive, daemon=True)
+
+    def start(self):
+        self.socket.connect(self.address)
+        self._running.set()
+        self._thread.start()
+
+    def stop(self):
+        self._running.clear()
+        self._thread.join(5)
+        self.socket.close()
+
+    def _receive(self):
+        poller = zmq.Poller()
+        poller.register(self.socket, zmq.POLLIN)
+        while self._running.is_set():
+            try:
+                if not poller.poll(100):
+                    continue
+                frames = self.socket.recv_multipart(copy=False)
+            except zmq.ZMQError as e:
+                self._failed(e, f'Reception from {self.address} stopped')
+                return
+            try:
+                dte = self.decode(frames)
+                seq = dte[0].seq if len(dte) > 0 else self._last_seq
+                if self._last_seq is not None and seq > self._last_seq + 1:
+                    self.dropped += seq - self._last_seq - 1
+                self._last_seq = seq
+                self.received += 1
+                self.callback(dte)
+            except Exception as e:
+                self.errors += 1
+                self._failed(e, f'Message from {self.address} skipped')
+
+    def _failed(self, error: Exception, message: str):
+        self.error = error
+        logger.exception(f'{message}: {error}')
+        if self.error_callback is not None:
+            try:
+                self.error_callback(error)
+            except Exception as e:
+                logger.exception(f'Error callback of the subscriber to {self.address} failed: {e}')
+
+    @staticmethod
+    def decode(frames) -> DataToExport:
+        """Rebuild the DataToExport from the frames of a message, the arrays being views on the frames"""
+        descriptor = json.loads(frames[1].bytes)
+        data = []
+        index = 2
+        for description in descriptor['data']:
+            arrays = []
+            for _ in range(description['narrays']):
+                dtype, shape, *_ = unpack_header(frames[index].buffer)
+                arrays.append(np.frombuffer(frames[index + 1].buffer, dtype=dtype).reshape(shape))
+                index += 2
+            data.append(DataFromPlugins(name=description['name'], data=arrays, dim=description['dim'],
+                                        labels=description['labels'], seq=descriptor['seq'],
+                                        timestamp=descriptor['timestamp']))
+        return DataToExport('LECOStream', data=data)
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Sequence numbers and timestamps of the frames emitted by the Mock viewers, and their check downstream.
+
+Each DataFromPlugins emitted gets the extra attributes:
+
+* seq: a monotonic sequence number of the emitted frames of the plugin, starting at 0 (independent of the internal
+  ind_data counter of the Mocks, used as a roll offset)
+* acquisition_ns: the time when the frame was acquired (its data available to the plugin, so at the end of the
+  exposure), in ns since the epoch
+* emit_ns: the time right before the frame is emitted, in ns since the epoch
+
+The timestamps use the wall clock (time.time_ns) to be comparable between processes of the same host.
+
+A FrameChecker connected to a dte_signal (or called by any consumer with the received DataToExport) computes the
+end to end latencies and counts the dropped, reordered and duplicated frames.
+"""
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Set
+
+from pymodaq.utils.data import DataToExport
+
+from pymodaq_plugins_mock.hardware.stats import LatencyHistogram
+
+
+class FrameTagger:
+    """Give the next sequence number and the timestamps to the data of the frames to be emitted"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._counter = itertools.count()
+
+    def tag(self, dte: DataToExport, acquisition_ns: Optional[int] = None) -> DataToExport:
+        """Tag all the data of a frame with the next sequence number, the same for all of them
+
+        Parameters
+        ----------
+        dte: DataToExport
+        acquisition_ns: int
+            the acquisition time of the frame from time.time_ns, now if None
+
+        Returns
+        -------
+        DataToExport: dte, tagged
+        """
+        seq = next(self._counter)
+        emit_ns = time.time_ns()
+        for dwa in dte:
+            dwa.add_extra_attribute(seq=seq, acquisition_ns=emit_ns if acquisition_ns is None else acquisition_ns,
+                                    emit_ns=emit_ns)
+        return dte
+
+
+class FrameChecker:
+    """Check the frames tagged by a FrameTagger when they are received
+
+    Latencies are measured from the acquisition and from the emission of the frames to their reception. A frame
+    whose sequence number is missing when a later one is received is counted as dropped, and as reordered instead
+    if it is received afterwards; a frame received twice is counted as duplicated.
+
+    Parameters
+    ----------
+    max_missing: int
+        the number of missing sequence numbers remembered to detect the reordered frames, the oldest ones being then
+        considered definitely dropped
+    """
+
+    def __init__(self, max_missing: int = 10000):
+        self.max_missing = max_missing
+        self._lock = threading.Lock()
+        self.latency = LatencyHistogram()
+        self.transit = LatencyHistogram()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.latency.reset()
+            self.transit.reset()
+            self.received = 0
+            self.reordered = 0
+            self.duplicated = 0
+            self.untagged = 0
+            self._lost = 0
+            self._missing: Set[int] = set()
+            self._missing_order: Deque[int] = deque()  # ascending, may still hold sequence numbers received since
+            self.last_seq: Optional[int] = None
+
+    @property
+    def dropped(self) -> int:
+        return self._lost + len(self._missing)
+
+    def __call__(self, dte: DataToExport):
+        self.check(dte)
+
+    def check(self, dte: DataToExport, received_ns: Optional[int] = None):
+        """Account for a received frame, received_ns being its reception time (time.time_ns), now if None"""
+        received_ns = time.time_ns() if received_ns is None else received_ns
+        dwa = next((dwa for dwa in dte if hasattr(dwa, 'seq')), None)
+        with self._lock:
+            if dwa is None:
+                self.untagged += 1
+                return
+            self.received += 1
+            if hasattr(dwa, 'acquisition_ns'):
+                self.latency.record((received_ns - dwa.acquisition_ns) * 1e-9)
+            if hasattr(dwa, 'emit_ns'):
+                self.transit.record((received_ns - dwa.emit_ns) * 1e-9)
+            self._sequence(dwa.seq)
+
+    def _sequence(self, seq: int):
+        if self.last_seq is None or seq == self.last_seq + 1:
+            self.last_seq = seq
+        elif seq > self.last_seq + 1:
+            first = max(self.last_seq + 1, seq - self.max_missing)
+            self._lost += first - self.last_seq - 1  # the part of the gap that cannot be remembered anyway
+            self._missing.update(range(first, seq))
+            self._missing_order.extend(range(first, seq))
+            self.last_seq = seq
+            while len(self._missing) > self.max_missing:
+                oldest = self._missing_order.popleft()
+                if oldest in self._missing:
+                    self._missing.remove(oldest)
+                    self._lost += 1
+            if len(self._missing_order) > 2 * self.max_missing:
+                self._missing_order = deque(ind for ind in self._missing_order if ind in self._missing)
+        elif seq in self._missing:
+            self._missing.remove(seq)
+            self.reordered += 1
+        else:
+            self.duplicated += 1
+
+    def summary(self) -> Dict[str, object]:
+        """The frame counts and the latencies (ms) from the acquisition and from the emission"""
+        return dict(received=self.received, dropped=self.dropped, reordered=self.reordered,
+                    duplicated=self.duplicated, untagged=self.untagged, latency_ms=self.latency.summary(),
+                    transit_ms=self.transit.summary())
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Opt-in instrumentation of the hot paths of the Mock plugins: each call (grab_data, move_abs...) is split into named
+phases (model evaluation, noise, roll, averaging, DataToExport construction, signal emission...) timed with the
+monotonic nanosecond counter, the durations being kept in a rolling window per phase.
+
+When disabled, the phases are a shared no-op context manager so that the instrumented code costs a single attribute
+lookup and a with statement, whatever the number of phases.
+
+The statistics tell whether a latency comes from the plugin itself or from the consumers of its signals (the emit
+phase of a directly connected slot including the slot execution), and can be sent periodically as a status message.
+"""
+from contextlib import nullcontext
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from pymodaq.utils.daq_utils import ThreadCommand
+from pymodaq.utils.parameter import Parameter
+
+
+instrumentation_parameters = [
+    {'title': 'Instrumentation:', 'name': 'instrumentation', 'type': 'group', 'expanded': False, 'children': [
+        {'title': 'Enabled:', 'name': 'instrumented', 'type': 'bool', 'value': False,
+         'tip': 'Time the phases of each call of the plugin'},
+        {'title': 'Window:', 'name': 'window', 'type': 'int', 'value': 1000, 'min': 1,
+         'tip': 'Number of calls the rolling statistics are computed on'},
+        {'title': 'Status every (s):', 'name': 'status_interval', 'type': 'float', 'value': 0., 'min': 0.,
+         'tip': 'Period of the status message summarizing the phases, 0 to disable it'},
+    ]},
+]
+
+_DISABLED = nullcontext()
+
+
+class RollingStats:
+    """Durations (in ns) of the last calls for each phase, and counters since the last reset
+
+    Parameters
+    ----------
+    window: int
+        the number of durations kept per phase
+    """
+
+    def __init__(self, window: int = 1000):
+        self.window = max(1, int(window))
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._durations: Dict[str, np.ndarray] = {}
+            self.counts: Dict[str, int] = {}
+            self.totals_ns: Dict[str, int] = {}
+
+    @property
+    def phases(self):
+        return list(self.counts)
+
+    def record(self, phase: str, duration_ns: int):
+        with self._lock:
+            count = self.counts.get(phase, 0)
+            if count == 0:
+                self._durations[phase] = np.zeros((self.window,), dtype=np.int64)
+                self.totals_ns[phase] = 0
+            self._durations[phase][count % self.window] = duration_ns
+            self.counts[phase] = count + 1
+            self.totals_ns[phase] += duration_ns
+
+    def durations(self, phase: str) -> np.ndarray:
+        """The durations (in ns) of the phase within the window, oldest first"""
+        with self._lock:
+            count = self.counts.get(phase, 0)
+            if count == 0:
+                return np.zeros((0,), dtype=np.int64)
+            return np.roll(self._durations[phase], -(count % self.window))[-min(count, self.window):]
+
+    def summary(self, scale: float = 1e-6) -> Dict[str, Dict[str, float]]:
+        """For each phase, its count since the reset and the mean, p50, p99 and max of its window, durations being
+        multiplied by scale (ms by default)"""
+        summary = {}
+        for phase in self.phases:
+            durations = self.durations(phase)
+            p50, p99 = np.percentile(durations, [50, 99])
+            summary[phase] = dict(count=self.counts[phase], mean=float(np.mean(durations)) * scale,
+                                  p50=float(p50) * scale, p99=float(p99) * scale,
+                                  max=float(np.max(durations)) * scale)
+        return summary
+
+
+class _Phase:
+    __slots__ = ('_stats', '_name', '_start')
+
+    def __init__(self, stats: RollingStats, name: str):
+        self._stats = stats
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *args):
+        self._stats.record(self._name, time.perf_counter_ns() - self._start)
+
+
+class PhaseTimer:
+    """Time the phases of the calls of a plugin into a RollingStats, if enabled
+
+    Usage::
+
+        with self.timer.phase('noise'):
+            data += amp_noise * np.random.rand(N)
+
+    Parameters
+    ----------
+    enabled: bool
+    window: int
+        see RollingStats
+    status_interval: float
+        minimum time (in s) between two status messages, 0 to disable them
+    """
+
+    def __init__(self, enabled: bool = False, window: int = 1000, status_interval: float = 0.):
+        self.enabled = enabled
+        self.stats = RollingStats(window)
+        self.status_interval = status_interval
+        self._last_status = time.perf_counter()
+
+    def phase(self, name: str):
+        """Context manager timing its block as the phase name, doing nothing if disabled"""
+        if not self.enabled:
+            return _DISABLED
+        return _Phase(self.stats, name)
+
+    def update_from_settings(self, settings: Parameter):
+        """Apply the settings of the instrumentation group, the statistics being reset if the window changes"""
+        self.enabled = settings['instrumented']
+        self.status_interval = settings['status_interval']
+        if settings['window'] != self.stats.window:
+            self.stats = RollingStats(settings['window'])
+
+    def status_message(self) -> str:
+        """One line summary of the phases: p50/p99 in ms"""
+        return 'Phases (p50/p99 ms): ' + ', '.join(
+            f'{phase} {stats["p50"]:.3f}/{stats["p99"]:.3f}' for phase, stats in self.stats.summary().items())
+
+    def emit_periodic_status(self, emit_status: Callable[[ThreadCommand], None]) -> Optional[str]:
+        """Send the status message using emit_status (the emit_status method of a plugin) if enabled and the status
+        interval elapsed since the last one
+
+        Returns
+        -------
+        str: the message sent, None if none was
+        """
+        if not self.enabled or self.status_interval <= 0:
+            return None
+        now = time.perf_counter()
+        if now - self._last_status < self.status_interval:
+            return None
+        self._last_status = now
+        message = self.status_message()
+        emit_status(ThreadCommand('Update_Status', [message]))
+        return message
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+In-process stand-ins for a LECO setup, to exercise the LECODirector plugins without any other process:
+
+* CoordinatorThread runs a pyleco Coordinator in a background thread
+* MockActor plays the role of a remote DAQ_Viewer or DAQ_Move module in LECO actor mode, the instrument being one
+  of the Mock plugins of this package, its data being sent back through LECO or published on a data stream (see
+  :mod:`pymodaq_plugins_mock.hardware.frame_stream`)
+"""
+import queue
+import threading
+import time
+from typing import Optional, Union
+
+from qtpy.QtCore import Qt
+
+from pyleco.coordinators.coordinator import Coordinator
+from pyleco.core import COORDINATOR_PORT
+
+from pymodaq.control_modules.move_utility_classes import DAQ_Move_base
+from pymodaq.control_modules.viewer_utility_classes import DAQ_Viewer_base
+from pymodaq.utils.daq_utils import ThreadCommand
+from pymodaq.utils.data import DataActuator, DataToExport
+from pymodaq.utils.leco.pymodaq_listener import ActorListener
+from pymodaq.utils.logger import set_logger
+
+from pymodaq_plugins_mock.hardware.frame_stream import FramePublisher
+from pymodaq_plugins_mock.hardware.stats import LatencyHistogram
+
+logger = set_logger('leco_actor', add_to_console=False)
+
+
+class CoordinatorThread(threading.Thread):
+    """Run a LECO Coordinator in a background thread
+
+    Parameters
+    ----------
+    port: int
+    namespace: str
+        namespace of the coordinator (the node name)
+    host: str
+    """
+
+    def __init__(self, port: int = COORDINATOR_PORT, namespace: str = 'mock', host: str = 'localhost'):
+        super().__init__(daemon=True)
+        self.port = port
+        self.namespace = namespace
+        self.host = host
+        self.error: Optional[Exception] = None
+        self._ready = threading.Event()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        try:
+            with Coordinator(namespace=self.namespace, host=self.host, port=self.port,
+                             cleaning_interval=1) as coordinator:
+                self._ready.set()
+                coordinator.routing(stop_event=self._stop_event)
+        except Exception as e:
+            self.error = e
+        finally:
+            self._ready.set()
+
+    def start(self, timeout: float = 5.):
+        """Start routing, raising the error if the coordinator could not be started (port already in use...)"""
+        super().start()
+        self._ready.wait(timeout)
+        if self.error is not None:
+            raise self.error
+
+    def stop(self, timeout: float = 5.):
+        self._stop_event.set()
+        self.join(timeout)
+
+
+class MockActor:
+    """A Mock plugin remotely controlled through LECO, as by a DAQ_Viewer or DAQ_Move module in LECO actor mode
+
+    The commands received by the listener are processed by a worker thread, the only one using the plugin and
+    answering to the director. A move is answered once the actuator is within epsilon of its target (or after
+    move_timeout), as DAQ_Move would do.
+
+    Parameters
+    ----------
+    name: str
+        name of the actor, to be set as actor_name in the director settings
+    plugin: DAQ_Viewer_base or DAQ_Move_base
+        an instance of an instrument plugin, initialized by :meth:`start`
+    host: str
+        host of the coordinator
+    port: int
+        port of the coordinator
+    move_timeout: float
+        in seconds
+    poll_interval: float
+        in seconds, interval between two checks of the actuator value while moving
+    stream_address: str, optional
+        if given, the data of a viewer are published at this address (tcp://*:5570 for instance) instead of being
+        sent through LECO
+
+    Attributes
+    ----------
+    publisher: FramePublisher or None
+    acquisition: LatencyHistogram
+        duration of the grabs (or moves) of the plugin itself
+    """
+
+    def __init__(self, name: str, plugin: Union[DAQ_Viewer_base, DAQ_Move_base], host: str = 'localhost',
+                 port: int = COORDINATOR_PORT, move_timeout: float = 5., poll_interval: float = 0.002,
+                 stream_address: Optional[str] = None):
+        self.name = name
+        self.plugin = plugin
+        self.move_timeout = move_timeout
+        self.poll_interval = poll_interval
+        self.stream_address = stream_address
+        self.publisher: Optional[FramePublisher] = None
+        self.listener = ActorListener(name, host=host, port=port)
+        self.acquisition = LatencyHistogram()
+        self._commands: queue.Queue = queue.Queue()
+        self._worker = threading.Thread(target=self._work, daemon=True)
+
+    @property
+    def is_actuator(self) -> bool:
+        return isinstance(self.plugin, DAQ_Move_base)
+
+    def start(self, timeout: float = 5.):
+        """Initialize the plugin, then sign in and start answering the commands
+
+        Raises
+        ------
+        TimeoutError if the actor could not sign in the coordinator
+        """
+        if self.is_actuator:
+            self.plugin.ini_stage()
+        else:
+            self.plugin.ini_detector()
+            self.plugin.dte_signal.connect(self._data_ready, Qt.DirectConnection)
+        self.listener.cmd_signal.connect(self._commands.put, Qt.DirectConnection)
+        self.listener.start_listen()
+        self._worker.start()
+        deadline = time.perf_counter() + timeout
+        while '.' not in self.listener.message_handler.full_name:
+            if time.perf_counter() > deadline:
+                raise TimeoutError(f'{self.name} could not sign in the coordinator')
+            time.sleep(0.01)
+
+    def stop(self):
+        self._commands.put(None)
+        self._worker.join(5)
+        self.listener.stop_listen()
+        self.plugin.close()
+
+    def _data_ready(self, dte: DataToExport):
+        self._commands.put(ThreadCommand('data_ready', dte))
+
+    def _work(self):
+        # the communicator of a thread should not be used by other threads
+        self.listener.communicator = self.listener.get_communicator()
+        if self.stream_address is not None:
+            self.publisher = FramePublisher(self.stream_address)
+        while True:
+            command = self._commands.get()
+            if command is None:
+                break
+            try:
+                self.process(command)
+            except Exception as e:
+                logger.exception(f'{self.name} could not process {command.command}: {e}')
+        if self.publisher is not None:
+            self.publisher.close()
+
+    def process(self, command: ThreadCommand):
+        """Process a command received from the director (or the data of the plugin)"""
+        if command.command.startswith('Send Data'):
+            tic = time.perf_counter()
+            self.plugin.grab_data(Naverage=1)
+            self.acquisition.record(time.perf_counter() - tic)
+        elif command.command == 'data_ready':
+            if self.publisher is not None:
+                self.publisher.publish(command.attribute)
+            else:
+                self.listener.queue_command(command)
+        elif command.command in ('move_abs', 'move_rel'):
+            position = command.attribute[0]
+            if not isinstance(position, DataActuator):
+                position = DataActuator(data=float(position))
+            getattr(self.plugin, command.command)(position)
+            self.send_move_done(self.plugin.target_value.value())
+        elif command.command == 'move_home':
+            self.plugin.move_home()
+            self.send_move_done(0.)
+        elif command.command == 'stop_motion':
+            self.plugin.stop_motion()
+            self.listener.queue_command(ThreadCommand('move_done', [self.plugin.get_actuator_value()]))
+        elif command.command == 'get_actuator_value':
+            self.listener.queue_command(ThreadCommand('position_is', [self.plugin.get_actuator_value()]))
+
+    def send_move_done(self, target: float):
+        """Wait for the actuator to reach its target then tell the director"""
+        tic = time.perf_counter()
+        value = self.plugin.get_actuator_value()
+        while abs(value.value() - target) > self.plugin.settings['epsilon'] and \
+                time.perf_counter() < tic + self.move_timeout:
+            time.sleep(self.poll_interval)
+            value = self.plugin.get_actuator_value()
+        self.acquisition.record(time.perf_counter() - tic)
+        self.listener.queue_command(ThreadCommand('move_done', [value]))
@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Virtual ND instruments:
+
+* a lazy generator of the ND mock data (two navigation axes and one temporal signal axis). The cube is
+  never built as a whole: it is produced chunk by chunk, either per navigation tile or per time slice,
+  optionally into a numpy.memmap scratch file so that huge cubes never live in RAM.
+* a separable generator with any number of navigation and signal axes
+"""
+import os
+import string
+import sys
+import tempfile
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from pymodaq.utils.math_utils import gauss1D, gauss2D
+
+
+class LazyNDSource:
+    """Virtual ND instrument computing its (Ny, Nx, Nt) data cube on demand
+
+    The data of a given frame is:
+
+    * a 2D gaussian (plus noise) in the navigation plane modulated by sin(x / lambda)**2
+    * multiplied for each navigation pixel by a temporal gaussian modulated by a sin**2 rolled by the linear index
+      of the pixel
+    * rolled along the x axis by a frame dependent offset
+
+    A frame is selected using :meth:`new_frame`, then any sub-block of it can be computed using :meth:`chunk`
+    or iterated over using :meth:`iter_nav_chunks` or :meth:`iter_time_chunks`.
+
+    Parameters
+    ----------
+    Nx: int
+        number of points along the x navigation axis
+    Ny: int
+        number of points along the y navigation axis
+    Nt: int
+        number of points along the temporal (signal) axis
+    dtype: numpy dtype
+        the dtype of the produced chunks
+    """
+
+    def __init__(self, Nx: int = 100, Ny: int = 200, Nt: int = 150, dtype=np.float64):
+        self.Nx = Nx
+        self.Ny = Ny
+        self.Nt = Nt
+        self.dtype = np.dtype(dtype)
+
+        self.amp = 20
+        self.x0 = 50.
+        self.y0 = 100.
+        self.dx = 20.
+        self.dy = 40.
+        self.n = 1
+        self.wavelength = 8.
+        self.t0 = 50.
+        self.dt = 20.
+        self.nt = 1
+        self.amp_noise = 4.
+        self.rolling = 1
+
+        self._spatial: np.ndarray = None
+        self._temporal: np.ndarray = None
+        self._modulation: np.ndarray = None
+        self._shift = 0
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return self.Ny, self.Nx, self.Nt
+
+    @property
+    def nbytes(self) -> int:
+        return self.Ny * self.Nx * self.Nt * self.dtype.itemsize
+
+    @property
+    def x_axis(self) -> np.ndarray:
+        return np.linspace(0, self.Nx, self.Nx, endpoint=False)
+
+    @property
+    def y_axis(self) -> np.ndarray:
+        return np.linspace(0, self.Ny, self.Ny, endpoint=False)
+
+    @property
+    def time_axis(self) -> np.ndarray:
+        return np.linspace(0, self.Nt, self.Nt, endpoint=False)
+
+    def new_frame(self, ind_data: int = 0):
+        """Draw the random part of a new frame and set its roll offset
+
+        Only the (Ny, Nx) navigation map and the Nt temporal profiles are computed here, the cube itself is
+        computed lazily by the chunk methods.
+
+        Parameters
+        ----------
+        ind_data: int
+            index of the frame, used to compute the roll offset along the x axis
+        """
+        x_axis = self.x_axis
+        time_axis = self.time_axis
+        spatial = self.amp * gauss2D(x_axis, self.x0, self.dx, self.y_axis, self.y0, self.dy, self.n)
+        spatial += self.amp_noise * np.random.rand(self.Ny, self.Nx)
+        spatial *= np.sin(x_axis / self.wavelength) ** 2
+        self._spatial = spatial
+        self._temporal = gauss1D(time_axis, self.t0, self.dt, self.nt)
+        self._modulation = np.sin(time_axis / 4) ** 2
+        self._shift = ind_data * self.rolling
+
+    def chunk(self, y_slice: slice = slice(None), x_slice: slice = slice(None),
+              t_slice: slice = slice(None), out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Compute a sub-block of the current frame
+
+        Parameters
+        ----------
+        y_slice: slice
+            the rows of the navigation plane to compute
+        x_slice: slice
+            the columns of the navigation plane to compute
+        t_slice: slice
+            the temporal points to compute
+        out: ndarray, optional
+            if given, the chunk is written (not accumulated) into it, should have the shape of the chunk
+
+        Returns
+        -------
+        ndarray: the chunk of shape (len(y_slice), len(x_slice), len(t_slice))
+        """
+        if self._spatial is None:
+            self.new_frame()
+        ys = np.arange(self.Ny)[y_slice]
+        xs_src = (np.arange(self.Nx)[x_slice] - self._shift) % self.Nx
+        ts = np.arange(self.Nt)[t_slice]
+
+        linear_index = ys[:, None] * self.Nx + xs_src[None, :]
+        roll_index = ts[None, None, :] - linear_index[:, :, None]
+
+        if out is None:
+            out = np.empty((len(ys), len(xs_src), len(ts)), dtype=self.dtype)
+        # mode='wrap' applies the modulo of the roll and avoids numpy's internal buffering of out
+        np.take(self._modulation.astype(out.dtype, copy=False), roll_index, out=out, mode='wrap')
+        out *= self._temporal[ts]
+        out *= self._spatial[np.ix_(ys, xs_src)][:, :, None]
+        return out
+
+    def iter_nav_chunks(self, rows: int = 16) -> Iterator[Tuple[slice, np.ndarray]]:
+        """Iterate over the current frame by tiles of navigation rows
+
+        Yields
+        ------
+        slice: the y slice of the chunk
+        ndarray: the chunk of shape (rows, Nx, Nt)
+        """
+        rows = max(1, int(rows))
+        for ind in range(0, self.Ny, rows):
+            y_slice = slice(ind, min(ind + rows, self.Ny))
+            yield y_slice, self.chunk(y_slice=y_slice)
+
+    def iter_time_chunks(self, points: int = 16) -> Iterator[Tuple[slice, np.ndarray]]:
+        """Iterate over the current frame by slices of the temporal axis
+
+        Yields
+        ------
+        slice: the t slice of the chunk
+        ndarray: the chunk of shape (Ny, Nx, points)
+        """
+        points = max(1, int(points))
+        for ind in range(0, self.Nt, points):
+            t_slice = slice(ind, min(ind + points, self.Nt))
+            yield t_slice, self.chunk(t_slice=t_slice)
+
+    def average(self, Naverage: int, ind_data: int, out: np.ndarray, rows: int = 16) -> np.ndarray:
+        """Average Naverage consecutive frames into out, navigation tile per navigation tile
+
+        Parameters
+        ----------
+        Naverage: int
+            the number of frames to average
+        ind_data: int
+            the index of the first frame
+        out: ndarray
+            the (Ny, Nx, Nt) array (possibly a numpy.memmap) where to write the result
+        rows: int
+            the number of navigation rows computed at once, sets the peak memory of the computation
+
+        Returns
+        -------
+        ndarray: out
+        """
+        rows = max(1, int(rows))
+        tile = np.empty((rows, self.Nx, self.Nt), dtype=self.dtype)
+        for ind_average in range(Naverage):
+            self.new_frame(ind_data + ind_average)
+            for ind in range(0, self.Ny, rows):
+                y_slice = slice(ind, min(ind + rows, self.Ny))
+                chunk = self.chunk(y_slice=y_slice, out=tile[:y_slice.stop - y_slice.start])
+                if ind_average == 0:
+                    out[y_slice] = chunk
+                else:
+                    out[y_slice] += chunk
+        if Naverage > 1:
+            for ind in range(0, self.Ny, rows):
+                out[ind:ind + rows] /= Naverage
+        return out
+
+
+class MemmapScratch:
+    """Scratch .npy files mapped in memory using numpy.memmap
+
+    The files are created in the given folder (or the temporary folder) and deleted when closed. As they are
+    genuine .npy files, they can be reopened by any other process using numpy.load(path, mmap_mode='r')
+
+    The arrays given by get_array are rotated: an array is handed out again only once no one else references it (nor
+    any view of it), so that the data already emitted are never overwritten under their consumers. Up to nfiles files
+    are kept in the rotation, the oldest one being dropped (its file deleted, its mapping left to its consumers) when
+    a new one is needed.
+
+    Parameters
+    ----------
+    folder: str or Path, optional
+        where to create the scratch files. The system temporary folder is used if empty or None
+    nfiles: int
+        number of files kept in the rotation
+    """
+
+    def __init__(self, folder: Union[str, Path] = None, nfiles: int = 4):
+        self._folder = Path(folder) if folder else Path(tempfile.gettempdir())
+        self.nfiles = max(1, int(nfiles))
+        self._paths: List[Path] = []
+        self._arrays: List[Tuple[np.memmap, Path]] = []
+        self.path: Path = None
+        self.array: np.memmap = None
+
+    def new_array(self, shape: Tuple[int, ...], dtype=np.float64) -> np.memmap:
+        """Create a new scratch file and get its memory mapped array"""
+        fd, path = tempfile.mkstemp(suffix='.npy', prefix='mock_nd_', dir=self._folder)
+        os.close(fd)
+        self._paths.append(Path(path))
+        return open_memmap(path, mode='w+', dtype=dtype, shape=tuple(shape))
+
+    def get_array(self, shape: Tuple[int, ...], dtype=np.float64) -> np.memmap:
+        """Get a memory mapped array of the given shape and dtype, reusing a released file if compatible
+
+        All the files are deleted if the shape or dtype changed
+        """
+        if self._arrays and (self._arrays[0][0].shape != tuple(shape) or self._arrays[0][0].dtype != np.dtype(dtype)):
+            self.close()
+        self.array = None
+        for array, path in self._arrays:
+            # references: the list of arrays, the loop variable and the argument of getrefcount
+            if sys.getrefcount(array) <= 3:
+                self.array, self.path = array, path
+                break
+        if self.array is None:
+            if len(self._arrays) >= self.nfiles:
+                _, path = self._arrays.pop(0)  # still used by its consumers, left to them
+                self._delete(path)
+            self.array = self.new_array(shape, dtype)
+            self.path = self._paths[-1]
+            self._arrays.append((self.array, self.path))
+        return self.array
+
+    def close(self):
+        """Delete all the scratch files
+
+        The mappings themselves are released once the last views on them are garbage collected
+        """
+        self.array = None
+        self.path = None
+        self._arrays = []
+        for path in list(self._paths):
+            self._delete(path)
+        self._paths = []
+
+    def _delete(self, path: Path):
+        """Delete a scratch file, kept to be deleted again on close if it fails (still mapped on Windows)"""
+        try:
+            path.unlink()
+        except OSError:
+            return
+        self._paths.remove(path)
+
+
+def outer_product(profiles: Sequence[np.ndarray], out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Compute the outer product of N 1D arrays in a single broadcasted operation
+
+    Parameters
+    ----------
+    profiles: list of 1D ndarray
+        the separable profiles, one per axis
+    out: ndarray, optional
+        where to write the result
+
+    Returns
+    -------
+    ndarray: the array of shape (len(profiles[0]), len(profiles[1]), ...), 1 of shape () if there is no profile
+    """
+    if len(profiles) == 0:
+        if out is None:
+            return np.ones(())
+        out[...] = 1
+        return out
+    if len(profiles) > len(string.ascii_letters):
+        raise ValueError(f'Cannot compute an outer product of {len(profiles)} arrays')
+    letters = string.ascii_letters[:len(profiles)]
+    return np.einsum(','.join(letters) + '->' + letters, *profiles, out=out)
+
+
+class SeparableNDSource:
+    """Virtual ND instrument whose data is a separable product of one profile per axis plus some noise
+
+    Parameters
+    ----------
+    nav_sizes: list of int
+        the sizes of the navigation axes
+    sig_sizes: list of int
+        the sizes of the signal axes
+    dtype: numpy dtype
+        the dtype of the produced data
+    """
+
+    def __init__(self, nav_sizes: Sequence[int] = (10, 20, 5), sig_sizes: Sequence[int] = (64, 32),
+                 dtype=np.float64):
+        self.nav_sizes = tuple(int(size) for size in nav_sizes)
+        self.sig_sizes = tuple(int(size) for size in sig_sizes)
+        self.dtype = np.dtype(dtype)
+        self.amp = 20.
+        self.amp_noise = 1.
+        self.profiles: List[np.ndarray] = [gauss1D(np.arange(size), size / 2, max(size / 4, 1))
+                                           for size in self.shape]
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        return self.nav_sizes + self.sig_sizes
+
+    @property
+    def nav_indexes(self) -> Tuple[int, ...]:
+        return tuple(range(len(self.nav_sizes)))
+
+    def set_profile(self, index: int, x0: float, dx: float, n: int = 1):
+        """Set the gaussian profile of the axis of the given index (navigation axes first)"""
+        self.profiles[index] = gauss1D(np.arange(self.shape[index]), x0, dx, n)
+
+    def get_data(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Compute a new frame, if out is given, it is written into it"""
+        if out is None:
+            out = np.empty(self.shape, dtype=self.dtype)
+        outer_product(self.profiles, out=out)
+        out *= self.amp
+        if self.amp_noise > 0:
+            out += self.amp_noise * np.random.rand(*self.shape)
+        return out
+
+    def average(self, Naverage: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Average Naverage frames accumulating them in place"""
+        out = self.get_data(out)
+        if Naverage > 1:
+            frame = np.empty_like(out)
+            for _ in range(Naverage - 1):
+                out += self.get_data(frame)
+            out /= Naverage
+        return out
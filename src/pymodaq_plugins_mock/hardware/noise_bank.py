@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Precomputed noise for pipeline stress tests: drawing the uniform noise of large mock frames costs more than the rest
+of their synthesis, so in this opt-in mode the noise of each frame is a view into a bank of noise generated once.
+
+The bank is a flat pool of (K + 1) * N uniform values for frames of N points. The noise of a frame is the N values
+starting at a random offset within the first K * N ones, reversed with a probability of one half, reshaped to the
+frame: no value is computed or copied per frame. Successive frames draw different offsets, so their noises are
+uncorrelated unless their windows overlap; overlapping windows are shifted copies of each other (the probability of
+an overlap is about 2 / K). K sets both the memory used, (K + 1) * N * 8 bytes, and this statistical quality.
+
+The bank is filled when the first frame of a given size is drawn, either right away or in a background thread (the
+caller then generating its noise live until the bank is ready).
+"""
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+
+from pymodaq.utils.parameter import Parameter
+
+
+noise_bank_parameters = [
+    {'title': 'Noise bank:', 'name': 'noise_bank', 'type': 'group', 'expanded': False, 'children': [
+        {'title': 'Use noise bank:', 'name': 'use_bank', 'type': 'bool', 'value': False,
+         'tip': 'Take the noise of each frame from a bank of precomputed noise, for pipeline stress tests'},
+        {'title': 'Bank frames:', 'name': 'bank_frames', 'type': 'int', 'value': 16, 'min': 1,
+         'tip': 'Number of frames of noise in the bank, setting its memory and the decorrelation of the frames'},
+        {'title': 'Fill in background:', 'name': 'fill_background', 'type': 'bool', 'value': False,
+         'tip': 'Fill the bank in a background thread, the noise being generated live meanwhile'},
+    ]},
+]
+
+
+class NoiseBank:
+    """A pool of precomputed uniform noise, scaled by amplitude, from which the noise of frames is drawn
+
+    Parameters
+    ----------
+    frames: int
+        the number K of frames of noise in the bank
+    background: bool
+        if True, the bank is filled in a background thread
+    seed: int, optional
+        seed of the generator of the bank and of the draws
+    """
+
+    def __init__(self, frames: int = 16, background: bool = False, seed: Optional[int] = None):
+        self.enabled = False
+        self.frames = frames
+        self.background = background
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self._pool: Optional[np.ndarray] = None
+        self._npts = 0
+        self._amplitude = 1.
+        self._fill_key: Optional[Tuple[int, float]] = None
+        self._filling: Optional[threading.Thread] = None
+
+    @property
+    def nbytes(self) -> int:
+        pool = self._pool
+        return 0 if pool is None else pool.nbytes
+
+    @property
+    def is_ready(self) -> bool:
+        return self._pool is not None
+
+    def update(self, enabled: bool, frames: int = None, background: bool = None):
+        """Enable or disable the bank, the pool being dropped if disabled or if its number of frames changed"""
+        frames = self.frames if frames is None else frames
+        self.background = self.background if background is None else background
+        if not enabled or frames != self.frames:
+            with self._lock:
+                self._pool = None
+                self._npts = 0
+                self._fill_key = None
+        self.frames = frames
+        self.enabled = enabled
+
+    def update_from_settings(self, settings: Parameter):
+        """Same as update but using the values of a group created from noise_bank_parameters"""
+        self.update(settings['use_bank'], settings['bank_frames'], settings['fill_background'])
+
+    def _fill(self, npts: int, amplitude: float, seed: int):
+        pool = np.random.default_rng(seed).random((self.frames + 1) * npts)
+        if amplitude != 1.:
+            pool *= amplitude
+        with self._lock:
+            if self._fill_key == (npts, amplitude) and self.enabled:
+                self._pool = pool
+                self._amplitude = amplitude
+                self._filling = None
+
+    def _get_pool(self, npts: int, amplitude: float) -> Optional[np.ndarray]:
+        """Get the pool for frames of npts points and the given amplitude, filling it if needed"""
+        with self._lock:
+            pool = self._pool
+            if pool is not None and self._npts == npts:
+                if amplitude != self._amplitude and self._amplitude != 0:
+                    pool *= amplitude / self._amplitude
+                    self._amplitude = amplitude
+                if amplitude == self._amplitude:
+                    return pool
+            if self._filling is not None and self._fill_key == (npts, amplitude):
+                return None
+            self._pool = None
+            self._npts = npts
+            self._fill_key = (npts, amplitude)
+            seed = int(self._rng.integers(2 ** 63))
+            if self.background:
+                self._filling = threading.Thread(target=self._fill, args=(npts, amplitude, seed),
+                                                 name='mock_noise_bank', daemon=True)
+                self._filling.start()
+                return None
+        self._fill(npts, amplitude, seed)
+        return self._pool
+
+    def draw(self, shape: Tuple[int, ...], amplitude: float = 1.) -> Optional[np.ndarray]:
+        """Get the noise of a frame, a read only view into the bank
+
+        Parameters
+        ----------
+        shape: tuple of int
+            the shape of the frame
+        amplitude: float
+            the noise being uniform within [0, amplitude). A change of the amplitude rescales the bank in place, so
+            that a caller drawing noises of different amplitudes should rather use 1 and scale the noise itself.
+
+        Returns
+        -------
+        ndarray or None: None if the bank is disabled or not filled yet, the caller should then generate the noise
+        """
+        if not self.enabled:
+            return None
+        npts = int(np.prod(shape))
+        pool = self._get_pool(npts, amplitude)
+        if pool is None:
+            return None
+        start = int(self._rng.integers(0, self.frames * npts + 1))
+        noise = pool[start:start + npts]
+        if self._rng.random() < 0.5:
+            noise = noise[::-1]
+        noise = noise.reshape(shape)
+        noise.flags.writeable = False
+        return noise
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the end of a background fill, return True if the bank is ready"""
+        filling = self._filling
+        if filling is not None:
+            filling.join(timeout)
+        return self.is_ready
@@ -0,0 +1,334 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Process pool synthesis of large mock frames.
+
+A frame is split into bands of rows, each band being computed by a worker process of a
+concurrent.futures.ProcessPoolExecutor directly into a buffer shared with the plugin process: either a
+multiprocessing.shared_memory block or the numpy.memmap scratch file of the ND mock. Only the small parameters of
+each band are pickled, never the frame data.
+
+The workers are spawned (not forked) so that they never inherit the Qt and thread state of the plugin process.
+"""
+import copy
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_EXCEPTION
+from multiprocessing import get_context, shared_memory
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from pymodaq.utils.math_utils import gauss2D
+from pymodaq.utils.parameter import Parameter
+
+from pymodaq_plugins_mock.hardware.nd_source import LazyNDSource
+
+
+parallel_parameters = [
+    {'title': 'Process pool:', 'name': 'parallel', 'type': 'group', 'expanded': False, 'children': [
+        {'title': 'Use process pool:', 'name': 'use_pool', 'type': 'bool', 'value': False,
+         'tip': 'Synthesize each frame by bands of rows in a pool of worker processes'},
+        {'title': 'Workers:', 'name': 'nworkers', 'type': 'int', 'value': os.cpu_count() or 1, 'min': 1},
+        {'title': 'Bands:', 'name': 'nbands', 'type': 'int', 'value': 0, 'min': 0,
+         'tip': 'Number of row bands per frame, 0 for twice the number of workers'},
+    ]},
+]
+
+
+class SharedArray:
+    """A numpy array living in a multiprocessing.shared_memory block
+
+    Parameters
+    ----------
+    shape: tuple of int
+        the shape of the array
+    dtype: numpy dtype
+        the dtype of the array
+    """
+
+    def __init__(self, shape: Tuple[int, ...], dtype=np.float64):
+        self.shape = tuple(int(size) for size in shape)
+        self.dtype = np.dtype(dtype)
+        self._shm = shared_memory.SharedMemory(create=True,
+                                               size=max(1, int(np.prod(self.shape)) * self.dtype.itemsize))
+        self.array = np.ndarray(self.shape, self.dtype, buffer=self._shm.buf)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def descriptor(self) -> tuple:
+        """What a worker needs to map the array, see :func:`attach`"""
+        return 'shm', self._shm.name, self.shape, self.dtype.str, 0
+
+    def close(self):
+        """Release and destroy the shared block, the array should not be used afterwards"""
+        self.array = None
+        try:
+            self._shm.close()
+        except BufferError:  # views still alive, the mapping is released once they are collected
+            pass
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def memmap_descriptor(array: np.memmap) -> tuple:
+    """Get the descriptor of a whole numpy.memmap array (not of a view on it), see :func:`attach`"""
+    return 'memmap', str(array.filename), array.shape, array.dtype.str, array.offset
+
+
+def attach(descriptor: tuple) -> Tuple[np.ndarray, Optional[shared_memory.SharedMemory]]:
+    """Map in the current process the array described by a descriptor
+
+    Parameters
+    ----------
+    descriptor: tuple
+        (kind, name, shape, dtype, offset) where kind is either 'shm' (name of a shared memory block) or 'memmap'
+        (path of a file)
+
+    Returns
+    -------
+    ndarray: the mapped array
+    SharedMemory or None: the shared block to close once done with the array
+    """
+    kind, name, shape, dtype, offset = descriptor
+    if kind == 'shm':
+        shm = shared_memory.SharedMemory(name=name)
+        return np.ndarray(shape, np.dtype(dtype), buffer=shm.buf, offset=offset), shm
+    elif kind == 'memmap':
+        return np.memmap(name, dtype=np.dtype(dtype), mode='r+', offset=offset, shape=tuple(shape)), None
+    raise ValueError(f'Unknown kind of shared array: {kind}')
+
+
+def _release(shm: Optional[shared_memory.SharedMemory]):
+    if shm is not None:
+        try:
+            shm.close()
+        except BufferError:
+            pass
+
+
+def _warm_up():
+    """Executed once by each worker at start so that the imports are done before the first frame"""
+    return os.getpid()
+
+
+def _run_band(task: Callable, descriptor: tuple, start: int, stop: int, args: tuple):
+    """Executed by a worker: map the frame and compute its rows from start to stop"""
+    array, shm = attach(descriptor)
+    try:
+        task(array[start:stop], start, stop, *args)
+    finally:
+        del array
+        _release(shm)
+
+
+def mock_2d_band(out: np.ndarray, start: int, stop: int, settings: dict, shift: int, seed: int):
+    """Compute the rows start to stop of the 2D mock frame into out
+
+    Parameters
+    ----------
+    out: ndarray
+        the (stop - start, Nx) band to write
+    start: int
+        first row of the band
+    stop: int
+        last row (excluded) of the band
+    settings: dict
+        values of the Nx, Ny, Amp, x0, dx, y0, dy, n and amp_noise settings of the 2D mock
+    shift: int
+        roll of the frame along the x axis
+    seed: int
+        seed of the noise of the frame, each band uses its own stream derived from it
+    """
+    x_axis = np.linspace(0, settings['Nx'], settings['Nx'], endpoint=False)
+    y_axis = np.linspace(0, settings['Ny'], settings['Ny'], endpoint=False)[start:stop]
+    rng = np.random.default_rng([seed, start])
+    band = settings['Amp'] * gauss2D(x_axis, settings['x0'], settings['dx'],
+                                     y_axis, settings['y0'], settings['dy'], settings['n'])
+    band += settings['amp_noise'] * rng.random(band.shape)
+    band *= np.sin(x_axis / 4) ** 2
+    out[:] = np.roll(band, shift, axis=1)
+
+
+def nd_band(out: np.ndarray, start: int, stop: int, source: LazyNDSource, spatial: tuple, accumulate: bool,
+            rows: int):
+    """Compute (or accumulate) the navigation rows start to stop of the current frame of a LazyNDSource
+
+    Parameters
+    ----------
+    out: ndarray
+        the (stop - start, Nx, Nt) band to write
+    start: int
+        first row of the band
+    stop: int
+        last row (excluded) of the band
+    source: LazyNDSource
+        the source without its navigation map
+    spatial: tuple
+        descriptor of the shared navigation map of the current frame
+    accumulate: bool
+        if True the band is added to out instead of written into it
+    rows: int
+        number of rows computed at once
+    """
+    source._spatial, shm = attach(spatial)
+    try:
+        tile = np.empty((min(rows, stop - start), source.Nx, source.Nt), dtype=source.dtype) if accumulate \
+            else None
+        for ind in range(start, stop, rows):
+            y_slice = slice(ind, min(ind + rows, stop))
+            band_slice = slice(y_slice.start - start, y_slice.stop - start)
+            if accumulate:
+                out[band_slice] += source.chunk(y_slice, out=tile[:y_slice.stop - y_slice.start])
+            else:
+                source.chunk(y_slice, out=out[band_slice])
+    finally:
+        source._spatial = None
+        _release(shm)
+
+
+class ParallelSynthesizer:
+    """Synthesize mock frames by bands of rows in a pool of worker processes
+
+    The frames are written into shared buffers owned by the synthesizer and reused from one frame to the next:
+    the arrays returned by :meth:`mock_2d` are only valid until the next call. All methods can be called from any
+    thread, frames are synthesized one at a time.
+    """
+
+    def __init__(self):
+        self._pool: ProcessPoolExecutor = None
+        self._nworkers = os.cpu_count() or 1
+        self._nbands = 0
+        self._buffers: Dict[str, SharedArray] = dict()
+        self._lock = threading.RLock()
+
+    @property
+    def is_running(self) -> bool:
+        return self._pool is not None
+
+    @property
+    def nworkers(self) -> int:
+        return self._nworkers
+
+    @property
+    def nbands(self) -> int:
+        """Number of bands a frame is split into"""
+        return self._nbands if self._nbands > 0 else 2 * self._nworkers
+
+    def start(self):
+        """Spawn the worker processes and wait until they are ready"""
+        with self._lock:
+            if self._pool is not None:
+                return
+            self._pool = ProcessPoolExecutor(self._nworkers, mp_context=get_context('spawn'))
+            futures = [self._pool.submit(_warm_up) for _ in range(self._nworkers)]
+            for future in futures:
+                future.result()
+
+    def shutdown(self):
+        """Stop the worker processes and destroy the shared buffers"""
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+            for buffer in self._buffers.values():
+                buffer.close()
+            self._buffers = dict()
+
+    def update(self, enabled: bool, nworkers: int = None, nbands: int = None):
+        """Start, stop or resize the pool according to the process pool settings"""
+        with self._lock:
+            nworkers = self._nworkers if nworkers is None else max(1, nworkers)
+            if self._pool is not None and (not enabled or nworkers != self._nworkers):
+                self.shutdown()
+            self._nworkers = nworkers
+            self._nbands = self._nbands if nbands is None else nbands
+            if enabled:
+                self.start()
+
+    def update_from_settings(self, settings: Parameter):
+        """Same as update but using the values of a group created from parallel_parameters"""
+        self.update(settings['use_pool'], settings['nworkers'], settings['nbands'])
+
+    def get_buffer(self, key: str, shape: Tuple[int, ...], dtype=np.float64) -> SharedArray:
+        """Get the shared buffer of the given key, reallocated only if its shape or dtype changed"""
+        buffer = self._buffers.get(key, None)
+        if buffer is None or buffer.shape != tuple(shape) or buffer.dtype != np.dtype(dtype):
+            if buffer is not None:
+                buffer.close()
+            buffer = SharedArray(shape, dtype)
+            self._buffers[key] = buffer
+        return buffer
+
+    def run(self, task: Callable, descriptor: tuple, nrows: int, *args):
+        """Compute the nrows rows of the array of the given descriptor band per band in the workers
+
+        task is called by the workers as task(band, start, stop, *args), it should be a module level function
+
+        Raises
+        ------
+        RuntimeError if the pool is not started
+        Exception raised by the task
+        """
+        if self._pool is None:
+            raise RuntimeError('The process pool is not started')
+        nbands = max(1, min(self.nbands, nrows))
+        edges = np.linspace(0, nrows, nbands + 1).astype(int)
+        futures = [self._pool.submit(_run_band, task, descriptor, int(start), int(stop), args)
+                   for start, stop in zip(edges[:-1], edges[1:]) if stop > start]
+        done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in not_done:
+            future.cancel()
+        wait(not_done)
+        for future in futures:
+            future.result()
+
+    def mock_2d(self, settings: dict, shift: int = 0) -> np.ndarray:
+        """Synthesize a 2D mock frame, see :func:`mock_2d_band`
+
+        Returns
+        -------
+        ndarray: the (Ny, Nx) frame, valid until the next call
+        """
+        with self._lock:
+            frame = self.get_buffer('2D', (settings['Ny'], settings['Nx']))
+            self.run(mock_2d_band, frame.descriptor, settings['Ny'], settings, shift,
+                     int(np.random.randint(2 ** 31)))
+            return frame.array
+
+    def average_nd(self, source: LazyNDSource, Naverage: int, ind_data: int, out: np.ndarray,
+                   rows: int = 16) -> np.ndarray:
+        """Same as LazyNDSource.average but computing the navigation rows in the workers
+
+        If out is a whole numpy.memmap, the workers write directly into its file, otherwise the frames are
+        synthesized into a shared buffer then copied into out.
+        """
+        rows = max(1, int(rows))
+        with self._lock:
+            if isinstance(out, np.memmap) and out.filename is not None:
+                target, descriptor = out, memmap_descriptor(out)
+            else:
+                buffer = self.get_buffer('ND', source.shape, source.dtype)
+                target, descriptor = buffer.array, buffer.descriptor
+            light = copy.copy(source)
+            light._spatial = None
+            for ind_average in range(Naverage):
+                source.new_frame(ind_data + ind_average)
+                spatial = self.get_buffer('ND_spatial', source._spatial.shape, source._spatial.dtype)
+                spatial.array[:] = source._spatial
+                light._shift = source._shift
+                light._temporal = source._temporal
+                light._modulation = source._modulation
+                self.run(nd_band, descriptor, source.Ny, light, spatial.descriptor, ind_average > 0, rows)
+            for ind in range(0, source.Ny, rows):
+                if Naverage > 1:
+                    target[ind:ind + rows] /= Naverage
+                if target is not out:
+                    out[ind:ind + rows] = target[ind:ind + rows]
+            return out
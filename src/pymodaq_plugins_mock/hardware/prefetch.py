@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Background prefetch of mock frames: a worker thread generates the next frames into a pool of slots while the
+current one is emitted.
+
+Each slot is owned by exactly one party at a time:
+
+* free: available to the worker
+* filling: being written by the worker
+* ready: waiting in the prefetch queue
+* leased: handed to a consumer, it is only given back to the pool when the consumer releases it
+
+so that a frame still held by a consumer is never overwritten. A frame handed over using take (to be emitted, its
+consumers being unknown) is detached from its slot: the slot goes back to the pool without its buffers, and the next
+frame generated in it gets new ones.
+
+The settings used by the generator should only be changed while the prefetcher is paused, the frames generated so
+far being discarded when resuming.
+"""
+from collections import deque
+from contextlib import contextmanager
+import threading
+from typing import Any, Callable, Deque, List, Optional
+
+from pymodaq.utils.parameter import Parameter
+
+
+prefetch_parameters = [
+    {'title': 'Prefetch:', 'name': 'prefetch', 'type': 'group', 'expanded': False, 'children': [
+        {'title': 'Use prefetch:', 'name': 'use_prefetch', 'type': 'bool', 'value': False,
+         'tip': 'Generate the next frames in a background thread while the current one is emitted'},
+        {'title': 'Depth:', 'name': 'depth', 'type': 'int', 'value': 1, 'min': 1,
+         'tip': 'Number of frames generated in advance'},
+    ]},
+]
+
+
+class FrameSlot:
+    """A buffer of the prefetch pool
+
+    Attributes
+    ----------
+    data: object
+        the frame stored in this slot, given back to the generator as the previous frame so its buffers can be
+        reused, None once handed over using take
+    seq: int
+        the generation sequence number of the frame
+    error: Exception
+        the exception raised by the generator, if any
+    """
+
+    def __init__(self, prefetcher: 'FramePrefetcher', index: int):
+        self._prefetcher = prefetcher
+        self.index = index
+        self.data: Any = None
+        self.seq = -1
+        self.error: Optional[Exception] = None
+        self._epoch = 0
+
+    def release(self):
+        """Give back the slot to the pool, the consumer should not use data afterwards"""
+        self._prefetcher._release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.release()
+
+
+class FramePrefetcher:
+    """Generate frames in a background thread into a pool of depth + hold slots
+
+    Parameters
+    ----------
+    generator: Callable[[int, object], object]
+        called with the number of frames to average and the previous frame of the slot (or None), it should return
+        the new frame. It is called from the worker thread.
+    depth: int
+        the number of frames generated in advance
+    hold: int
+        the number of frames that can be leased at once using :meth:`get` without stalling the generation
+    """
+
+    def __init__(self, generator: Callable[[int, Any], Any], depth: int = 1, hold: int = 1):
+        self._generator = generator
+        self._depth = depth
+        self._hold = hold
+        self._Naverage = 1
+        self._epoch = 0
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._free: Deque[FrameSlot] = deque()
+        self._ready: Deque[FrameSlot] = deque()
+        self._slots: List[FrameSlot] = []
+        self._thread: threading.Thread = None
+        self._running = False
+        self._paused = 0
+        self._generating = False
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    @property
+    def depth(self) -> int:
+        return self._depth
+
+    @property
+    def hold(self) -> int:
+        return self._hold
+
+    @property
+    def Naverage(self) -> int:
+        """Number of frames averaged by the generator"""
+        return self._Naverage
+
+    def start(self):
+        if self._running:
+            return
+        self._slots = [FrameSlot(self, ind) for ind in range(self._depth + self._hold)]
+        self._free = deque(self._slots)
+        self._ready.clear()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='mock_prefetch', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.):
+        """Stop the worker thread, frames already leased stay valid for their consumers"""
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        self._thread = None
+        with self._cond:
+            while self._ready:
+                self._free.append(self._ready.popleft())
+
+    def update(self, enabled: bool, depth: int = None, hold: int = None):
+        """Start, stop or resize the pool according to the prefetch settings"""
+        depth = self._depth if depth is None else depth
+        hold = self._hold if hold is None else hold
+        if self._running and (not enabled or depth != self._depth or hold != self._hold):
+            self.stop()
+        self._depth = depth
+        self._hold = hold
+        if enabled:
+            self.start()
+
+    def update_from_settings(self, settings: Parameter):
+        """Same as update but using the values of a group created from prefetch_parameters"""
+        self.update(settings['use_prefetch'], settings['depth'])
+
+    @contextmanager
+    def paused(self, flush: bool = True):
+        """Suspend the generation, waiting for the frame being generated if any, for instance while the settings used
+        by the generator change. The frames generated so far are discarded when resuming if flush is True."""
+        with self._cond:
+            self._paused += 1
+            self._cond.wait_for(lambda: not self._generating)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._paused -= 1
+                if flush:
+                    self._flush_locked()
+                else:
+                    self._cond.notify_all()
+
+    def flush(self):
+        """Discard the frames generated so far, for instance because the settings changed"""
+        with self._cond:
+            self._flush_locked()
+
+    def set_naverage(self, Naverage: int):
+        """Generate the next frames averaging Naverage frames, the frames generated so far being discarded if it
+        changed (as when getting a frame with another Naverage)"""
+        with self._cond:
+            self._set_naverage_locked(Naverage)
+
+    def _set_naverage_locked(self, Naverage: int):
+        if Naverage != self._Naverage:
+            self._Naverage = Naverage
+            self._flush_locked()
+
+    def _flush_locked(self):
+        self._epoch += 1
+        while self._ready:
+            self._free.append(self._ready.popleft())
+        self._cond.notify_all()
+
+    def get(self, Naverage: int = 1, timeout: Optional[float] = None) -> FrameSlot:
+        """Get the next frame as a leased slot, the caller should release it once done with it
+
+        Raises
+        ------
+        TimeoutError if no frame is ready within timeout
+        Exception raised by the generator
+        """
+        with self._cond:
+            self._set_naverage_locked(Naverage)
+            if not self._cond.wait_for(lambda: self._ready or not self._running, timeout):
+                raise TimeoutError('No prefetched frame available')
+            if not self._ready:
+                raise RuntimeError('The prefetcher is not running')
+            slot = self._ready.popleft()
+            self._cond.notify_all()
+        if slot.error is not None:
+            error = slot.error
+            slot.release()
+            raise error
+        return slot
+
+    def take(self, Naverage: int = 1, timeout: Optional[float] = None) -> Any:
+        """Get the next frame data, handed over to the caller for good
+
+        To be used by a plugin emitting the frame: the data are detached from their slot, never given back to the
+        generator, so that they are not overwritten whatever their consumers keep.
+        """
+        slot = self.get(Naverage, timeout)
+        data, slot.data = slot.data, None
+        slot.release()
+        return data
+
+    def _release(self, slot: FrameSlot):
+        with self._cond:
+            self._release_locked(slot)
+
+    def _release_locked(self, slot: FrameSlot):
+        if slot in self._slots and slot not in self._free:
+            slot.error = None
+            self._free.append(slot)
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: not self._running or (not self._paused and self._free and
+                                                                  len(self._ready) < self._depth))
+                if not self._running:
+                    return
+                slot = self._free.popleft()
+                slot._epoch = self._epoch
+                Naverage = self._Naverage
+                self._generating = True
+            try:
+                slot.data = self._generator(Naverage, slot.data)
+            except Exception as e:
+                slot.error = e
+            with self._cond:
+                self._generating = False
+                if slot._epoch != self._epoch:
+                    slot.error = None
+                    self._free.append(slot)
+                else:
+                    slot.seq = self._seq
+                    self._seq += 1
+                    self._ready.append(slot)
+                self._cond.notify_all()
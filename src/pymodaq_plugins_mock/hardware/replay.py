@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Replay of recorded frames, read from .npy or raw binary files through numpy.memmap so that datasets larger than
+the memory can be played back.
+
+The frames are stacked along the first axis of the file. Their recorded acquisition times, if any, are read from a
+.npy file holding one timestamp per frame (in s, or in ns if integers), by default the file named as the data file
+with the _timestamps suffix. The frames are then paced by a ReplayClock at their recorded times divided by a speed
+multiplier, at a fixed period when there are no timestamps, or not at all (as fast as possible).
+"""
+from pathlib import Path
+import threading
+import time
+from typing import NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from pymodaq.utils.parameter import Parameter
+
+
+replay_parameters = [
+    {'title': 'Replay:', 'name': 'replay', 'type': 'group', 'children': [
+        {'title': 'File:', 'name': 'path', 'type': 'browsepath', 'value': '', 'filetype': True,
+         'tip': '.npy or raw binary file of the frames, stacked along its first axis'},
+        {'title': 'Timestamps file:', 'name': 'timestamps_path', 'type': 'browsepath', 'value': '', 'filetype': True,
+         'tip': '.npy file of the acquisition times of the frames (s, or ns if integers), by default '
+                '<file>_timestamps.npy if it exists'},
+        {'title': 'Raw files:', 'name': 'raw', 'type': 'group', 'expanded': False, 'children': [
+            {'title': 'Data type:', 'name': 'dtype', 'type': 'list', 'value': 'float64',
+             'limits': ['float64', 'float32', 'int32', 'uint32', 'int16', 'uint16', 'uint8']},
+            {'title': 'Frame shape:', 'name': 'frame_shape', 'type': 'str', 'value': '',
+             'tip': 'Shape of one frame of a raw file, comma separated, for instance 512, 512'},
+            {'title': 'Header (bytes):', 'name': 'offset', 'type': 'int', 'value': 0, 'min': 0,
+             'tip': 'Number of bytes to skip at the beginning of a raw file'},
+        ]},
+        {'title': 'Pacing:', 'name': 'pacing', 'type': 'list', 'value': 'recorded',
+         'limits': ['recorded', 'fastest'],
+         'tip': 'Emit the frames at their recorded times (or at the period if none) or as fast as possible'},
+        {'title': 'Speed:', 'name': 'speed', 'type': 'float', 'value': 1., 'min': 1e-3,
+         'tip': 'Speed multiplier of the recorded timing'},
+        {'title': 'Period (ms):', 'name': 'period', 'type': 'float', 'value': 100., 'min': 0.,
+         'tip': 'Time between frames having no recorded timestamps'},
+        {'title': 'Loop:', 'name': 'loop', 'type': 'bool', 'value': True,
+         'tip': 'Replay the file again once at its end, otherwise stop emitting frames'},
+        {'title': 'Readahead:', 'name': 'readahead', 'type': 'int', 'value': 4, 'min': 0,
+         'tip': 'Number of frames read in advance by a background thread, 0 to read them when grabbed'},
+    ]},
+]
+
+
+class ReplayFrame(NamedTuple):
+    """A frame read from a ReplaySource
+
+    Attributes
+    ----------
+    index: int
+        index in the file of the (last) frame
+    timestamp: float
+        its recorded time in s, or its index times the period if not recorded
+    data: ndarray
+        the frame, or the average of consecutive frames
+    """
+    index: int
+    timestamp: float
+    data: np.ndarray
+
+
+def parse_shape(shape: str) -> Tuple[int, ...]:
+    """Parse a comma separated shape as '512, 512', an empty string being the shape of a scalar"""
+    return tuple(int(size) for size in shape.replace('(', '').replace(')', '').split(',') if size.strip())
+
+
+class ReplaySource:
+    """Recorded frames mapped in memory, read in order
+
+    Parameters
+    ----------
+    path: str or Path
+        a .npy file, or a raw binary file of C ordered frames
+    dtype: numpy dtype
+        the type of the data of a raw file
+    frame_shape: tuple of int
+        the shape of a frame of a raw file
+    offset: int
+        the number of bytes of the header of a raw file
+    timestamps_path: str or Path, optional
+        the .npy file of the timestamps, see the module docstring
+    """
+
+    def __init__(self, path: Union[str, Path], dtype=np.float64, frame_shape: Tuple[int, ...] = (), offset: int = 0,
+                 timestamps_path: Union[str, Path, None] = None):
+        path = Path(path)
+        if path.suffix == '.npy':
+            self.frames: np.ndarray = np.load(path, mmap_mode='r')
+            if self.frames.ndim == 0:
+                raise ValueError(f'{path.name} holds a scalar and no frames')
+        else:
+            dtype = np.dtype(dtype)
+            frame_nbytes = int(np.prod(frame_shape)) * dtype.itemsize
+            nframes = (path.stat().st_size - offset) // frame_nbytes
+            if nframes <= 0:
+                raise ValueError(f'{path.name} is smaller than a frame of shape {frame_shape}')
+            self.frames = np.memmap(path, dtype=dtype, mode='r', offset=offset,
+                                    shape=(nframes,) + tuple(frame_shape))
+        self.timestamps: Optional[np.ndarray] = None
+        if timestamps_path is None or str(timestamps_path) == '':
+            timestamps_path = path.with_name(f'{path.stem}_timestamps.npy')
+            timestamps_path = timestamps_path if timestamps_path.is_file() else None
+        if timestamps_path is not None:
+            timestamps = np.load(timestamps_path)
+            if timestamps.shape != (len(self),):
+                raise ValueError(f'{len(timestamps)} timestamps for {len(self)} frames')
+            self.timestamps = timestamps * 1e-9 if timestamps.dtype.kind in 'iu' else timestamps.astype(float)
+        self.index = 0
+
+    @classmethod
+    def from_settings(cls, settings: Parameter) -> 'ReplaySource':
+        """Open the file of a group created from replay_parameters"""
+        return cls(settings['path'], settings['raw', 'dtype'], parse_shape(settings['raw', 'frame_shape']),
+                   settings['raw', 'offset'], settings['timestamps_path'])
+
+    def __len__(self):
+        return self.frames.shape[0]
+
+    @property
+    def frame_shape(self) -> Tuple[int, ...]:
+        return self.frames.shape[1:]
+
+    @property
+    def at_end(self) -> bool:
+        return self.index >= len(self)
+
+    def timestamp(self, index: int, period: float = 0.1) -> float:
+        """The recorded time of a frame, its index times period (in s) if not recorded"""
+        if self.timestamps is None:
+            return index * period
+        return float(self.timestamps[index])
+
+    def read(self, Naverage: int = 1, out: Optional[np.ndarray] = None, loop: bool = True,
+             period: float = 0.1) -> ReplayFrame:
+        """Read the next frame, or the average of the next Naverage frames, copied out of the memory map
+
+        Parameters
+        ----------
+        Naverage: int
+        out: ndarray, optional
+            a buffer to copy the frame into, used if its shape and type match
+        loop: bool
+            if True, the frames following the last one are the first ones again
+        period: float
+            the time between frames (in s) if they have no timestamps
+
+        Raises
+        ------
+        EOFError if at the end of the file and not looping
+        """
+        indexes = []
+        for _ in range(Naverage):
+            if self.at_end:
+                if not loop:
+                    break
+                self.index = 0
+            indexes.append(self.index)
+            self.index += 1
+        if len(indexes) == 0:
+            raise EOFError('End of the replayed file')
+        if len(indexes) == 1:
+            frame = self.frames[indexes[0]]
+            if out is None or out.shape != frame.shape or out.dtype != frame.dtype:
+                out = np.empty(frame.shape, frame.dtype)
+            np.copyto(out, frame)
+        else:
+            if out is None or out.shape != self.frame_shape or out.dtype != np.float64:
+                out = np.zeros(self.frame_shape)
+            else:
+                out[...] = 0.
+            for index in indexes:
+                out += self.frames[index]
+            out /= len(indexes)
+        return ReplayFrame(indexes[-1], self.timestamp(indexes[-1], period), out)
+
+
+class ReplayClock:
+    """Pace frames at their recorded times divided by a speed multiplier
+
+    The first frame waited for sets the origin, the origin being set again when the timestamps go backwards (the
+    replay looping) or when a frame is late by more than resync seconds (so that a slow consumer does not get a
+    burst of frames to catch up).
+
+    A wait can be interrupted from another thread, the waits returning at once until the clock is reset.
+    """
+
+    def __init__(self, resync: float = 1.):
+        self.resync = resync
+        self.late = 0
+        self._interrupted = threading.Event()
+        self.reset()
+
+    @property
+    def interrupted(self) -> bool:
+        return self._interrupted.is_set()
+
+    def reset(self):
+        self._origin: Optional[Tuple[float, float]] = None
+        self._last = None
+        self._interrupted.clear()
+
+    def interrupt(self):
+        """Make the current wait, if any, and the next ones return at once"""
+        self._interrupted.set()
+
+    def wait(self, timestamp: float, speed: float = 1.) -> float:
+        """Sleep until the time of the frame recorded at timestamp or an interruption, return the time slept (s)"""
+        now = time.perf_counter()
+        if self._origin is None or self._last is None or timestamp < self._last:
+            self._origin = (now, timestamp)
+        self._last = timestamp
+        target = self._origin[0] + (timestamp - self._origin[1]) / speed
+        if target < now - self.resync:
+            self.late += 1
+            self._origin = (now, timestamp)
+            return 0.
+        if target > now:
+            self._interrupted.wait(target - now)
+            return time.perf_counter() - now
+        return 0.
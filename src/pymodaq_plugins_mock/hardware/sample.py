@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Simulated sample coupling the Mock actuators and detectors: the ActuatorWrapperWithTauMultiAxes publish their moves
+to a shared SimulatedSample, which the coupled Mock detectors query at the current X, Y, Theta, Power and Temp so
+that their data depend on the actuator positions (to benchmark scans, alignments and PID loops end to end).
+
+The actuators publish the motion of their axes (initial and target values, start time and rate of the exponential
+approach of ActuatorWrapperWithTauMultiAxes) as an immutable SampleState, the reference to the latest state being
+swapped at once. The detectors read it without locking and evaluate the positions at any time, vectorized over
+times; only the publishers serialize their updates. Times are from time.perf_counter, so that the sample is shared
+within a process.
+
+The sample is a spot of light of FWHM width (µm) at the origin, seen by the detectors displaced by the stage (X in
+µm, Y in mm) and by the thermal drift of the stage (drift µm/°C along X). Its intensity is multiplied by the
+transmission of a polarizer at Theta (Malus law) and grows linearly with Power.
+"""
+import threading
+import time
+from typing import Dict, NamedTuple, Sequence, Tuple, Union
+
+import numpy as np
+
+from pymodaq.utils.parameter import Parameter
+
+AXES = ['X', 'Y', 'Theta', 'Power', 'Temp']
+
+coupling_parameters = [
+    {'title': 'Coupling:', 'name': 'coupling', 'type': 'group', 'expanded': False, 'children': [
+        {'title': 'Coupled:', 'name': 'coupled', 'type': 'bool', 'value': False,
+         'tip': 'Make the data depend on the positions of the Mock actuators through the simulated sample, read '
+                'when the data are grabbed (the prefetch is then not used)'},
+    ]},
+]
+
+
+class SampleState(NamedTuple):
+    """Motion of the axes, read only arrays with one value per axis of AXES
+
+    The value of an axis at time t is target + (init - target) * exp(-rate * (t - start)), t >= start
+    """
+    init: np.ndarray
+    target: np.ndarray
+    start: np.ndarray
+    rate: np.ndarray
+
+
+def _frozen(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+class SimulatedSample:
+    """A sample whose response depends on the positions of the actuator axes
+
+    Parameters
+    ----------
+    width: float
+        the FWHM of the spot in µm
+    drift: float
+        the thermal drift along X in µm/°C
+    power_ref: float
+        the Power (mW) doubling the intensity
+    """
+
+    def __init__(self, width: float = 20., drift: float = 0.5, power_ref: float = 10.):
+        self.width = width
+        self.drift = drift
+        self.power_ref = power_ref
+        self._lock = threading.Lock()
+        zeros = np.zeros((len(AXES),))
+        self.state = SampleState(*(_frozen(zeros.copy()) for _ in SampleState._fields))
+
+    def publish(self, axes: Sequence[str], init: Sequence[float], target: Sequence[float],
+                start: Union[float, Sequence[float]], rate: Sequence[float]):
+        """Publish the motion of some axes, the others keeping theirs (called by the actuators)"""
+        indexes = [AXES.index(axis) for axis in axes]
+        with self._lock:
+            arrays = [array.copy() for array in self.state]
+            for array, values in zip(arrays, (init, target, start, rate)):
+                array[indexes] = values
+            self.state = SampleState(*(_frozen(array) for array in arrays))
+
+    def hold(self, axes: Sequence[str], values: Sequence[float]):
+        """Publish axes standing still at values"""
+        self.publish(axes, values, values, 0., [0.] * len(axes))
+
+    def positions(self, t: Union[None, float, np.ndarray] = None) -> np.ndarray:
+        """The values of the axes at time(s) t (time.perf_counter), now if None
+
+        Returns
+        -------
+        ndarray: of shape (len(AXES),) for a scalar t, (len(AXES),) + t.shape otherwise
+        """
+        state = self.state
+        t = time.perf_counter() if t is None else np.asarray(t)
+        shape = (-1,) + (1,) * np.ndim(t)
+        elapsed = np.maximum(t - state.start.reshape(shape), 0.)
+        return state.target.reshape(shape) + (state.init - state.target).reshape(shape) * np.exp(
+            -state.rate.reshape(shape) * elapsed)
+
+    def offset(self, positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Displacement (µm) of the spot along x and y for the positions"""
+        return positions[0] + self.drift * positions[4], 1000 * positions[1]
+
+    def gain(self, positions: np.ndarray) -> np.ndarray:
+        """Intensity of the spot relative to no power and Theta = 0 for the positions"""
+        return (1 + positions[3] / self.power_ref) * np.cos(np.radians(positions[2])) ** 2
+
+    def signal(self, t: Union[None, float, np.ndarray] = None, x: float = 0., y: float = 0.) -> np.ndarray:
+        """Intensity of the spot seen at the point (x, y) in µm, at time(s) t"""
+        positions = self.positions(t)
+        offset_x, offset_y = self.offset(positions)
+        return self.gain(positions) * np.exp(
+            -4 * np.log(2) * ((x - offset_x) ** 2 + (y - offset_y) ** 2) / self.width ** 2)
+
+
+_samples: Dict[str, SimulatedSample] = {}
+_samples_lock = threading.Lock()
+
+
+def get_sample(name: str = 'default') -> SimulatedSample:
+    """Get the simulated sample of that name shared within the process, creating it if needed"""
+    with _samples_lock:
+        if name not in _samples:
+            _samples[name] = SimulatedSample()
+        return _samples[name]
+
+
+def sample_from_settings(settings: Parameter) -> Union[SimulatedSample, None]:
+    """The default sample if coupled according to a group created from coupling_parameters, None otherwise"""
+    return get_sample() if settings['coupled'] else None
@@ -0,0 +1,316 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Shared memory transport of frames to consumers running in other processes of the same host.
+
+The publisher owns a named multiprocessing.shared_memory block holding a ring of slots. Each published frame is
+copied once into the next slot and only a small descriptor (slot, shape, dtype, sequence number, timestamp) is
+published in the table at the beginning of the block. Readers attach the block by its name and map the frames
+zero-copy.
+
+As the ring is overwritten once it is full, a reader working on a zero-copy frame should check it is still valid
+(:meth:`SharedFrameReader.is_valid`) once done with it, or use :meth:`SharedFrameReader.read` that does it.
+
+Unless given, the name of a ring is unique to its publisher. A publisher never destroys a block it did not create:
+creating a ring whose name is already used fails.
+"""
+import mmap
+import os
+from pathlib import Path
+import sys
+import time
+import uuid
+from multiprocessing import shared_memory
+from typing import NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+MAGIC = 0x4d4f434b  # 'MOCK'
+MAX_NDIM = 8
+ALIGNMENT = 64
+
+HEADER_DTYPE = np.dtype([('magic', '<u4'), ('closed', '<u4'), ('nslots', '<u4'), ('reserved', '<u4'),
+                         ('slot_size', '<u8'), ('head', '<i8')])
+SLOT_DTYPE = np.dtype([('seq', '<i8'), ('timestamp', '<f8'), ('ndim', '<u4'), ('reserved', '<u4'),
+                       ('shape', '<u8', (MAX_NDIM,)), ('dtype', 'S8')])
+
+shm_publisher_parameters = [
+    {'title': 'Shared memory publisher:', 'name': 'shm_publisher', 'type': 'group', 'expanded': False, 'children': [
+        {'title': 'Publish:', 'name': 'publish', 'type': 'bool', 'value': False,
+         'tip': 'Write the first channel of each emitted frame into a ring of shared memory slots readable by '
+                'other processes'},
+        {'title': 'Ring name:', 'name': 'ring_name', 'type': 'str', 'value': '',
+         'tip': 'Name of the shared memory block, a name unique to this viewer (logged) being used if empty'},
+        {'title': 'Slots:', 'name': 'nslots', 'type': 'int', 'value': 8, 'min': 2},
+    ]},
+]
+
+class FrameDescriptor(NamedTuple):
+    """What a consumer needs to find a frame in the ring"""
+    slot: int
+    shape: Tuple[int, ...]
+    dtype: str
+    seq: int
+    timestamp: float
+
+
+def _data_offset(nslots: int) -> int:
+    size = HEADER_DTYPE.itemsize + nslots * SLOT_DTYPE.itemsize
+    return -(-size // ALIGNMENT) * ALIGNMENT
+
+
+def unique_ring_name() -> str:
+    """A ring name unique to the caller, short enough for all the platforms"""
+    return f'pymodaq_mock_{os.getpid()}_{uuid.uuid4().hex[:8]}'
+
+
+class _MappedBlock:
+    """A shared memory block attached by mapping its file, as SharedMemory would but without registering it to the
+    resource tracker, which destroys the blocks it knows of when the process exits (before python 3.13)"""
+
+    def __init__(self, path: Path):
+        with open(path, 'r+b') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0)
+        self.buf = memoryview(self._mmap)
+
+    def close(self):
+        self.buf.release()
+        self._mmap.close()
+
+
+def _attach_block(name: str) -> Union[shared_memory.SharedMemory, _MappedBlock]:
+    """Attach an existing block without taking its ownership
+
+    Raises
+    ------
+    FileNotFoundError if there is no block of this name
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    path = Path('/dev/shm', name)
+    if os.name == 'posix' and path.parent.is_dir():
+        return _MappedBlock(path)
+    # windows destroys a block once its last handle is closed, there is no resource tracker
+    return shared_memory.SharedMemory(name=name)
+
+
+class _Ring:
+    """Views on the header, slot table and data of a ring block"""
+
+    def __init__(self, shm: Union[shared_memory.SharedMemory, _MappedBlock]):
+        self.shm = shm
+        self.header = np.ndarray((), HEADER_DTYPE, buffer=shm.buf)
+        nslots = int(self.header['nslots'])
+        self.slots = np.ndarray((nslots,), SLOT_DTYPE, buffer=shm.buf, offset=HEADER_DTYPE.itemsize)
+        self.data_offset = _data_offset(nslots)
+
+    @property
+    def nslots(self) -> int:
+        return len(self.slots)
+
+    @property
+    def slot_size(self) -> int:
+        return int(self.header['slot_size'])
+
+    def frame(self, slot: int, shape: Tuple[int, ...], dtype) -> np.ndarray:
+        return np.ndarray(shape, np.dtype(dtype), buffer=self.shm.buf,
+                          offset=self.data_offset + slot * self.slot_size)
+
+    def release(self):
+        self.header = self.slots = None
+        try:
+            self.shm.close()
+        except BufferError:  # frames still mapped by the caller, released once they are collected
+            pass
+
+
+class SharedFramePublisher:
+    """Publish frames into a named ring of shared memory slots
+
+    Parameters
+    ----------
+    name: str, optional
+        the name of the shared memory block, readers attach it using this name. A unique name if not given
+    nslots: int
+        the number of slots of the ring
+    """
+
+    def __init__(self, name: Optional[str] = None, nslots: int = 8):
+        self.name = name if name else unique_ring_name()
+        self.nslots = max(2, int(nslots))
+        self._ring: _Ring = None
+        self._seq = -1
+
+    @property
+    def seq(self) -> int:
+        """Sequence number of the last published frame, -1 if none"""
+        return self._seq
+
+    def open(self, slot_size: int):
+        """Create the ring block, replacing the current one if any
+
+        Raises
+        ------
+        FileExistsError if a block of this name, not created by this publisher, exists
+        """
+        self.close()
+        slot_size = -(-max(1, int(slot_size)) // ALIGNMENT) * ALIGNMENT
+        try:
+            shm = shared_memory.SharedMemory(name=self.name, create=True,
+                                             size=_data_offset(self.nslots) + self.nslots * slot_size)
+        except FileExistsError:
+            raise FileExistsError(f'The shared memory block {self.name} is used by another publisher') from None
+        header = np.ndarray((), HEADER_DTYPE, buffer=shm.buf)
+        header['nslots'] = self.nslots
+        header['slot_size'] = slot_size
+        header['head'] = -1
+        header['magic'] = MAGIC
+        del header
+        self._ring = _Ring(shm)
+        self._ring.slots['seq'] = -1
+
+    def publish(self, array: np.ndarray, timestamp: Optional[float] = None) -> FrameDescriptor:
+        """Copy a frame into the next slot of the ring and publish its descriptor
+
+        The ring is (re)created if the frame does not fit in its slots
+
+        Parameters
+        ----------
+        array: ndarray
+            the frame
+        timestamp: float, optional
+            the acquisition time of the frame (as returned by time.time()), now if not given
+        """
+        if array.ndim > MAX_NDIM:
+            raise ValueError(f'Cannot publish arrays with more than {MAX_NDIM} dimensions')
+        if self._ring is None or array.nbytes > self._ring.slot_size:
+            self.open(array.nbytes)
+        timestamp = time.time() if timestamp is None else timestamp
+        ring = self._ring
+        seq = self._seq + 1
+        slot = seq % ring.nslots
+        entry = ring.slots[slot]
+        entry['seq'] = -1  # being written
+        np.copyto(ring.frame(slot, array.shape, array.dtype), array)
+        entry['timestamp'] = timestamp
+        entry['ndim'] = array.ndim
+        entry['shape'][:] = 0
+        entry['shape'][:array.ndim] = array.shape
+        entry['dtype'] = array.dtype.str.encode()
+        entry['seq'] = seq
+        ring.header['head'] = seq
+        self._seq = seq
+        return FrameDescriptor(slot, tuple(array.shape), array.dtype.str, seq, timestamp)
+
+    def close(self):
+        """Flag the ring as closed for the readers and destroy it"""
+        if self._ring is not None:
+            self._ring.header['closed'] = 1
+            shm = self._ring.shm
+            self._ring.release()
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+            self._ring = None
+
+
+class SharedFrameReader:
+    """Map zero-copy the frames published by a SharedFramePublisher, possibly from another process
+
+    Parameters
+    ----------
+    name: str
+        the name of the ring
+
+    Raises
+    ------
+    FileNotFoundError if no ring of this name is published
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._ring: _Ring = None
+        self._attach()
+
+    def _attach(self):
+        ring = _Ring(_attach_block(self.name))
+        if int(ring.header['magic']) != MAGIC:
+            ring.release()
+            raise ValueError(f'{self.name} is not a ring of frames')
+        self._ring = ring
+
+    def _get_ring(self) -> _Ring:
+        """The current ring, attaching the new one if the publisher recreated it"""
+        if self._ring is None or self._ring.header['closed']:
+            if self._ring is not None:
+                self._ring.release()
+                self._ring = None
+            self._attach()
+        return self._ring
+
+    @property
+    def head(self) -> int:
+        """Sequence number of the last published frame, -1 if none"""
+        return int(self._get_ring().header['head'])
+
+    def descriptor(self, seq: Optional[int] = None) -> Optional[FrameDescriptor]:
+        """Get the descriptor of the frame of the given sequence number (the last one if None)
+
+        Returns None if this frame has not been published yet or has already been overwritten
+        """
+        ring = self._get_ring()
+        seq = int(ring.header['head']) if seq is None else seq
+        if seq < 0:
+            return None
+        slot = seq % ring.nslots
+        entry = ring.slots[slot].copy()
+        if int(entry['seq']) != seq:
+            return None
+        ndim = int(entry['ndim'])
+        return FrameDescriptor(slot, tuple(int(size) for size in entry['shape'][:ndim]),
+                               entry['dtype'].decode(), seq, float(entry['timestamp']))
+
+    def get(self, descriptor: FrameDescriptor) -> np.ndarray:
+        """Map zero-copy the frame of a descriptor, its content is only valid while is_valid returns True"""
+        return self._get_ring().frame(descriptor.slot, descriptor.shape, descriptor.dtype)
+
+    def is_valid(self, descriptor: FrameDescriptor) -> bool:
+        """Check the frame of the descriptor has not been overwritten (or is being overwritten) by the publisher"""
+        return int(self._get_ring().slots[descriptor.slot]['seq']) == descriptor.seq
+
+    def read(self, seq: Optional[int] = None) -> Tuple[Optional[FrameDescriptor], Optional[np.ndarray]]:
+        """Get a copy of the frame of the given sequence number (the last one if None)
+
+        Returns
+        -------
+        FrameDescriptor: the descriptor, None if the frame is not available
+        ndarray: the copied frame, None if the frame is not available or has been overwritten while copied
+        """
+        descriptor = self.descriptor(seq)
+        if descriptor is None:
+            return None, None
+        array = self.get(descriptor).copy()
+        return (descriptor, array) if self.is_valid(descriptor) else (descriptor, None)
+
+    def wait(self, after: int = -1, timeout: Optional[float] = None, poll: float = 0.001) -> Optional[int]:
+        """Wait for a frame with a sequence number greater than after
+
+        Returns
+        -------
+        int: the sequence number of the last published frame, None if timed out
+        """
+        start = time.perf_counter()
+        while True:
+            head = self.head
+            if head > after:
+                return head
+            if timeout is not None and time.perf_counter() - start > timeout:
+                return None
+            time.sleep(poll)
+
+    def close(self):
+        if self._ring is not None:
+            self._ring.release()
+            self._ring = None
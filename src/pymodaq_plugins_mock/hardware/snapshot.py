@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Immutable snapshots of the settings read when generating the mock data.
+
+Reading a setting walks the pyqtgraph parameter tree, which is a noticeable share of the time per frame at small
+frame sizes. The Mock viewers rather declare the settings their per-frame path needs as a typed NamedTuple, built
+from the settings tree with :func:`snapshot` whenever the settings are committed (commit_settings and ini_detector),
+so that the per-frame path only reads attributes of a tuple.
+"""
+from typing import Dict, Tuple, Type, TypeVar
+
+from pymodaq.utils.parameter import Parameter
+
+T = TypeVar('T', bound=tuple)
+
+
+def snapshot(cls: Type[T], settings: Parameter, paths: Dict[str, Tuple[str, ...]] = None) -> T:
+    """Build a NamedTuple from the values of the settings
+
+    Each field is read from the child of the settings having the same name, or from the path given in paths, and
+    converted to the type annotating the field (int, float, bool, str, numpy.dtype...)
+
+    Parameters
+    ----------
+    cls: type
+        a typing.NamedTuple subclass whose fields are all annotated
+    settings: Parameter
+        the group parameter the fields (or their paths) are relative to
+    paths: dict
+        the path within settings of the fields not named as their parameter
+
+    Examples
+    --------
+    >>> class Axis(NamedTuple):
+    ...     Npts: int
+    ...     x0: float
+    >>> snapshot(Axis, settings, paths=dict(Npts=('x_axis', 'Npts'), x0=('x_axis', 'x0')))
+    """
+    paths = {} if paths is None else paths
+    return cls(**{field: kind(settings[paths.get(field, field)])
+                  for field, kind in cls.__annotations__.items()})
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Lightweight statistics used to characterize the mock instruments and the transports (latencies, throughputs)
+"""
+import math
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+
+class LatencyHistogram:
+    """Histogram of durations (in seconds) with logarithmic bins
+
+    Recording is O(1) and the memory is bounded whatever the number of samples, percentiles being estimated from
+    the bins (at the geometric center of the bin, so within a relative error of half a bin).
+
+    Parameters
+    ----------
+    minimum: float
+        lower edge of the first bin, smaller durations are counted in the first bin
+    maximum: float
+        upper edge of the last bin, larger durations are counted in the last bin
+    bins_per_decade: int
+    """
+
+    def __init__(self, minimum: float = 1e-6, maximum: float = 100., bins_per_decade: int = 20):
+        self.minimum = minimum
+        self.bins_per_decade = bins_per_decade
+        self.edges = np.logspace(math.log10(minimum), math.log10(maximum),
+                                 int(round(math.log10(maximum / minimum) * bins_per_decade)) + 1)
+        self.counts = np.zeros((self.edges.size - 1,), dtype=np.int64)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counts[:] = 0
+            self.count = 0
+            self.total = 0.
+            self.min = math.inf
+            self.max = 0.
+
+    def record(self, duration: float):
+        index = int(math.log10(max(duration, self.minimum) / self.minimum) * self.bins_per_decade)
+        with self._lock:
+            self.counts[min(index, self.counts.size - 1)] += 1
+            self.count += 1
+            self.total += duration
+            self.min = min(self.min, duration)
+            self.max = max(self.max, duration)
+
+    def merge(self, other: 'LatencyHistogram'):
+        """Add the samples of another histogram with the same bins"""
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError('Cannot merge histograms with different bins')
+        with self._lock:
+            self.counts += other.counts
+            self.count += other.count
+            self.total += other.total
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count > 0 else math.nan
+
+    def percentile(self, q: float) -> float:
+        """Estimate the q-th percentile (0 to 100)"""
+        if self.count == 0:
+            return math.nan
+        index = int(np.searchsorted(np.cumsum(self.counts), q / 100 * self.count))
+        index = min(index, self.counts.size - 1)
+        return float(min(max(math.sqrt(self.edges[index] * self.edges[index + 1]), self.min), self.max))
+
+    def summary(self, scale: float = 1000.) -> Dict[str, float]:
+        """The count, mean, min, max and main percentiles, durations being multiplied by scale (ms by default)"""
+        return dict(count=self.count, mean=self.mean * scale, min=(self.min if self.count else math.nan) * scale,
+                    p50=self.percentile(50) * scale, p90=self.percentile(90) * scale,
+                    p99=self.percentile(99) * scale, max=self.max * scale)
+
+
+class Throughput:
+    """Count events and bytes since a start time"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self, start: Optional[float] = None):
+        with self._lock:
+            self.start = time.perf_counter() if start is None else start
+            self.events = 0
+            self.nbytes = 0
+
+    def record(self, nbytes: int = 0):
+        with self._lock:
+            self.events += 1
+            self.nbytes += nbytes
+
+    def summary(self, stop: Optional[float] = None) -> Dict[str, float]:
+        elapsed = max((time.perf_counter() if stop is None else stop) - self.start, 1e-9)
+        return dict(events=self.events, elapsed=elapsed, events_per_s=self.events / elapsed,
+                    MB_per_s=self.nbytes / elapsed / 1e6)
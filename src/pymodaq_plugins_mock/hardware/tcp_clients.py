@@ -0,0 +1,406 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Headless asyncio simulators of the remote clients of the TCPServer plugins: a grabber answering the 'Send Data xD'
+requests of DAQ_xDViewer_TCPServer with synthetic frames and an actuator answering the moves requested by
+DAQ_Move_TCPServer.
+
+Each client records the latency of its answers and its throughput so that the TCP path can be load tested on a
+single machine, see :mod:`pymodaq_plugins_mock.benchmarks.tcp_load`. Many clients can be run concurrently by the
+same event loop, :class:`SimulatorThread` running them in a background thread (next to a Qt event loop for
+instance).
+"""
+import asyncio
+import socket
+import threading
+import time
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from pymodaq.utils.data import DataActuator, DataFromPlugins, DataToExport
+from pymodaq.utils.tcp_ip.serializer import DeSerializer, Serializer
+
+from pymodaq_plugins_mock.hardware.codecs import CODECS
+from pymodaq_plugins_mock.hardware.stats import LatencyHistogram, Throughput
+from pymodaq_plugins_mock.hardware.tcp_frames import frame_buffers
+
+
+class IncompleteMessage(Exception):
+    """Raised when more bytes have to be received to deserialize a message"""
+
+
+class StreamString:
+    """Mimic pymodaq's Socket for the DeSerializer, reading the bytes received so far
+
+    Raises IncompleteMessage instead of blocking if not enough bytes have been received yet.
+    """
+
+    def __init__(self, buffer: bytearray):
+        self._buffer = buffer
+        self.position = 0
+
+    def get_first_nbytes(self, length: int) -> bytes:
+        if self.position + length > len(self._buffer):
+            raise IncompleteMessage
+        data = bytes(self._buffer[self.position:self.position + length])
+        self.position += length
+        return data
+
+    check_received_length = get_first_nbytes
+
+
+class MessageReader:
+    """Deserialize pymodaq's serialized objects from an asyncio stream
+
+    The messages sent by the servers to their clients being small, a message is simply deserialized again from its
+    start each time more bytes are received.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader):
+        self._reader = reader
+        self._buffer = bytearray()
+
+    async def read(self, method: str = 'string_deserialization'):
+        """Deserialize the next object using the given method of the DeSerializer
+
+        Raises
+        ------
+        ConnectionError if the connection is closed
+        """
+        while True:
+            stream = StreamString(self._buffer)
+            try:
+                obj = getattr(DeSerializer(stream), method)()
+            except IncompleteMessage:
+                data = await self._reader.read(1 << 16)
+                if not data:
+                    raise ConnectionError('Connection closed by the server')
+                self._buffer += data
+                continue
+            del self._buffer[:stream.position]
+            return obj
+
+
+class SimulatedClient:
+    """Base class of the simulated clients
+
+    Parameters
+    ----------
+    host: str
+    port: int
+
+    Attributes
+    ----------
+    latency: LatencyHistogram
+        time from the reception of a request to the end of the sending of its answer
+    cycle: LatencyHistogram
+        time between two successive requests, the round trip as seen from the client
+    throughput: Throughput
+        answers sent and their size
+    """
+    client_type = ''
+
+    def __init__(self, host: str = 'localhost', port: int = 6341):
+        self.host = host
+        self.port = port
+        self.connected = False
+        self.latency = LatencyHistogram()
+        self.cycle = LatencyHistogram()
+        self.throughput = Throughput()
+        self._reader: MessageReader = None
+        self._writer: asyncio.StreamWriter = None
+        self._last_request: Optional[float] = None
+
+    async def connect(self, timeout: float = 5.):
+        """Connect to the server, retrying until timeout (the server may not be listening yet)"""
+        deadline = time.perf_counter() + timeout
+        while True:
+            try:
+                reader, self._writer = await asyncio.open_connection(self.host, self.port)
+                break
+            except OSError:
+                if time.perf_counter() > deadline:
+                    raise
+                await asyncio.sleep(0.05)
+        self._writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = MessageReader(reader)
+        self.connected = True
+        self.send(self.client_type)
+        await self.post_connect()
+        await self._writer.drain()
+        self.throughput.reset()
+
+    async def post_connect(self):
+        """Messages to be sent once connected"""
+
+    def send(self, *objects):
+        """Serialize objects and queue them for sending"""
+        self._writer.writelines([Serializer(obj).to_bytes() for obj in objects])
+
+    async def serve(self, stop: asyncio.Event):
+        """Answer the requests of the server until stop is set or the connection is lost, then close"""
+        stopping = asyncio.ensure_future(stop.wait())
+        try:
+            while not stop.is_set():
+                reading = asyncio.ensure_future(self._reader.read())
+                done, _ = await asyncio.wait({reading, stopping}, return_when=asyncio.FIRST_COMPLETED)
+                if reading not in done:
+                    reading.cancel()
+                    break
+                try:
+                    command = reading.result()
+                except ConnectionError:
+                    self.connected = False
+                    break
+                await self.handle(command)
+        finally:
+            stopping.cancel()
+            await self.close()
+
+    def request_received(self) -> float:
+        """Record the cycle time and return the time of the request"""
+        now = time.perf_counter()
+        if self._last_request is not None:
+            self.cycle.record(now - self._last_request)
+        self._last_request = now
+        return now
+
+    def answer_sent(self, since: float, nbytes: int = 0):
+        self.latency.record(time.perf_counter() - since)
+        self.throughput.record(nbytes)
+
+    async def handle(self, command: str):
+        """Process a command received from the server"""
+        if command == 'set_info':  # settings_client modified on the server side, not simulated
+            await self._reader.read('list_deserialization')
+            await self._reader.read('string_deserialization')
+
+    async def close(self):
+        """Close the connection, telling the server first as it does not cope with connections closed abruptly"""
+        if self._writer is None:
+            return
+        try:
+            if self.connected:
+                self.send('Quit')
+                await self._writer.drain()
+            self._writer.close()
+            await self._writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+        self.connected = False
+        self._writer = None
+
+    def summary(self) -> dict:
+        return dict(client=self.client_type, throughput=self.throughput.summary(),
+                    latency_ms=self.latency.summary(), cycle_ms=self.cycle.summary())
+
+
+class SimulatedGrabber(SimulatedClient):
+    """Remote grabber answering the 'Send Data xD' requests with synthetic frames
+
+    The frames (a gaussian spot and noise) are computed once, a small bank of them being sent in turn.
+
+    Parameters
+    ----------
+    host: str
+    port: int
+    shape: tuple of int
+        shape of the frames
+    dtype: str
+    rate: float
+        maximum number of frames per second, as a camera with a given frame rate (0 for no limit)
+    binary: bool
+        if True, frames are sent as binary frames, see :mod:`pymodaq_plugins_mock.hardware.tcp_frames`, otherwise
+        as serialized DataToExport
+    codecs: list of str, optional
+        the codecs supported by the grabber, the one to be used being chosen by the server
+    level: int
+        compression level, until the server chooses one with the codec
+    nbank: int
+        number of distinct frames
+    """
+    client_type = 'GRABBER'
+
+    def __init__(self, host: str = 'localhost', port: int = 6341, shape: Sequence[int] = (256, 256),
+                 dtype: str = 'uint16', rate: float = 0., binary: bool = True, codecs: Optional[List[str]] = None,
+                 level: int = 1, nbank: int = 4):
+        super().__init__(host, port)
+        self.rate = rate
+        self.binary = binary
+        self.codecs = [codec for codec in codecs if codec in CODECS] if codecs is not None else None
+        self.codec = 'none'
+        self.level = level
+        self.seq = 0
+        self.frames = self.make_frames(tuple(shape), np.dtype(dtype), nbank)
+        self._next_frame = 0.
+
+    @staticmethod
+    def make_frames(shape: tuple, dtype: np.dtype, nbank: int) -> List[np.ndarray]:
+        rng = np.random.default_rng(0)
+        grids = np.meshgrid(*[np.linspace(-1, 1, size) for size in shape], indexing='ij')
+        spot = np.exp(-sum(grid ** 2 for grid in grids) / 0.2)
+        full_scale = np.iinfo(dtype).max / 16 if dtype.kind in 'ui' else 1.
+        return [(full_scale * (spot + 0.05 * rng.random(shape))).astype(dtype) for _ in range(max(1, nbank))]
+
+    async def post_connect(self):
+        if self.binary:
+            self.send('Binary Frames')
+            if self.codecs is not None:
+                self.send('Codecs', self.codecs)
+
+    async def handle(self, command: str):
+        if command.startswith('Send Data'):
+            await self.grab()
+        elif command == 'Codec':
+            self.codec = await self._reader.read()
+            self.level = int(await self._reader.read('scalar_deserialization'))
+        else:
+            await super().handle(command)
+
+    async def grab(self):
+        requested = self.request_received()
+        if self.rate > 0:
+            delay = self._next_frame - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_frame = max(self._next_frame, requested) + 1 / self.rate
+        frame = self.frames[self.seq % len(self.frames)]
+        if self.binary:
+            if self.codec == 'none':
+                buffers = frame_buffers([frame], self.seq)
+            else:  # compression releases the GIL, keep the event loop responsive
+                buffers = await asyncio.get_running_loop().run_in_executor(
+                    None, frame_buffers, [frame], self.seq, None, self.codec, self.level)
+        else:
+            buffers = [Serializer(DataToExport('Simulated', data=[
+                DataFromPlugins('Simulated', data=[frame], seq=self.seq)])).to_bytes()]
+        self._writer.writelines([Serializer('Done').to_bytes()] + buffers)
+        await self._writer.drain()
+        self.answer_sent(requested, frame.nbytes)
+        self.seq += 1
+
+
+class SimulatedActuator(SimulatedClient):
+    """Remote actuator answering the moves of DAQ_Move_TCPServer
+
+    Parameters
+    ----------
+    host: str
+    port: int
+    velocity: float
+        in units per second, moves being instantaneous if 0
+    """
+    client_type = 'ACTUATOR'
+
+    def __init__(self, host: str = 'localhost', port: int = 6341, velocity: float = 0.):
+        super().__init__(host, port)
+        self.velocity = velocity
+        self._start = 0.
+        self._target = 0.
+        self._start_time = 0.
+        self._move: Optional[asyncio.Task] = None
+
+    @property
+    def position(self) -> float:
+        if self._move is None or self.velocity <= 0:
+            return self._target
+        travelled = self.velocity * (time.perf_counter() - self._start_time)
+        return self._start + np.sign(self._target - self._start) * min(travelled, abs(self._target - self._start))
+
+    async def handle(self, command: str):
+        if command in ('move_abs', 'move_rel'):
+            requested = self.request_received()
+            value = float((await self._reader.read('dwa_deserialization')).value())
+            self.start_move(value if command == 'move_abs' else self.position + value, requested)
+        elif command == 'move_home':
+            self.start_move(0., self.request_received())
+        elif command == 'get_actuator_value':
+            requested = self.request_received()
+            self.send('position_is', DataActuator(data=self.position))
+            await self._writer.drain()
+            self.answer_sent(requested)
+        elif command == 'stop_motion':
+            position = self.position
+            if self._move is not None:
+                self._move.cancel()
+            self._start = self._target = position
+            self.send('move_done', DataActuator(data=position))
+            await self._writer.drain()
+        else:
+            await super().handle(command)
+
+    def start_move(self, target: float, requested: float):
+        if self._move is not None:
+            self._move.cancel()
+        self._start = self.position
+        self._target = target
+        self._start_time = time.perf_counter()
+        self._move = asyncio.ensure_future(self._moving(requested))
+
+    async def _moving(self, requested: float):
+        if self.velocity > 0:
+            await asyncio.sleep(abs(self._target - self._start) / self.velocity)
+        self._move = None
+        self.send('move_done', DataActuator(data=self._target))
+        await self._writer.drain()
+        self.answer_sent(requested)
+
+
+async def run_clients(clients: Iterable[SimulatedClient], stop: asyncio.Event, timeout: float = 5.):
+    """Connect the clients then let them answer the requests of their servers until stop is set"""
+    clients = list(clients)
+    await asyncio.gather(*[client.connect(timeout) for client in clients])
+    await asyncio.gather(*[client.serve(stop) for client in clients])
+
+
+class SimulatorThread(threading.Thread):
+    """Run simulated clients in their own event loop, in a background thread
+
+    Parameters
+    ----------
+    clients: list of SimulatedClient
+    timeout: float
+        connection timeout in seconds
+    """
+
+    def __init__(self, clients: Iterable[SimulatedClient], timeout: float = 5.):
+        super().__init__(daemon=True)
+        self.clients = list(clients)
+        self.timeout = timeout
+        self.error: Optional[BaseException] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stop_event: Optional[asyncio.Event] = None
+        self._ready = threading.Event()
+
+    def run(self):
+        try:
+            asyncio.run(self._main())
+        except BaseException as e:
+            self.error = e
+        finally:
+            self._ready.set()
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        self._ready.set()
+        await run_clients(self.clients, self._stop_event, self.timeout)
+
+    def stop(self, timeout: float = 5.):
+        """Close the clients and wait for the thread to finish"""
+        self._ready.wait(timeout)
+        if self._loop is not None and not self._loop.is_closed():
+            try:
+                self._loop.call_soon_threadsafe(self._stop_event.set)
+            except RuntimeError:  # the loop already finished
+                pass
+        self.join(timeout)
+
+    @property
+    def connected(self) -> bool:
+        return all(client.connected for client in self.clients)
+
+    def summary(self) -> List[dict]:
+        return [client.summary() for client in self.clients]
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Binary framing of arrays over a TCP socket, a fast path for the TCPServer plugins.
+
+A message is a 4 bytes (big endian) count followed, for each array, by a fixed size header (dtype, shape,
+sequence number, timestamp, codec, number of bytes of the array and of the payload) and the payload. Without
+codec, the payload is the raw buffer of the array: arrays are then sent without any intermediate serialization
+(socket.sendmsg of the header and a memoryview of the array) and received using socket.recv_into directly into
+preallocated numpy arrays. Otherwise the payload is encoded as described in
+:mod:`pymodaq_plugins_mock.hardware.codecs`.
+"""
+import socket
+import struct
+import sys
+import time
+from concurrent.futures import Executor
+from typing import Dict, List, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+
+from pymodaq_plugins_mock.hardware.codecs import codec_id, decode, encode, payload_size
+
+MAGIC = b'PMDF'
+MAX_NDIM = 8
+COUNT = struct.Struct('!I')
+HEADER = struct.Struct(f'!4sBB2x8sQdQQ{MAX_NDIM}Q')
+IOV_MAX = 512
+
+
+class Frame(NamedTuple):
+    """A received array and its metadata
+
+    If payload is not None, the frame is encoded and array is only its preallocated destination, see
+    :func:`decode_frames`
+    """
+    array: np.ndarray
+    seq: int
+    timestamp: float
+    codec: int = 0
+    payload: Optional[bytearray] = None
+
+
+def raw_socket(sock) -> socket.socket:
+    """Get the built-in socket of a pymodaq Socket wrapper (or the socket itself)"""
+    return getattr(sock, 'socket', sock)
+
+
+def pack_header(array: np.ndarray, seq: int = 0, timestamp: float = 0., codec: int = 0,
+                payload_nbytes: Optional[int] = None) -> bytes:
+    """Get the header of an array
+
+    Parameters
+    ----------
+    array: ndarray
+    seq: int
+    timestamp: float
+    codec: int
+        id of the codec of the payload
+    payload_nbytes: int, optional
+        size of the payload, the size of the array if None
+
+    Raises
+    ------
+    ValueError if the array has too many dimensions or an object dtype
+    """
+    if array.ndim > MAX_NDIM:
+        raise ValueError(f'Cannot frame arrays with more than {MAX_NDIM} dimensions')
+    if array.dtype.hasobject:
+        raise ValueError('Cannot frame arrays of python objects')
+    shape = tuple(array.shape) + (0,) * (MAX_NDIM - array.ndim)
+    payload_nbytes = array.nbytes if payload_nbytes is None else payload_nbytes
+    return HEADER.pack(MAGIC, array.ndim, codec, array.dtype.str.encode(), seq, timestamp, array.nbytes,
+                       payload_nbytes, *shape)
+
+
+def unpack_header(header: Union[bytes, bytearray, memoryview]) -> tuple:
+    """Get the dtype, shape, sequence number, timestamp, codec, number of bytes of the array and of the payload
+    from a header
+
+    Raises
+    ------
+    ValueError if this is not a valid header
+    """
+    magic, ndim, codec, dtype, seq, timestamp, nbytes, payload_nbytes, *shape = HEADER.unpack(header)
+    if magic != MAGIC or ndim > MAX_NDIM:
+        raise ValueError('Invalid binary frame header')
+    return (np.dtype(dtype.rstrip(b'\x00').decode()), tuple(shape[:ndim]), seq, timestamp, codec_id(codec), nbytes,
+            payload_nbytes)
+
+
+def as_bytes(array: np.ndarray) -> memoryview:
+    """A flat byte memoryview on a C contiguous array, without copy"""
+    return memoryview(array.reshape(-1).view(np.uint8))
+
+
+def sendmsg_all(sock, buffers: Sequence[Union[bytes, memoryview]]):
+    """Send all the buffers, using scatter/gather socket.sendmsg if available (not on windows)"""
+    sock = raw_socket(sock)
+    if not hasattr(sock, 'sendmsg'):
+        for buffer in buffers:
+            sock.sendall(buffer)
+        return
+    views = [memoryview(buffer).cast('B') for buffer in buffers if len(buffer) > 0]
+    while views:
+        sent = sock.sendmsg(views[:IOV_MAX])
+        while views and sent >= len(views[0]):
+            sent -= len(views.pop(0))
+        if views and sent > 0:
+            views[0] = views[0][sent:]
+
+
+def recv_exactly_into(sock, buffer: memoryview):
+    """Fill the buffer with bytes received from the socket
+
+    Raises
+    ------
+    ConnectionError if the connection is closed before the buffer is filled
+    """
+    sock = raw_socket(sock)
+    view = memoryview(buffer).cast('B')
+    while len(view) > 0:
+        nbytes = sock.recv_into(view)
+        if nbytes == 0:
+            raise ConnectionError('Connection closed while receiving a binary frame')
+        view = view[nbytes:]
+
+
+def frame_buffers(arrays: Sequence[np.ndarray], seq: int = 0, timestamp: Optional[float] = None,
+                  codec: Union[str, int] = 0, level: int = 1,
+                  executor: Optional[Executor] = None) -> List[Union[bytes, memoryview]]:
+    """Get the buffers of the binary message of arrays, to be sent one after the other
+
+    See :func:`send_arrays` for the parameters
+    """
+    timestamp = time.time() if timestamp is None else timestamp
+    codec = codec_id(codec)
+    buffers = [COUNT.pack(len(arrays))]
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        payload = encode(array, codec, level, executor=executor)
+        buffers.append(pack_header(array, seq, timestamp, codec, payload_size(payload)))
+        buffers.extend(payload)
+    return buffers
+
+
+def send_arrays(sock, arrays: Sequence[np.ndarray], seq: int = 0, timestamp: Optional[float] = None,
+                codec: Union[str, int] = 0, level: int = 1, executor: Optional[Executor] = None):
+    """Send arrays as one binary message
+
+    Parameters
+    ----------
+    sock: socket.socket or pymodaq Socket
+    arrays: list of ndarray
+        non contiguous arrays are copied, the others are sent from their own memory if not encoded
+    seq: int
+        sequence number of the message
+    timestamp: float, optional
+        acquisition time of the arrays (as returned by time.time()), now if not given
+    codec: str or int
+        name or id of the codec, see :mod:`pymodaq_plugins_mock.hardware.codecs`
+    level: int
+        compression level
+    executor: concurrent.futures.Executor, optional
+        pool of threads compressing the blocks of the arrays
+    """
+    sendmsg_all(sock, frame_buffers(arrays, seq, timestamp, codec, level, executor))
+
+
+def decode_frames(frames: List[Frame], executor: Optional[Executor] = None) -> List[Frame]:
+    """Decode the encoded frames into their arrays
+
+    Returns
+    -------
+    list of Frame: the decoded frames
+    """
+    decoded = []
+    for frame in frames:
+        if frame.payload is not None:
+            decode(frame.payload, frame.codec, frame.array, executor)
+            frame = Frame(frame.array, frame.seq, frame.timestamp, frame.codec)
+        decoded.append(frame)
+    return decoded
+
+
+class FrameReceiver:
+    """Receive binary messages into preallocated arrays
+
+    For each array position in the message, up to nbuffers arrays are kept to be received into again, an array
+    being only reused once nothing else references it: a received array is never overwritten while its consumers
+    keep it (or a view of it), a new one being allocated instead.
+
+    Parameters
+    ----------
+    nbuffers: int
+        number of arrays kept per position
+    """
+
+    def __init__(self, nbuffers: int = 2):
+        self.nbuffers = max(1, int(nbuffers))
+        self._buffers: Dict[int, List[np.ndarray]] = dict()
+        self._count = bytearray(COUNT.size)
+        self._header = bytearray(HEADER.size)
+
+    def get_buffer(self, index: int, shape: tuple, dtype: np.dtype) -> np.ndarray:
+        """Get an array no longer referenced elsewhere, or a new one, for the given position in the message"""
+        buffers = self._buffers.setdefault(index, [])
+        for ind in range(len(buffers)):
+            # references: the list of buffers and the argument of getrefcount
+            if sys.getrefcount(buffers[ind]) <= 2:
+                if buffers[ind].shape == shape and buffers[ind].dtype == dtype:
+                    return buffers[ind]
+                del buffers[ind]
+                break
+        array = np.empty(shape, dtype=dtype)
+        if len(buffers) >= self.nbuffers:
+            del buffers[0]  # still used by its consumers, left to them
+        buffers.append(array)
+        return array
+
+    def receive(self, sock, decode: bool = True, executor: Optional[Executor] = None) -> List[Frame]:
+        """Receive one message
+
+        Parameters
+        ----------
+        sock: socket.socket or pymodaq Socket
+        decode: bool
+            if False, encoded frames are returned with their payload and should be decoded later on using
+            :func:`decode_frames`
+        executor: concurrent.futures.Executor, optional
+            pool of threads decompressing the blocks of the arrays
+
+        Raises
+        ------
+        ConnectionError if the connection is closed
+        ValueError if the message is not a valid binary message
+        """
+        recv_exactly_into(sock, self._count)
+        count, = COUNT.unpack(self._count)
+        frames = []
+        for index in range(count):
+            recv_exactly_into(sock, self._header)
+            dtype, shape, seq, timestamp, codec, nbytes, payload_nbytes = unpack_header(self._header)
+            array = self.get_buffer(index, shape, dtype)
+            if array.nbytes != nbytes:
+                raise ValueError('Inconsistent binary frame header')
+            if codec == 0:
+                recv_exactly_into(sock, as_bytes(array))
+                frames.append(Frame(array, seq, timestamp))
+            else:
+                payload = bytearray(payload_nbytes)
+                recv_exactly_into(sock, payload)
+                frames.append(Frame(array, seq, timestamp, codec, payload))
+        return decode_frames(frames, executor) if decode else frames
@@ -6,6 +6,9 @@ from time import perf_counter, sleep
 import math
 from numpy import random
 
+from pymodaq_plugins_mock.hardware.faults import FaultInjector
+from pymodaq_plugins_mock.hardware.sample import SimulatedSample, get_sample
+
 ports = ['COM1', 'COM2']
 
 
@@ -53,6 +56,13 @@ class ActuatorWrapper:
 
 
 class ActuatorWrapperWithTauMultiAxes(ActuatorWrapper):
+    """Multi axes actuator approaching its targets exponentially with the time constant tau
+
+    Its moves are published to a SimulatedSample (the default shared one if none is given), see
+    :mod:`pymodaq_plugins_mock.hardware.sample`. Its faults injector (disabled by default, see
+    :mod:`pymodaq_plugins_mock.hardware.faults`) delays its calls, makes them raise InjectedFault and slows some moves
+    down by multiplying their time constant.
+    """
 
     axes = ['X', 'Y', 'Theta', 'Power', 'Temp']
     _units = ['µm', 'mm', '°', 'mW', '°C']
@@ -60,9 +70,13 @@ class ActuatorWrapperWithTauMultiAxes(ActuatorWrapper):
     epsilons = [1, 0.0001, 1, 1, 0.1]  # the precision is therefore 1 µm, 1e-4 mm and 1° and 1 mW and 0.1 degree
     _tau = 0.5  # in s
 
-    def __init__(self):
+    def __init__(self, sample: SimulatedSample = None):
         super().__init__()
+        self.sample = get_sample() if sample is None else sample
         self._alpha = None
+        self._alphas = [0. for _ in self.axes]
+        self._slowdowns = [1. for _ in self.axes]
+        self.faults = FaultInjector()
         self._as_group = False
         self._grouped_axes = []
 
@@ -127,6 +141,8 @@ class ActuatorWrapperWithTauMultiAxes(ActuatorWrapper):
         ----------
         value: (float) the target value
         """
+        self.faults.delay()
+        self.faults.check('move')
         if self._as_group:
             self._grouped_axes_set[self._grouped_axes.index(axis)] = True
         self._moving[self._get_index_from_name(axis)] = False
@@ -139,37 +155,56 @@ class ActuatorWrapperWithTauMultiAxes(ActuatorWrapper):
                       self._target_values[self._get_index_from_name(axis)])))
         else:
             self._alpha = math.fabs(math.log(self.get_epsilon(axis) / 10))
+        self._alphas[self._get_index_from_name(axis)] = self._alpha
+        self._slowdowns[self._get_index_from_name(axis)] = self.faults.slowdown()
 
         if not self._as_group:
             self._start_times[self._get_index_from_name(axis)] = perf_counter()
             self._moving[self._get_index_from_name(axis)] = True
+            self._publish([axis])
         elif all(self._grouped_axes_set):
             start = perf_counter()
             for ind in range(len(self.axes)):
                 self._start_times[ind] = start
                 self._moving[ind] = True
                 self._grouped_axes_set[ind] = False
+            self._publish(self.axes)
+
+    def _publish(self, axes: list):
+        indexes = [self._get_index_from_name(axis) for axis in axes]
+        self.sample.publish(axes, [self._init_values[ind] for ind in indexes],
+                            [self._target_values[ind] for ind in indexes],
+                            [self._start_times[ind] for ind in indexes],
+                            [self._alphas[ind] / (self._tau * self._slowdowns[ind]) for ind in indexes])
 
     def stop(self, axis: str):
+        self._update_value(axis)  # where the axis actually is, not where it was last read
         self._moving[self._get_index_from_name(axis)] = False
+        self.sample.hold([axis], [self._current_values[self._get_index_from_name(axis)]])
 
-    def get_value(self, axis: str):
-        """
-        Get the current actuator value
-        Returns
-        -------
-        float: The current value
-        """
+    def _update_value(self, axis: str):
+        """Update the current value of a moving axis from its motion"""
         if self._moving[self._get_index_from_name(axis)]:
             curr_time = perf_counter()
             self._current_values[self._get_index_from_name(axis)] = \
-                math.exp(- self._alpha * (
+                math.exp(- self._alphas[self._get_index_from_name(axis)] * (
                         curr_time-self._start_times[self._get_index_from_name(axis)]
-                ) / self._tau) *\
+                ) / (self._tau * self._slowdowns[self._get_index_from_name(axis)])) *\
                 (self._init_values[self._get_index_from_name(axis)] -
                  self._target_values[self._get_index_from_name(axis)]) +\
                 self._target_values[self._get_index_from_name(axis)]
 
+    def get_value(self, axis: str):
+        """
+        Get the current actuator value
+        Returns
+        -------
+        float: The current value
+        """
+        self.faults.delay()
+        self.faults.check('read')
+        self._update_value(axis)
+
         self._current_values[self._get_index_from_name(axis)] += ((random.random() - 0.5) *
                                                                   self.get_epsilon(axis) / 10)
         # add some small random value to get fluctuations in positions
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Manifest of the instrument plugins of this package, to list them without importing them (and Qt, pyleco... with
+them).
+
+The manifest, resources/plugins_manifest.json, gives for each plugin type the entry point (module:class) of each
+plugin. It is generated from the sources, parsed but not imported, using::
+
+    python -m pymodaq_plugins_mock.manifest
+
+and rebuilt the same way, in memory, if the file is missing. The plugin packages import their modules only when
+accessed, see :func:`lazy_plugins`.
+"""
+import ast
+import importlib
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List
+
+PLUGIN_PACKAGES = {'daq_move': 'daq_move_plugins',
+                   'daq_0Dviewer': 'daq_viewer_plugins.plugins_0D',
+                   'daq_1Dviewer': 'daq_viewer_plugins.plugins_1D',
+                   'daq_2Dviewer': 'daq_viewer_plugins.plugins_2D',
+                   'daq_NDviewer': 'daq_viewer_plugins.plugins_ND'}
+
+MANIFEST_PATH = Path(__file__).parent.joinpath('resources/plugins_manifest.json')
+
+
+def plugin_class_name(plugin_type: str, name: str) -> str:
+    """Name of the class of a plugin, as expected by pymodaq: DAQ_Move_Mock, DAQ_2DViewer_Mock..."""
+    if plugin_type == 'daq_move':
+        return f'DAQ_Move_{name}'
+    return f'DAQ_{plugin_type[4:6]}Viewer_{name}'
+
+
+def scan() -> Dict[str, Dict[str, str]]:
+    """Build the manifest from the plugin modules, parsed but not imported
+
+    A module is a plugin if it defines a class named as expected by pymodaq.
+    """
+    manifest = {}
+    for plugin_type, package in PLUGIN_PACKAGES.items():
+        manifest[plugin_type] = {}
+        for path in sorted(Path(__file__).parent.joinpath(*package.split('.')).glob(f'{plugin_type}_*.py')):
+            name = path.stem[len(plugin_type) + 1:]
+            class_name = plugin_class_name(plugin_type, name)
+            if any(isinstance(node, ast.ClassDef) and node.name == class_name
+                   for node in ast.parse(path.read_text(encoding='utf-8')).body):
+                manifest[plugin_type][name] = f'{__package__}.{package}.{path.stem}:{class_name}'
+    return manifest
+
+
+def write_manifest(path: Path = MANIFEST_PATH):
+    with open(path, 'w') as f:
+        json.dump(scan(), f, indent=2)
+        f.write('\n')
+
+
+@lru_cache
+def load_manifest() -> Dict[str, Dict[str, str]]:
+    try:
+        with open(MANIFEST_PATH, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return scan()
+
+
+def get_plugins(plugin_type: str = 'daq_0Dviewer') -> List[dict]:
+    """List the plugins of a type, in the format of pymodaq.utils.daq_utils.get_plugins, without importing them"""
+    package = importlib.import_module(f'{__package__}.{PLUGIN_PACKAGES[plugin_type]}')
+    return [dict(name=name, module=package, parent_module=importlib.import_module(__package__), type=plugin_type)
+            for name in load_manifest()[plugin_type]]
+
+
+def load_plugin(plugin_type: str, name: str) -> type:
+    """Import the module of a plugin and get its class"""
+    module, class_name = load_manifest()[plugin_type][name].split(':')
+    return getattr(importlib.import_module(module), class_name)
+
+
+def lazy_plugins(package: str) -> Callable[[str], object]:
+    """Get the module __getattr__ of a plugin package, importing its plugin modules on first access"""
+    plugin_type = next(plugin_type for plugin_type, plugin_package in PLUGIN_PACKAGES.items()
+                       if package == f'{__package__}.{plugin_package}')
+    modules = [entry_point.split(':')[0].rsplit('.', 1)[1] for entry_point in load_manifest()[plugin_type].values()]
+
+    def __getattr__(name: str):
+        if name in modules:
+            return importlib.import_module(f'.{name}', package)
+        raise AttributeError(f'module {package!r} has no attribute {name!r}')
+
+    return __getattr__
+
+
+if __name__ == '__main__':
+    write_manifest()
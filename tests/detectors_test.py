@@ -5,10 +5,38 @@ Created the 14/07/2023
 @author: Sebastien Weber
 """
 
+import gc
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
 import pytest
 from importlib import metadata
+from qtpy import QtCore
+
+from pymodaq.utils.tcp_ip.mysocket import Socket
+from pymodaq.utils.tcp_ip.serializer import DeSerializer, Serializer
+
+from pymodaq.utils import daq_utils
+from pymodaq.utils.data import DataActuator, DataRaw, DataToExport
+from pymodaq.utils.parameter import Parameter, ioxml
 
-from pymodaq.utils.daq_utils import get_plugins
+from pymodaq_plugins_mock.daq_move_plugins.daq_move_TCPServer import DAQ_Move_TCPServer
+from pymodaq_plugins_mock.daq_viewer_plugins.plugins_2D.daq_2Dviewer_LECODirector import DAQ_2DViewer_LECODirector
+from pymodaq_plugins_mock.daq_viewer_plugins.plugins_2D.daq_2Dviewer_TCPServer import DAQ_2DViewer_TCPServer
+from pymodaq_plugins_mock.benchmarks import leco, startup, stress, throughput
+from pymodaq_plugins_mock.benchmarks.baseline import compare, load_baseline, save_baseline
+from pymodaq_plugins_mock.manifest import get_plugins, load_manifest, load_plugin, scan
+from pymodaq_plugins_mock.hardware.frame_stream import FrameSubscriber
+from pymodaq_plugins_mock.hardware.frame_tags import FrameChecker
+from pymodaq_plugins_mock.hardware.leco_actor import CoordinatorThread
+from pymodaq_plugins_mock.hardware.sample import AXES, get_sample
+from pymodaq_plugins_mock.hardware.shm_transport import SharedFramePublisher, SharedFrameReader
+from pymodaq_plugins_mock.hardware.tcp_clients import SimulatedActuator, SimulatedGrabber, SimulatorThread
+from pymodaq_plugins_mock.hardware.tcp_frames import send_arrays
 
 DET_TYPES = {'DAQ0D': get_plugins('daq_0Dviewer'),
              'DAQ1D': get_plugins('daq_1Dviewer'),
@@ -22,3 +50,849 @@ def test_mock_detectors():
     assert 'Mock' in [det['name'] for det in DET_TYPES['DAQ1D']]
     assert 'Mock' in [det['name'] for det in DET_TYPES['DAQ2D']]
     assert 'Mock' in [det['name'] for det in DET_TYPES['DAQND']]
+
+
+def test_mock_detectors_discovered_by_pymodaq():
+    for plugin_type, plugins in DET_TYPES.items():
+        discovered = daq_utils.get_plugins(f'daq_{plugin_type[3:]}viewer')
+        assert 'Mock' in [det['name'] for det in discovered]
+        assert ({det['name'] for det in discovered if det['parent_module'].__name__ == 'pymodaq_plugins_mock'}
+                == {det['name'] for det in plugins})
+
+
+def test_plugins_manifest():
+    assert load_manifest() == scan(), 'outdated manifest, run python -m pymodaq_plugins_mock.manifest'
+    assert load_plugin('daq_2Dviewer', 'TCPServer') is DAQ_2DViewer_TCPServer
+
+
+def test_plugins_listed_without_import():
+    script = ('import sys; from pymodaq_plugins_mock.manifest import get_plugins; '
+              'assert [plugin["name"] for plugin in get_plugins("daq_2Dviewer")]; '
+              'print(sorted(module for module in sys.modules if "daq_2Dviewer" in module or module == "pymodaq"))')
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == '[]'
+
+
+def test_startup_benchmark(tmp_path):
+    result = startup.import_time('pymodaq_plugins_mock.manifest', repeat=1)
+    assert result['import_ms'] > 0 and 0 < result['modules'] < 50
+    assert not any(name.startswith('pymodaq.') for name, _ in result['slowest'])
+    results = startup.metrics([result], [])
+    save_baseline(tmp_path.joinpath('startup.json'), results, tolerance=0.5, min_delta=10.)
+    baseline = load_baseline(tmp_path.joinpath('startup.json'))
+    assert compare({metric: value + 5 for metric, value in results.items()}, baseline) == []
+    regressions = compare({metric: 2 * value + 20 for metric, value in results.items()}, baseline)
+    assert [regression.metric for regression in regressions] == ['import:pymodaq_plugins_mock.manifest']
+
+
+def test_throughput_harness(qtbot):
+    results = [throughput.run_viewer('2D', 16, 1, 'uint16', frames=2),
+               throughput.run_viewer('1D', 32, 2, frames=3),
+               throughput.run_actuator(tau_ms=1, moves=2)]
+    assert results[0]['dtype'] == 'uint16' and results[1]['dtype'] == 'float64'
+    assert all(result['frames_per_s'] > 0 and result['latency_ms']['p50'] > 0 for result in results)
+    assert results[0]['MB_per_s'] == pytest.approx(results[0]['frames_per_s'] * 16 * 16 * 2 / 1e6)
+    assert '2D/16/1/uint16:p99_ms' in throughput.metrics(results)
+
+
+def test_stress_orchestrator(qtbot):
+    settings = stress.parse_settings(['exposure=0', 'faults.inject=true', 'faults.drop_probability=0.2'])
+    assert settings == ((('exposure',), 0), (('faults', 'inject'), True), (('faults', 'drop_probability'), 0.2))
+    specs = stress.make_specs(2, 1, ['0D', '2D'], size=32, settings=settings, tau_ms=1)
+    assert [(spec.name, spec.kind) for spec in specs] == [('det00_0D', '0D'), ('det01_2D', '2D'), ('act00', 'move')]
+    result = stress.run(specs, 0.3, consumer_ms=0.1)
+    assert (result['detectors'], result['actuators'], result['errors']) == (2, 1, 0)
+    detectors, actuator = result['instruments'][:2], result['instruments'][2]
+    for detector in detectors:
+        # the dropped frames are replaced by the next ones, leaving gaps in the sequence numbers
+        assert detector['events'] > 0 and detector['received'] == detector['emitted'] == detector['events']
+        assert detector['dropped'] > 0
+        assert 0 < detector['latency_ms']['p50'] <= detector['latency_ms']['p99'] <= result['latency_p99_ms']
+    assert detectors[1]['MB_per_s'] == pytest.approx(detectors[1]['emitted'] * 32 * 32 * 8 / 0.3 / 1e6, rel=0.2)
+    assert actuator['events'] > 0 and actuator['cpu_s'] > 0 and 'received' not in actuator
+    assert result['grabs_per_s'] == pytest.approx(sum(detector['per_s'] for detector in detectors))
+    assert stress.scaling([result, dict(result, detectors=4)]) == [1., 0.5]
+
+    result = stress.run(stress.make_specs(1, dims=['1D']), 0.2, mode='processes')
+    instrument = result['instruments'][0]
+    assert result['errors'] == 0 and instrument['received'] == instrument['events'] > 0
+    assert instrument['rss_MB'] == result['rss_MB'] > 0
+
+
+@pytest.mark.parametrize('dim, phases', [('0D', {'roll', 'average'}),
+                                         ('1D', {'model', 'noise', 'roll', 'average'}),
+                                         ('2D', {'model', 'noise', 'modulation', 'roll', 'exposure', 'average',
+                                                 'publish'}),
+                                         ('ND', {'model', 'exposure'})])
+def test_mock_viewers_instrumentation(qtbot, dim, phases):
+    plugin = load_plugin(f'daq_{dim}viewer', 'Mock')()
+    try:
+        plugin.ini_detector()
+        throughput.configure(plugin, dim, 16, nd_nt=4)
+        plugin.settings.child('instrumentation', 'instrumented').setValue(True)
+        plugin.commit_settings(plugin.settings.child('instrumentation', 'instrumented'))
+        for _ in range(3):
+            plugin.grab_data()
+    finally:
+        plugin.close()
+    summary = plugin.timer.stats.summary()
+    assert phases | {'export', 'emit', 'total'} <= set(summary)
+    assert summary['total']['count'] == 3
+    assert summary['total']['p50'] >= summary['emit']['p50']
+
+
+@pytest.mark.parametrize('plugin_type, name', [('daq_0Dviewer', 'Mock'), ('daq_1Dviewer', 'Mock'),
+                                               ('daq_2Dviewer', 'Mock'), ('daq_NDviewer', 'Mock'),
+                                               ('daq_NDviewer', 'MockGeneric')])
+def test_mock_viewers_tag_frames(qtbot, plugin_type, name):
+    plugin = load_plugin(plugin_type, name)()
+    checker = FrameChecker()
+    try:
+        plugin.ini_detector()
+        plugin.dte_signal.connect(checker, QtCore.Qt.DirectConnection)
+        for _ in range(3):
+            plugin.grab_data()
+    finally:
+        plugin.close()
+    summary = checker.summary()
+    assert (summary['received'], summary['dropped'], summary['reordered'], checker.last_seq) == (3, 0, 0, 2)
+    assert 0 < summary['transit_ms']['max'] <= summary['latency_ms']['max']
+
+
+@pytest.mark.parametrize('plugin_type', ['daq_0Dviewer', 'daq_1Dviewer', 'daq_2Dviewer', 'daq_NDviewer'])
+def test_mock_viewers_inject_faults(qtbot, plugin_type):
+    def grab(plugin, ngrabs: int = 20):
+        checker = FrameChecker()
+        statuses = []
+        plugin.dte_signal.connect(checker, QtCore.Qt.DirectConnection)
+        plugin.emit_status = statuses.append
+        plugin.settings.child('faults', 'inject').setValue(True)
+        plugin.commit_settings(plugin.settings.child('faults', 'inject'))
+        for _ in range(ngrabs):
+            plugin.grab_data()
+        plugin.dte_signal.disconnect(checker)
+        return checker, statuses
+
+    plugin = load_plugin(plugin_type, 'Mock')()
+    try:
+        plugin.ini_detector()
+        if plugin_type == 'daq_2Dviewer':
+            plugin.settings.child('exposure').setValue(0)
+            plugin.commit_settings(plugin.settings.child('exposure'))
+        for name, value in [('seed', 7), ('distribution', 'fixed'), ('latency', 2.), ('drop_probability', 0.3),
+                            ('error_probability', 0.1)]:
+            plugin.settings.child('faults', name).setValue(value)
+        start = time.perf_counter()
+        checker, statuses = grab(plugin)
+        assert time.perf_counter() - start >= 20 * 0.002
+        counts = dict(plugin.faults.counts)
+        summary = checker.summary()
+        # every grab emits, the dropped or failed frames being replaced by the next ones
+        assert summary['received'] == 20 and 0 < summary['dropped'] <= counts['dropped'] + counts['errors']
+        assert checker.last_seq == 19 + counts['dropped'] + counts['errors']
+        assert [status.attribute[0] for status in statuses if status.command == 'Update_Status'] == \
+               ['Injected error during grab'] * counts['errors']
+        plugin.tagger.reset()
+        assert grab(plugin)[0].summary()['received'] == summary['received'] and plugin.faults.counts == counts
+    finally:
+        plugin.close()
+
+
+def test_mock_2d_shared_memory_publisher(qtbot):
+    plugin = load_plugin('daq_2Dviewer', 'Mock')()
+    captured = []
+    try:
+        plugin.ini_detector()
+        for path, value in ((('exposure',), 0), (('shm_publisher', 'publish'), True), (('faults', 'inject'), True),
+                            (('faults', 'seed'), 3), (('faults', 'drop_probability'), 0.5)):
+            plugin.settings.child(*path).setValue(value)
+            plugin.commit_settings(plugin.settings.child(*path))
+        plugin.dte_signal.connect(captured.append, QtCore.Qt.DirectConnection)
+        for _ in range(10):
+            plugin.grab_data()
+        assert plugin.faults.counts['dropped'] > 0
+        reader = SharedFrameReader(plugin.publisher.name)
+        descriptor, frame = reader.read()
+        assert descriptor.seq == len(captured) - 1  # the dropped frames not published
+        assert descriptor.timestamp == captured[-1][0].acquisition_ns * 1e-9
+        assert np.array_equal(frame, captured[-1][0][0])
+        reader.close()
+
+        other = SharedFramePublisher()
+        other.publish(np.zeros((2,)))
+        plugin.settings.child('shm_publisher', 'ring_name').setValue(other.name)
+        plugin.commit_settings(plugin.settings.child('shm_publisher', 'ring_name'))
+        plugin.grab_data()
+        assert plugin.publisher is None and not plugin.settings['shm_publisher', 'publish']
+        other.close()
+    finally:
+        plugin.close()
+
+
+def test_mock_settings_snapshot(qtbot):
+    plugin = load_plugin('daq_2Dviewer', 'Mock')()
+    captured = []
+    try:
+        plugin.ini_detector()
+        plugin.dte_signal.connect(captured.append, QtCore.Qt.DirectConnection)
+        plugin.settings.child('Nx').setValue(16)
+        plugin.grab_data()
+        assert plugin.snapshot.Nx == 100 and captured[-1][0].shape == (200, 100)
+        plugin.commit_settings(plugin.settings.child('Nx'))
+        plugin.grab_data()
+        assert plugin.snapshot.Nx == 16 and captured[-1][0].shape == (200, 16)
+    finally:
+        plugin.close()
+
+
+@pytest.mark.parametrize('dim, nx', [('2D', ('Nx',)), ('ND', ('spatial_settings', 'Nx'))])
+def test_mock_axes_sent_on_change(qtbot, dim, nx):
+    plugin = load_plugin(f'daq_{dim}viewer', 'Mock')()
+    captured = []
+    try:
+        plugin.ini_detector()
+        throughput.configure(plugin, dim, 16, nd_nt=4)
+        plugin.dte_signal.connect(captured.append, QtCore.Qt.DirectConnection)
+        plugin.grab_data()
+        plugin.grab_data()
+        plugin.settings.child(*nx).setValue(8)
+        plugin.commit_settings(plugin.settings.child(*nx))
+        plugin.grab_data()
+    finally:
+        plugin.close()
+    first, second, third = (dte[0] for dte in captured)
+    assert len(first.axes) == len(third.axes) == len(first.shape) and second.axes == []
+    assert first.get_axis_from_index(1)[0].size == 16 and third.get_axis_from_index(1)[0].size == 8
+
+
+def test_mock_nd_memmap_frames_kept(qtbot, tmp_path):
+    plugin = load_plugin('daq_NDviewer', 'Mock')()
+    captured = []
+    try:
+        plugin.settings.child('memory_settings', 'memmap_folder').setValue(str(tmp_path))
+        plugin.settings.child('memory_settings', 'use_memmap').setValue(True)
+        plugin.ini_detector()
+        plugin.commit_settings(plugin.settings.child('memory_settings', 'memmap_folder'))
+        throughput.configure(plugin, 'ND', 8, nd_nt=4)
+        plugin.dte_signal.connect(captured.append, QtCore.Qt.DirectConnection)
+        plugin.grab_data()
+        first = np.array(captured[0][0][0])
+        plugin.grab_data()
+        assert isinstance(captured[1][0][0], np.memmap) and captured[1][0][0] is not captured[0][0][0]
+        assert np.array_equal(captured[0][0][0], first)  # not overwritten by the second grab
+        captured.clear()
+        gc.collect()  # the data objects are in reference cycles
+        plugin.grab_data()
+        assert len(list(tmp_path.iterdir())) == 2  # the first file released and reused
+    finally:
+        plugin.close()
+    assert len(list(tmp_path.iterdir())) == 0
+
+
+@pytest.mark.parametrize('name', ('Mock', 'MockGeneric'))
+def test_mock_nd_prefetched_frames_kept(qtbot, name):
+    plugin = load_plugin('daq_NDviewer', name)()
+    captured = []
+    try:
+        plugin.ini_detector()
+        plugin.settings.child('prefetch', 'use_prefetch').setValue(True)
+        plugin.commit_settings(plugin.settings.child('prefetch', 'use_prefetch'))
+        assert plugin.prefetcher.is_running
+        plugin.dte_signal.connect(captured.append, QtCore.Qt.DirectConnection)
+        plugin.grab_data()
+        first = np.array(captured[0][0][0])
+        for _ in range(4):
+            plugin.grab_data()
+        amp = plugin.settings.child(*(('amp',) if name == 'MockGeneric' else ('spatial_settings', 'amp')))
+        amp.setValue(2 * amp.value())
+        plugin.commit_settings(amp)
+        plugin.grab_data()
+    finally:
+        plugin.close()
+    assert np.array_equal(captured[0][0][0], first)  # not given back to the generator by the prefetcher
+    assert len({id(dte[0][0]) for dte in captured}) == len(captured)
+
+
+@pytest.mark.parametrize('Nnav, Nsig, shape', [(1, 1, (10, 64)), (0, 2, (64, 32)), (4, 1, (10, 20, 5, 10, 64)),
+                                                (0, 0, (64,))])
+def test_mock_generic_axes_count(qtbot, Nnav, Nsig, shape):
+    plugin = load_plugin('daq_NDviewer', 'MockGeneric')()
+    captured = []
+    try:
+        plugin.ini_detector()
+        for name, value in (('Nnav', Nnav), ('Nsig', Nsig)):
+            plugin.settings.child(name).setValue(value)
+            plugin.commit_settings(plugin.settings.child(name))
+        plugin.dte_signal.connect(captured.append, QtCore.Qt.DirectConnection)
+        plugin.grab_data()
+    finally:
+        plugin.close()
+    dwa = captured[0][0]
+    assert dwa.shape == shape and len(dwa.axes) == len(shape)
+    assert dwa.nav_indexes == tuple(range(Nnav)) and len(plugin.settings.child('sig_axes').children()) == max(Nsig, 1)
+
+
+@pytest.mark.parametrize('dim, use_pool', [('1D', False), ('2D', False), ('2D', True)])
+def test_mock_noise_bank(qtbot, dim, use_pool):
+    plugin = load_plugin(f'daq_{dim}viewer', 'Mock')()
+    captured = []
+    try:
+        plugin.ini_detector()
+        throughput.configure(plugin, dim, 16)
+        if dim == '2D':
+            for path, value in ((('exposure',), 0), (('parallel', 'nworkers'), 2), (('parallel', 'use_pool'), use_pool)):
+                plugin.settings.child(*path).setValue(value)
+                plugin.commit_settings(plugin.settings.child(*path))
+        plugin.settings.child('noise_bank', 'use_bank').setValue(True)
+        plugin.commit_settings(plugin.settings.child('noise_bank', 'use_bank'))
+        plugin.dte_signal.connect(captured.append, QtCore.Qt.DirectConnection)
+        for _ in range(3):
+            plugin.grab_data()
+        if dim == '2D':
+            assert plugin.synthesizer.is_running == use_pool
+    finally:
+        plugin.close()
+    assert plugin.noise_bank.is_ready and len(captured) == 3
+    assert not np.allclose(captured[0][0][0], captured[1][0][0])
+
+
+@pytest.mark.parametrize('dim, frame_shape, nchannels', [('0D', (2,), 2), ('1D', (16,), 1), ('2D', (2, 8, 4), 2),
+                                                        ('ND', (3, 8, 4), 1)])
+def test_replay_viewers(qtbot, tmp_path, dim, frame_shape, nchannels):
+    frames = np.random.default_rng(0).random((4,) + frame_shape)
+    np.save(tmp_path.joinpath('frames.npy'), frames)
+    plugin = load_plugin(f'daq_{dim}viewer', 'Replay')()
+    captured = []
+    try:
+        assert plugin.ini_detector()[1] is False
+        plugin.settings.child('replay', 'path').setValue(str(tmp_path.joinpath('frames.npy')))
+        plugin.settings.child('replay', 'period').setValue(10.)
+        assert plugin.ini_detector() == (f'4 frames of shape {frame_shape}', True)
+        plugin.dte_signal.connect(captured.append, QtCore.Qt.DirectConnection)
+        start = time.perf_counter()
+        for _ in range(6):
+            plugin.grab_data()
+        elapsed = time.perf_counter() - start
+    finally:
+        plugin.close()
+    assert [dte[0].replay_index for dte in captured] == [0, 1, 2, 3, 0, 1] and elapsed >= 0.04
+    assert len(captured[-1][0]) == nchannels
+    for dte in captured:  # the frames read ahead are not overwritten once emitted
+        assert np.allclose(np.squeeze(np.array(dte[0].data)), frames[dte[0].replay_index])
+
+
+def test_replay_naverage_change(qtbot, tmp_path):
+    frames = np.random.default_rng(0).random((8, 4))
+    np.save(tmp_path.joinpath('frames.npy'), frames)
+    plugin = load_plugin('daq_1Dviewer', 'Replay')()
+    captured = []
+    try:
+        plugin.settings.child('replay', 'path').setValue(str(tmp_path.joinpath('frames.npy')))
+        for name, value in (('pacing', 'fastest'), ('readahead', 3)):
+            plugin.settings.child('replay', name).setValue(value)
+        plugin.ini_detector()
+        assert plugin.prefetcher.is_running
+        plugin.dte_signal.connect(captured.append, QtCore.Qt.DirectConnection)
+        for Naverage in (1, 1, 2, 2, 1, 1):
+            qtbot.wait(20)  # let the frames be read in advance
+            plugin.grab_data(Naverage)
+    finally:
+        plugin.close()
+    # the frames read in advance with the previous Naverage are read again, none is skipped
+    assert [dte[0].replay_index for dte in captured] == [0, 1, 3, 5, 6, 7]
+    assert np.allclose(captured[2][0][0], frames[2:4].mean(axis=0))
+    assert np.allclose(captured[4][0][0], frames[6])
+
+
+def test_replay_end_of_file(qtbot, tmp_path):
+    np.save(tmp_path.joinpath('frames.npy'), np.zeros((3, 4)))
+    plugin = load_plugin('daq_1Dviewer', 'Replay')()
+    captured = []
+    try:
+        plugin.settings.child('replay', 'path').setValue(str(tmp_path.joinpath('frames.npy')))
+        for name, value in (('pacing', 'fastest'), ('loop', False), ('readahead', 0)):
+            plugin.settings.child('replay', name).setValue(value)
+            plugin.commit_settings(plugin.settings.child('replay', name))
+        plugin.ini_detector()
+        assert not plugin.prefetcher.is_running
+        plugin.dte_signal.connect(captured.append, QtCore.Qt.DirectConnection)
+        statuses = []
+        plugin.emit_status = statuses.append
+        for _ in range(5):
+            plugin.grab_data()
+        assert len(captured) == 3 and plugin.finished
+        # each grab past the end stops the grab of the viewer instead of leaving it waiting for data
+        assert [status.command for status in statuses].count('stop') == 2
+        plugin.commit_settings(plugin.settings.child('replay', 'path'))
+        plugin.grab_data()
+        assert len(captured) == 4 and captured[-1][0].replay_index == 0
+    finally:
+        plugin.close()
+
+
+@pytest.mark.parametrize('layout, histogram, shape', [('channels', 'xy', (4,)), ('pixels', 'xy', (256, 256)),
+                                                     ('channels', 'time', (100,))])
+def test_events_viewer(qtbot, layout, histogram, shape):
+    plugin = load_plugin('daq_1Dviewer', 'Events')()
+    captured = []
+    try:
+        for path, value in ((('events', 'layout'), layout), (('histogram',), histogram), (('events', 'rate'), 1e6)):
+            plugin.settings.child(*path).setValue(value)
+        plugin.ini_detector()
+        plugin.dte_signal.connect(captured.append, QtCore.Qt.DirectConnection)
+        for _ in range(3):
+            plugin.grab_data()
+    finally:
+        plugin.close()
+    rate, events, counts = captured[-1]
+    assert rate.end_ns - rate.start_ns >= 10_000_000 and rate[0][0] == pytest.approx(1e6, rel=0.2)
+    assert events.labels == ['timestamp', 'x', 'y', 'value'] and events.size == int(counts[0].sum()) > 0
+    assert counts.shape == shape
+    assert np.all(np.diff(events[0]) >= 0) and events[0][0] >= rate.start_ns == captured[-2][0].end_ns
+    assert events.nevents == events.size
+
+
+@pytest.mark.parametrize('rate', (0., 50.))
+def test_events_viewer_sparse_batches(qtbot, rate):
+    plugin = load_plugin('daq_1Dviewer', 'Events')()
+    captured = []
+    try:
+        plugin.settings.child('events', 'rate').setValue(rate)  # at most a few events per batch
+        plugin.ini_detector()
+        plugin.dte_signal.connect(captured.append, QtCore.Qt.DirectConnection)
+        for _ in range(10):
+            plugin.grab_data()
+    finally:
+        plugin.close()
+    for batch_rate, events in captured:
+        assert events.dim.name == 'Data1D' and events.size == max(events.nevents, 2)
+        assert events.nevents == round(batch_rate[0][0] * (batch_rate.end_ns - batch_rate.start_ns) * 1e-9)
+        assert np.all(events[3][events.nevents:] == 0) and np.all(np.diff(events[0]) >= 0)
+    assert any(events.nevents < 2 for _, events in captured)
+
+
+def test_mock_actuator_instrumentation(qtbot):
+    plugin = load_plugin('daq_move', 'Mock')()
+    try:
+        plugin.settings.child('instrumentation', 'instrumented').setValue(True)
+        plugin.ini_stage()
+        plugin.move_abs(DataActuator(data=10.))
+        plugin.get_actuator_value()
+    finally:
+        plugin.close()
+    assert set(plugin.timer.stats.phases) == {'scaling', 'move', 'read', 'export'}
+
+
+def test_mock_actuator_inject_faults(qtbot):
+    plugin = load_plugin('daq_move', 'Mock')()
+    statuses = []
+    try:
+        plugin.ini_stage()
+        plugin.emit_status = statuses.append
+        plugin.move_abs(DataActuator(data=10.))
+        plugin.settings.child('faults', 'error_probability').setValue(1.)
+        plugin.settings.child('faults', 'inject').setValue(True)
+        plugin.commit_settings(plugin.settings.child('faults', 'inject'))
+        assert plugin.get_actuator_value() is plugin.current_value
+        plugin.move_abs(DataActuator(data=20.))
+    finally:
+        plugin.close()
+    assert plugin.controller._target_values[0] == 10.
+    assert [status.attribute[0] for status in statuses if status.command == 'Update_Status'] == \
+           ['Injected error during read', 'Injected error during move']
+
+
+def test_mock_viewers_coupled_to_actuator(qtbot):
+    get_sample().hold(AXES, [0.] * len(AXES))
+    actuator = load_plugin('daq_move', 'Mock')()
+    viewers = {dim: load_plugin(f'daq_{dim}viewer', 'Mock')() for dim in ('0D', '2D')}
+    captured = {dim: [] for dim in viewers}
+    try:
+        actuator.settings.child('tau').setValue(1)
+        actuator.ini_stage()
+        actuator.commit_settings(actuator.settings.child('tau'))
+        for dim, viewer in viewers.items():
+            viewer.settings.child('coupling', 'coupled').setValue(True)
+            viewer.ini_detector()
+            if dim == '2D':
+                viewer.settings.child('exposure').setValue(0)
+                viewer.commit_settings(viewer.settings.child('exposure'))
+            viewer.dte_signal.connect(captured[dim].append, QtCore.Qt.DirectConnection)
+            viewer.grab_data()
+        actuator.move_abs(DataActuator(data=30.))
+        time.sleep(0.02)
+        for viewer in viewers.values():
+            viewer.grab_data()
+    finally:
+        actuator.close()
+        for viewer in viewers.values():
+            viewer.close()
+        get_sample().hold(AXES, [0.] * len(AXES))
+    uncoupled = [np.roll(viewers['0D'].data_mock[0], ind)[0] for ind in range(2)]
+    assert captured['0D'][0][0][0][0] == pytest.approx(uncoupled[0])
+    assert captured['0D'][1][0][0][0] == pytest.approx(uncoupled[1] * 0.5 ** (4 * 30 ** 2 / 20 ** 2), rel=0.05)
+    assert np.argmax(np.max(viewers['2D']._model, axis=0)) == 50 + 30  # the gaussian before modulation and roll
+    assert not np.allclose(captured['2D'][0][0][0], captured['2D'][1][0][0])
+
+
+def test_mock_2d_coupled_pool_and_prefetch(qtbot):
+    get_sample().hold(AXES, [0.] * len(AXES))
+    plugin = load_plugin('daq_2Dviewer', 'Mock')()
+    viewer_0d = load_plugin('daq_0Dviewer', 'Mock')()
+    captured = []
+    try:
+        for viewer in (plugin, viewer_0d):
+            viewer.settings.child('coupling', 'coupled').setValue(True)
+            viewer.settings.child('prefetch', 'use_prefetch').setValue(True)
+            viewer.ini_detector()
+        for path, value in ((('exposure',), 0), (('rolling',), 0), (('amp_noise',), 0.), (('threshold',), 0),
+                            (('parallel', 'nworkers'), 2), (('parallel', 'use_pool'), True)):
+            plugin.settings.child(*path).setValue(value)
+            plugin.commit_settings(plugin.settings.child(*path))
+        assert plugin.synthesizer.is_running
+        assert not plugin.prefetcher.is_running and not viewer_0d.prefetcher.is_running
+        plugin.dte_signal.connect(captured.append, QtCore.Qt.DirectConnection)
+        plugin.grab_data()
+        get_sample().hold(['X'], [30.])
+        plugin.grab_data()
+        plugin.settings.child('parallel', 'use_pool').setValue(False)
+        plugin.commit_settings(plugin.settings.child('parallel', 'use_pool'))
+        plugin.grab_data()
+        plugin.settings.child('coupling', 'coupled').setValue(False)
+        plugin.commit_settings(plugin.settings.child('coupling', 'coupled'))
+        assert plugin.prefetcher.is_running
+    finally:
+        plugin.close()
+        viewer_0d.close()
+        get_sample().hold(AXES, [0.] * len(AXES))
+    assert len(captured) == 3
+    assert not np.allclose(captured[0][0][0], captured[1][0][0])
+    assert captured[1][0][0] == pytest.approx(captured[2][0][0], rel=1e-6, abs=1e-9)
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        return sock.getsockname()[1]
+
+
+def binary_grabber(port: int, image: np.ndarray, ngrabs: int, codecs=None, done: threading.Event = None):
+    """A minimal remote grabber answering the grab requests with binary frames, possibly compressed
+
+    The connection is kept open until done is set, as the server does not cope with closed connections while
+    reading messages
+    """
+    client = Socket(socket.create_connection(('localhost', port)))
+    client.check_sended_with_serializer('GRABBER')
+    client.check_sended_with_serializer('Binary Frames')
+    codec = 'none'
+    if codecs is not None:
+        client.check_sended_with_serializer('Codecs')
+        client.check_sended_with_serializer(codecs)
+        assert DeSerializer(client).string_deserialization() == 'Codec'
+        codec = DeSerializer(client).string_deserialization()
+        level = int(DeSerializer(client).scalar_deserialization())
+    for seq in range(ngrabs):
+        assert DeSerializer(client).string_deserialization() == 'Send Data 2D'
+        client.check_sended_with_serializer('Done')
+        send_arrays(client, [image + seq], seq=seq, codec=codec, level=level if codecs is not None else 1)
+    if done is not None:
+        done.wait(10)
+    client.close()
+    return codec
+
+
+@pytest.mark.parametrize('codecs', (None, ['zlib', 'shuffle_zlib']))
+def test_tcp_server_binary_frames(qtbot, codecs):
+    port = get_free_port()
+    image = np.arange(20 * 30, dtype=np.uint16).reshape((20, 30))
+    server = DAQ_2DViewer_TCPServer()
+    server.settings.child('socket_ip').setValue('localhost')
+    server.settings.child('port_id').setValue(port)
+    server.settings.child('codec_settings', 'codec').setValue('shuffle_zlib')
+    server.ini_detector()
+    received = []
+    server.dte_signal.connect(received.append)
+    done = threading.Event()
+    grabber = threading.Thread(target=binary_grabber, args=(port, image, 4, codecs, done))
+    grabber.start()
+    try:
+        qtbot.waitUntil(lambda: len(server._binary_sockets) == 1, timeout=5000)
+        if codecs is not None:
+            qtbot.waitUntil(lambda: len(server._client_codecs) == 1, timeout=5000)
+        for seq in range(4):
+            server.grab_data()
+            qtbot.waitUntil(lambda: len(received) == seq + 1, timeout=5000)
+            data = received[-1][0]
+            assert data.dim.name == 'Data2D'
+            assert data.seq == seq
+            assert np.all(data[0] == image + seq)
+        for seq, dte in enumerate(received):  # the received arrays kept are not overwritten by the next frames
+            assert np.all(dte[0][0] == image + seq)
+    finally:
+        server.close()
+        done.set()
+        grabber.join(5)
+
+
+def test_tcp_server_codec_settings(qtbot):
+    port = get_free_port()
+    server = DAQ_2DViewer_TCPServer()
+    server.settings.child('socket_ip').setValue('localhost')
+    server.settings.child('port_id').setValue(port)
+    server.ini_detector()
+    received = []
+    server.dte_signal.connect(received.append)
+    grabber = SimulatedGrabber('localhost', port, shape=(32, 48), codecs=['zlib', 'shuffle_zlib'])
+    simulator = SimulatorThread([grabber])
+    simulator.start()
+    try:
+        qtbot.waitUntil(lambda: len(server._client_codecs) == 1, timeout=5000)
+        for name, value in (('codec', 'shuffle_zlib'), ('level', 6)):
+            server.settings.child('codec_settings', name).setValue(value)
+            server.commit_settings(server.settings.child('codec_settings', name))
+        qtbot.waitUntil(lambda: (grabber.codec, grabber.level) == ('shuffle_zlib', 6), timeout=5000)
+        sent = []
+        server.send_codec = sent.append
+        server.settings.child('codec_settings', 'nworkers').setValue(2)
+        server.commit_settings(server.settings.child('codec_settings', 'nworkers'))
+        assert sent == []  # the codec is decoded by the server whatever its number of workers
+        server.grab_data()
+        # decoded in the decoder thread, emitted from the thread of the plugin
+        qtbot.waitUntil(lambda: len(received) == 1, timeout=5000)
+        assert np.array_equal(received[0][0][0], grabber.frames[0])
+        assert server._codec_pool._max_workers == 2
+    finally:
+        simulator.stop()
+        server.close()
+    assert simulator.error is None
+
+
+@pytest.mark.parametrize('binary', (True, False))
+def test_simulated_grabber(qtbot, binary):
+    port = get_free_port()
+    server = DAQ_2DViewer_TCPServer()
+    server.settings.child('socket_ip').setValue('localhost')
+    server.settings.child('port_id').setValue(port)
+    server.ini_detector()
+    received = []
+    server.dte_signal.connect(received.append)
+    grabber = SimulatedGrabber('localhost', port, shape=(32, 48), binary=binary)
+    simulator = SimulatorThread([grabber])
+    simulator.start()
+    try:
+        qtbot.waitUntil(lambda: len(server.connected_clients) == 2, timeout=5000)
+        if binary:
+            qtbot.waitUntil(lambda: len(server._binary_sockets) == 1, timeout=5000)
+        for seq in range(3):
+            server.grab_data()
+            qtbot.waitUntil(lambda: len(received) == seq + 1, timeout=5000)
+            assert np.array_equal(received[-1][0][0], grabber.frames[seq % len(grabber.frames)])
+    finally:
+        simulator.stop()
+        server.close()
+    assert simulator.error is None
+    summary = grabber.summary()
+    assert summary['throughput']['events'] == 3
+    assert summary['latency_ms']['count'] == 3 and summary['cycle_ms']['count'] == 2
+
+
+def test_simulated_actuator(qtbot):
+    port = get_free_port()
+    server = DAQ_Move_TCPServer()
+    server.settings.child('socket_ip').setValue('localhost')
+    server.settings.child('port_id').setValue(port)
+    server.ini_stage()
+    status = []
+    server.emit_status = status.append
+    actuator = SimulatedActuator('localhost', port)
+    simulator = SimulatorThread([actuator])
+    simulator.start()
+    try:
+        qtbot.waitUntil(lambda: len(server.connected_clients) == 2, timeout=5000)
+        server.move_abs(DataActuator(data=1.5))
+        qtbot.waitUntil(lambda: any(command.command == 'move_done' for command in status), timeout=5000)
+        assert server._current_value.value() == pytest.approx(1.5)
+        server.move_rel(DataActuator(data=-0.5))
+        qtbot.waitUntil(lambda: server._current_value.value() == pytest.approx(1.), timeout=5000)
+    finally:
+        simulator.stop()
+        server.close()
+    assert actuator.summary()['latency_ms']['count'] == 2
+
+
+def test_tcp_server_fan_out(qtbot):
+    port = get_free_port()
+    server = DAQ_2DViewer_TCPServer()
+    server.settings.child('socket_ip').setValue('localhost')
+    server.settings.child('port_id').setValue(port)
+    server.settings.child('fan_out', 'enabled').setValue(True)
+    server.settings.child('fan_out', 'timeout').setValue(300)
+    server.ini_detector()
+    received = []
+    server.dte_signal.connect(received.append)
+    grabbers = [SimulatedGrabber('localhost', port, shape=(16, 8)),
+                SimulatedGrabber('localhost', port, shape=(16, 8), binary=False),
+                SimulatedGrabber('localhost', port, shape=(16, 8), rate=1.)]  # second frame 1s after the first
+    simulator = SimulatorThread(grabbers)
+    simulator.start()
+    try:
+        qtbot.waitUntil(lambda: len(server.connected_clients) == 4 and len(server._binary_sockets) == 2,
+                        timeout=5000)
+        server.grab_data()
+        assert len(received) == 1 and len(received[0]) == 3
+        slow = [index for index, sock in enumerate(server.grabber_sockets())
+                if sock.socket.getpeername() == grabbers[2]._writer.get_extra_info('sockname')][0]
+        server.grab_data()  # the slow grabber times out
+        assert len(received[1]) == 2 and f'TCPServer{slow}' not in received[1].get_names()
+        assert len(server._late) == 1
+        qtbot.wait(800)
+        server.grab_data()  # its late answer is discarded
+        assert len(received[2]) == 2 and len(server._late) == 0
+        assert grabbers[0].throughput.events == 3 and grabbers[2].throughput.events == 2
+        assert np.array_equal(received[2].get_data_from_name('TCPServer0')[0], grabbers[0].frames[2])
+    finally:
+        simulator.stop()
+        server.close()
+
+
+class InfoGrabber(SimulatedGrabber):
+    """Grabber sending infos before each of its frames, as a PyMoDAQ client updating its settings would"""
+
+    async def grab(self):
+        settings = Parameter.create(name='settings', type='group', children=[
+            {'name': 'frames', 'type': 'int', 'value': self.seq}])
+        self.send('Info', 'frame', str(self.seq))
+        self.send('Infos', ioxml.parameter_to_xml_string(settings).decode())
+        await super().grab()
+
+
+def test_tcp_server_fan_out_infos_and_average(qtbot):
+    port = get_free_port()
+    server = DAQ_2DViewer_TCPServer()
+    server.settings.child('socket_ip').setValue('localhost')
+    server.settings.child('port_id').setValue(port)
+    server.settings.child('fan_out', 'enabled').setValue(True)
+    server.ini_detector()
+    received = []
+    server.dte_signal.connect(received.append)
+    grabber, info_grabber = SimulatedGrabber('localhost', port, shape=(16, 8)), InfoGrabber('localhost', port,
+                                                                                            shape=(16, 8))
+    simulators = [SimulatorThread([grabber]), SimulatorThread([info_grabber])]
+    try:
+        simulators[0].start()  # the grabber sending infos connected second, not the one process_cmds would read
+        qtbot.waitUntil(lambda: len(server._binary_sockets) == 1, timeout=5000)
+        simulators[1].start()
+        qtbot.waitUntil(lambda: len(server._binary_sockets) == 2, timeout=5000)
+        for _ in range(2):
+            server.grab_data()
+        assert [len(dte) for dte in received] == [2, 2] and len(server._late) == 0
+        assert server.settings['infos', 'frame'] == '1' and server.settings['settings_client', 'frames'] == 1
+        server.grab_data(Naverage=3)
+        assert len(received[2]) == 2 and grabber.throughput.events == 5
+        expected = np.mean([grabber.frames[seq % len(grabber.frames)] for seq in (2, 3, 4)], axis=0)
+        assert np.allclose(received[2].get_data_from_name('TCPServer0')[0], expected)
+    finally:
+        for simulator in simulators:
+            simulator.stop()
+        server.close()
+    assert all(simulator.error is None for simulator in simulators)
+
+
+@pytest.fixture(scope='module')
+def leco_coordinator():
+    coordinator = CoordinatorThread()
+    try:
+        coordinator.start()
+    except Exception as e:  # a coordinator is already running, from a dashboard for instance
+        pytest.skip(f'Could not start a LECO coordinator: {e}')
+    yield coordinator
+    coordinator.stop()
+
+
+@pytest.mark.parametrize('plugin', ('0D', '1D', '2D', 'move'))
+def test_leco_director_round_trip(qtbot, leco_coordinator, plugin):
+    if plugin == 'move':
+        result = leco.run_actuator(3, leco_coordinator.port)
+    else:
+        result = leco.run_viewer(plugin, 32, 3, leco_coordinator.port)
+        assert result['MB_per_s'] > 0
+    assert result['count'] == 3 and result['rtt_ms_p50'] > 0
+
+
+def test_leco_director_stream(qtbot, leco_coordinator):
+    result = leco.run_viewer('2D', 32, 5, leco_coordinator.port, stream_port=5571, buffer=3)
+    assert result['plugin'] == '2Ds' and result['count'] == 5 and result['MB_per_s'] > 0
+
+
+class RequestCounter:
+    """Stand in for the DetectorDirector of a LECO director, counting the frames requested"""
+
+    def __init__(self):
+        self.requests = 0
+
+    def set_remote_name(self, name):
+        pass
+
+    def send_data(self, grabber_type):
+        self.requests += 1
+
+
+def test_leco_director_prefetch(qtbot, leco_coordinator):
+    director = DAQ_2DViewer_LECODirector()
+    director.settings.child('data_stream', 'prefetch').setValue(True)
+    director.settings.child('data_stream', 'buffer').setValue(3)
+    director.subscriber = FrameSubscriber('tcp://localhost:5572', director.frame_received)  # no publisher
+    director.subscriber.start()
+    director.controller = controller = RequestCounter()
+    received = []
+    director.dte_signal.connect(lambda dte: received.append(dte[0][0][0, 0]))
+    frames = iter(range(100))
+
+    def answer(streamed=True):
+        dte = DataToExport('frame', data=[DataRaw('frame', data=[np.full((2, 2), next(frames))])])
+        if streamed:
+            director.frame_received(dte)
+        else:
+            director.set_data(None, [Serializer().dte_serialization(dte)])
+
+    try:
+        director.grab_data(live=True)  # the actor is not known to publish on the stream yet
+        assert controller.requests == 1
+        answer()
+        qtbot.waitUntil(lambda: received == [0])
+        assert director.streaming
+        director.grab_data(live=True)
+        assert controller.requests == 4
+        for _ in range(3):
+            answer()
+        qtbot.waitUntil(lambda: len(director._buffered) == 2)
+        director.grab_data(live=True)
+        assert received == [0, 1, 2] and controller.requests == 6
+
+        director.grab_data(live=False)  # a snap or a scan step, after a move for instance
+        assert controller.requests == 7 and not director._buffered
+        for _ in range(3):  # the two frames requested by the continuous grab then the one of the snap
+            answer()
+        qtbot.waitUntil(lambda: len(received) == 4)
+        assert received[-1] == 6 and not director._buffered
+
+        director.grab_data(live=True)
+        assert controller.requests == 10
+        answer(streamed=False)  # an actor answering through LECO
+        qtbot.waitUntil(lambda: len(received) == 5)
+        assert not director.streaming
+        director.grab_data(live=True)
+        assert controller.requests == 11
+        for _ in range(3):  # the two frames still requested by the continuous grab then the one of this grab
+            answer(streamed=False)
+        qtbot.waitUntil(lambda: len(received) == 6)
+        assert received[-1] == 10
+
+        director.grab_data(live=True)
+        director.frame_failed(RuntimeError('cannot be decoded'))  # the requested frame is lost
+        qtbot.waitUntil(lambda: controller.requests == 13)  # requested again
+        answer(streamed=False)
+        qtbot.waitUntil(lambda: len(received) == 7)
+    finally:
+        director.close()
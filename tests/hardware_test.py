@@ -0,0 +1,688 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Tests of the virtual instruments of the hardware subpackage
+"""
+import asyncio
+import itertools
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pytest
+
+from pymodaq.utils.data import DataActuator, DataFromPlugins, DataToExport
+from pymodaq.utils.math_utils import gauss1D, gauss2D
+from pymodaq.utils.parameter import Parameter
+from pymodaq.utils.tcp_ip.serializer import Serializer
+
+from pymodaq_plugins_mock.hardware.codecs import decode, encode, payload_size
+from pymodaq_plugins_mock.hardware.frame_stream import TOPIC, FramePublisher, FrameSubscriber
+from pymodaq_plugins_mock.hardware.events import EVENT_DTYPE, EventGenerator, histogram_time, histogram_xy
+from pymodaq_plugins_mock.hardware.faults import FaultInjector, InjectedFault
+from pymodaq_plugins_mock.hardware.frame_tags import FrameChecker, FrameTagger
+from pymodaq_plugins_mock.hardware.instrumentation import PhaseTimer, RollingStats
+from pymodaq_plugins_mock.hardware.noise_bank import NoiseBank
+from pymodaq_plugins_mock.hardware.nd_source import LazyNDSource, MemmapScratch, SeparableNDSource, outer_product
+from pymodaq_plugins_mock.hardware.parallel import ParallelSynthesizer, SharedArray, attach
+from pymodaq_plugins_mock.hardware.prefetch import FramePrefetcher
+from pymodaq_plugins_mock.hardware.sample import AXES, SimulatedSample
+from pymodaq_plugins_mock.hardware.replay import ReplayClock, ReplaySource, parse_shape
+from pymodaq_plugins_mock.hardware.snapshot import snapshot
+from pymodaq_plugins_mock.hardware.shm_transport import SharedFramePublisher, SharedFrameReader
+from pymodaq_plugins_mock.hardware.stats import LatencyHistogram
+from pymodaq_plugins_mock.hardware.tcp_clients import MessageReader
+from pymodaq_plugins_mock.hardware.tcp_frames import FrameReceiver, decode_frames, send_arrays
+from pymodaq_plugins_mock.hardware.wrapper import ActuatorWrapperWithTauMultiAxes
+
+
+def reference_nd_cube(source: LazyNDSource, spatial: np.ndarray, ind_data: int) -> np.ndarray:
+    """Pixel per pixel computation of the ND mock cube as originally done in DAQ_NDViewer_Mock"""
+    time_axis = source.time_axis
+    image = np.zeros(source.shape)
+    ind = 0
+    for indy in range(source.Ny):
+        for indx in range(source.Nx):
+            image[indy, indx, :] = spatial[indy, indx] * gauss1D(time_axis, source.t0, source.dt, source.nt) * \
+                np.sin(np.roll(time_axis, ind) / 4) ** 2
+            ind += 1
+    return np.roll(image, ind_data * source.rolling, axis=1)
+
+
+@pytest.fixture
+def nd_source():
+    source = LazyNDSource(Nx=12, Ny=7, Nt=9)
+    source.x0, source.y0, source.t0 = 6, 3, 4
+    source.dx, source.dy, source.dt = 4, 3, 3
+    source.rolling = 2
+    return source
+
+
+def test_nd_source_chunks_match_reference(nd_source):
+    nd_source.new_frame(ind_data=3)
+    reference = reference_nd_cube(nd_source, nd_source._spatial, 3)
+
+    assert np.allclose(nd_source.chunk(), reference)
+    assert np.allclose(np.concatenate([chunk for _, chunk in nd_source.iter_nav_chunks(3)], axis=0), reference)
+    assert np.allclose(np.concatenate([chunk for _, chunk in nd_source.iter_time_chunks(4)], axis=2), reference)
+    assert np.allclose(nd_source.chunk(slice(2, 5), slice(1, 8, 2), slice(3, None)),
+                       reference[2:5, 1:8:2, 3:])
+
+
+def test_nd_source_spatial_profile(nd_source):
+    nd_source.amp_noise = 0
+    nd_source.new_frame()
+    x_axis = nd_source.x_axis
+    expected = nd_source.amp * gauss2D(x_axis, nd_source.x0, nd_source.dx,
+                                       nd_source.y_axis, nd_source.y0, nd_source.dy) * \
+        np.sin(x_axis / nd_source.wavelength) ** 2
+    assert np.allclose(nd_source._spatial, expected)
+
+
+def test_nd_source_average_into_memmap(nd_source, tmp_path):
+    nd_source.amp_noise = 0
+    scratch = MemmapScratch(tmp_path)
+    emitted = scratch.get_array(nd_source.shape)
+    view = emitted[1:]
+    emitted_path = scratch.path
+    del emitted
+    out = scratch.get_array(nd_source.shape)
+    assert isinstance(out, np.memmap) and scratch.path != emitted_path  # still referenced through its view
+    del view
+    assert scratch.get_array(nd_source.shape).filename == str(emitted_path)  # released, reused
+
+    nd_source.average(3, 0, out, rows=2)
+    frames = []
+    for ind in range(3):
+        nd_source.new_frame(ind)
+        frames.append(nd_source.chunk())
+    assert np.allclose(out, np.mean(frames, axis=0))
+
+    out.flush()
+    path = Path(out.filename)
+    assert np.allclose(np.load(path, mmap_mode='r'), out)
+    scratch.close()
+    assert not path.exists()
+
+
+def test_memmap_scratch_bound(tmp_path):
+    scratch = MemmapScratch(tmp_path, nfiles=2)
+    held = []
+    for ind in range(5):  # none released by its consumers
+        held.append(scratch.get_array((3, 4)))
+        held[-1][:] = ind
+    assert len(list(tmp_path.iterdir())) == 2 and len({array.filename for array in held}) == 5
+    assert all(np.all(array == ind) for ind, array in enumerate(held))  # the dropped ones left to their consumers
+    filenames = [array.filename for array in held]
+    del held[:4]
+    assert scratch.get_array((3, 4)).filename == filenames[3] and len(list(tmp_path.iterdir())) == 2
+    scratch.close()
+    assert not list(tmp_path.iterdir())
+
+
+def test_outer_product():
+    profiles = [np.random.rand(size) for size in (3, 4, 2, 5)]
+    expected = profiles[0][:, None, None, None] * profiles[1][None, :, None, None] * \
+        profiles[2][None, None, :, None] * profiles[3][None, None, None, :]
+    assert np.allclose(outer_product(profiles), expected)
+    assert outer_product([]) == 1 and outer_product([], out=np.zeros(())) == 1
+
+
+def test_separable_nd_source():
+    source = SeparableNDSource((3, 4, 2), (6, 5))
+    source.amp_noise = 0
+    source.set_profile(4, 2, 1, 2)
+    assert source.shape == (3, 4, 2, 6, 5)
+    assert source.nav_indexes == (0, 1, 2)
+    data = source.average(3)
+    assert data.shape == source.shape
+    assert np.allclose(data, source.amp * outer_product(source.profiles))
+    assert np.allclose(data[1, 2, 0, 3, 2], source.amp * np.prod([profile[ind] for profile, ind
+                                                               in zip(source.profiles, (1, 2, 0, 3, 2))]))
+
+
+def test_prefetcher_ownership():
+    generated = []
+
+    def generator(Naverage, previous):
+        frame = np.full((4,), len(generated), dtype=float) if previous is None else previous
+        frame[:] = len(generated) * Naverage
+        generated.append(frame)
+        return frame
+
+    prefetcher = FramePrefetcher(generator, depth=2, hold=1)
+    prefetcher.start()
+    try:
+        leased = prefetcher.get(timeout=5)
+        first = leased.data.copy()
+        # the pool has depth + hold slots, one is leased so only depth frames can be generated ahead
+        time.sleep(0.1)
+        assert len(generated) == 3
+        assert np.allclose(leased.data, first)
+        leased.release()
+
+        data = prefetcher.take(timeout=5)
+        values = data.copy()
+        taken = [prefetcher.take(timeout=5) for _ in range(4)]
+        time.sleep(0.1)
+        assert np.allclose(data, values)  # handed over by take, never given back to the generator
+        assert all(frame is not data for frame in taken)
+
+        prefetcher.get(2, timeout=5).release()
+        frame = prefetcher.take(2, timeout=5)
+        assert frame[0] % 2 == 0
+    finally:
+        prefetcher.stop()
+    assert not prefetcher.is_running
+
+
+def test_prefetcher_paused():
+    settings = dict(value=1)
+
+    def generator(Naverage, previous):
+        time.sleep(0.01)
+        return settings['value']
+
+    prefetcher = FramePrefetcher(generator, depth=3)
+    prefetcher.start()
+    try:
+        prefetcher.take(timeout=5)
+        with prefetcher.paused():
+            settings['value'] = 2
+        # the frames generated with the former settings are discarded
+        assert prefetcher.take(timeout=5) == 2
+    finally:
+        prefetcher.stop()
+
+
+def test_prefetcher_errors():
+    def generator(Naverage, previous):
+        raise ValueError('bad frame')
+
+    prefetcher = FramePrefetcher(generator)
+    prefetcher.start()
+    try:
+        with pytest.raises(ValueError):
+            prefetcher.take(timeout=5)
+    finally:
+        prefetcher.stop()
+    with pytest.raises(RuntimeError):
+        prefetcher.get(timeout=1)
+
+
+@pytest.fixture(scope='module')
+def synthesizer():
+    synthesizer = ParallelSynthesizer()
+    synthesizer.update(True, nworkers=2, nbands=3)
+    yield synthesizer
+    synthesizer.shutdown()
+
+
+def test_shared_array():
+    shared = SharedArray((3, 4), np.int32)
+    shared.array[:] = np.arange(12).reshape((3, 4))
+    array, shm = attach(shared.descriptor)
+    assert np.all(array == shared.array)
+    del array
+    shm.close()
+    shared.close()
+
+
+def test_parallel_mock_2d(synthesizer):
+    settings = dict(Nx=40, Ny=25, Amp=20, x0=10, dx=5, y0=12, dy=6, n=1, amp_noise=0)
+    x_axis = np.linspace(0, 40, 40, endpoint=False)
+    y_axis = np.linspace(0, 25, 25, endpoint=False)
+    expected = 20 * gauss2D(x_axis, 10, 5, y_axis, 12, 6, 1) * np.sin(x_axis / 4) ** 2
+    assert np.allclose(synthesizer.mock_2d(settings, 3), np.roll(expected, 3, axis=1))
+
+
+def test_parallel_average_nd(synthesizer, nd_source, tmp_path):
+    nd_source.amp_noise = 0
+    expected = nd_source.average(3, 2, np.empty(nd_source.shape), rows=2)
+    out = np.empty(nd_source.shape)
+    assert synthesizer.average_nd(nd_source, 3, 2, out, rows=2) is out
+    assert np.allclose(out, expected)
+
+    scratch = MemmapScratch(tmp_path)
+    out = scratch.get_array(nd_source.shape)
+    synthesizer.average_nd(nd_source, 3, 2, out, rows=2)
+    assert np.allclose(out, expected)
+    scratch.close()
+
+
+def test_shared_frame_ring():
+    publisher = SharedFramePublisher(f'mock_test_{time.perf_counter_ns()}', nslots=2)
+    first = publisher.publish(np.arange(12.).reshape((3, 4)), timestamp=10.)
+    reader = SharedFrameReader(publisher.name)
+    try:
+        assert reader.descriptor() == first
+        frame = reader.get(first)
+        assert np.all(frame == np.arange(12.).reshape((3, 4)))
+
+        for value in range(2):
+            publisher.publish(np.full((3, 4), value, dtype=np.int16))
+        assert not reader.is_valid(first)  # the ring has been overwritten
+        assert reader.descriptor(first.seq) is None
+        descriptor, array = reader.read()
+        assert descriptor.seq == 2 and descriptor.dtype == '<i2'
+        assert np.all(array == 1)
+        del frame
+
+        publisher.publish(np.ones((50, 50)))  # does not fit: the ring is recreated
+        assert reader.wait(after=2, timeout=1) == 3
+        assert reader.read()[1].shape == (50, 50)
+    finally:
+        reader.close()
+        publisher.close()
+
+
+def test_shared_frame_ring_names():
+    first, second = SharedFramePublisher(), SharedFramePublisher()
+    assert first.name != second.name  # unique by default
+    other = SharedFramePublisher(first.name)
+    try:
+        first.publish(np.ones((4,)))
+        with pytest.raises(FileExistsError):  # the ring of another publisher is never destroyed
+            other.publish(np.zeros((4,)))
+        reader = SharedFrameReader(first.name)
+        assert np.all(reader.read()[1] == 1)
+        reader.close()
+    finally:
+        for publisher in (first, second, other):
+            publisher.close()
+    with pytest.raises(FileNotFoundError):
+        SharedFrameReader(first.name)
+
+
+def test_binary_frames():
+    sender, receiver_socket = socket.socketpair()
+    receiver = FrameReceiver(nbuffers=2)
+    try:
+        image = np.arange(3 * 1000, dtype='>u2').reshape((3, 1000))
+        send_arrays(sender, [image, np.ones((2, 2))[:, 0]], seq=5, timestamp=12.5)
+        frames = receiver.receive(receiver_socket)
+        assert len(frames) == 2
+        assert np.all(frames[0].array == image) and frames[0].array.dtype == image.dtype
+        assert np.all(frames[1].array == 1) and frames[1].array.shape == (2,)
+        assert frames[0].seq == 5 and frames[0].timestamp == 12.5
+
+        first = frames[0].array
+        for seq in range(3):
+            send_arrays(sender, [(image + seq + 1).astype(image.dtype)], seq=seq)
+        kept = [receiver.receive(receiver_socket)[0].array for _ in range(2)]
+        assert first is not kept[0] and first is not kept[1]
+        assert np.all(first == image)  # never overwritten while used
+        address = kept[0].__array_interface__['data'][0]
+        del frames, first, kept
+        frames = receiver.receive(receiver_socket)
+        assert frames[0].array.__array_interface__['data'][0] == address  # released arrays are received into again
+        assert np.all(frames[0].array == image + 3)
+
+        sender.close()
+        with pytest.raises(ConnectionError):
+            receiver.receive(receiver_socket)
+    finally:
+        receiver_socket.close()
+
+
+@pytest.mark.parametrize('codec', ('none', 'zlib', 'shuffle_zlib'))
+def test_codecs(codec):
+    frame = (np.random.rand(64, 50) * 100 + 1000).astype('<u2')
+    with ThreadPoolExecutor(2) as executor:
+        for pool in (None, executor):
+            payload = encode(frame, codec, block_size=999, executor=pool)
+            if codec != 'none':
+                assert len(payload) == 1 + 7  # table then the blocks of 998 bytes
+                assert payload_size(payload) < frame.nbytes
+            out = decode(b''.join(bytes(buffer) for buffer in payload), codec, np.empty_like(frame), pool)
+            assert np.array_equal(out, frame)
+    with pytest.raises(ValueError):
+        decode(b''.join(bytes(buffer) for buffer in encode(frame, codec)), codec, np.empty((3,)))
+
+
+def test_binary_frames_with_codec():
+    sender, receiver_socket = socket.socketpair()
+    frame = (np.random.rand(40, 30) * 10).astype(np.int32)
+    try:
+        send_arrays(sender, [frame], seq=3, codec='shuffle_zlib', level=6)
+        frames = FrameReceiver().receive(receiver_socket, decode=False)
+        assert frames[0].payload is not None and len(frames[0].payload) < frame.nbytes
+        decoded = decode_frames(frames)
+        assert np.array_equal(decoded[0].array, frame)
+        assert decoded[0].payload is None and decoded[0].seq == 3
+    finally:
+        sender.close()
+        receiver_socket.close()
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram()
+    durations = np.random.default_rng(0).uniform(1e-3, 2e-3, 1000)
+    for duration in durations:
+        histogram.record(duration)
+    histogram.record(1e3)  # beyond the last bin
+    assert histogram.count == 1001
+    assert histogram.percentile(50) == pytest.approx(np.median(durations), rel=0.06)
+    assert histogram.max == 1e3
+    other = LatencyHistogram()
+    other.record(1e-3)
+    histogram.merge(other)
+    assert histogram.summary()['count'] == 1002
+    with pytest.raises(ValueError):
+        histogram.merge(LatencyHistogram(bins_per_decade=10))
+
+
+def test_settings_snapshot():
+    class Snapshot(NamedTuple):
+        Npts: int
+        amp: float
+        dtype: np.dtype
+        use: bool
+
+    settings = Parameter.create(name='settings', type='group', children=[
+        {'name': 'amp', 'type': 'int', 'value': 3},
+        {'name': 'dtype', 'type': 'list', 'value': 'uint16', 'limits': ['float64', 'uint16']},
+        {'name': 'use', 'type': 'bool', 'value': True},
+        {'name': 'axis', 'type': 'group', 'children': [{'name': 'Npts', 'type': 'int', 'value': 12}]}])
+    values = snapshot(Snapshot, settings, dict(Npts=('axis', 'Npts')))
+    assert values == (12, 3., np.dtype('uint16'), True) and isinstance(values.amp, float)
+    settings.child('amp').setValue(5)
+    assert values.amp == 3 and snapshot(Snapshot, settings, dict(Npts=('axis', 'Npts'))).amp == 5
+    with pytest.raises(AttributeError):
+        values.amp = 5
+
+
+def test_rolling_stats():
+    stats = RollingStats(window=4)
+    for duration in range(1, 11):
+        stats.record('model', duration * 1000)
+    stats.record('emit', 500)
+    assert stats.phases == ['model', 'emit']
+    assert stats.counts['model'] == 10 and stats.totals_ns['model'] == 55000
+    np.testing.assert_array_equal(stats.durations('model'), [7000, 8000, 9000, 10000])
+    summary = stats.summary(scale=1e-3)
+    assert summary['model']['mean'] == pytest.approx(8.5) and summary['model']['max'] == pytest.approx(10)
+    assert summary['emit'] == dict(count=1, mean=0.5, p50=0.5, p99=0.5, max=0.5)
+
+
+def test_phase_timer():
+    timer = PhaseTimer()
+    with timer.phase('model'):
+        pass
+    assert timer.stats.phases == []
+    timer.enabled = True
+    with timer.phase('model'):
+        time.sleep(0.002)
+    assert timer.stats.summary()['model']['p50'] >= 2
+    assert timer.emit_periodic_status(print) is None
+    timer.status_interval = 1e-6
+    messages = []
+    time.sleep(0.001)
+    assert timer.emit_periodic_status(messages.append).startswith('Phases (p50/p99 ms): model')
+    assert messages[0].command == 'Update_Status'
+
+
+def test_frame_tags():
+    tagger = FrameTagger()
+    frames = [tagger.tag(DataToExport('frame', data=[DataFromPlugins(name='data', data=[np.zeros((2,))]),
+                                                     DataFromPlugins(name='other', data=[np.zeros((2,))])]),
+                         acquisition_ns=time.time_ns() - 5_000_000) for _ in range(8)]
+    assert [frame[1].seq for frame in frames] == list(range(8))
+    assert frames[0][0].emit_ns - frames[0][0].acquisition_ns >= 5_000_000
+    checker = FrameChecker(max_missing=2)
+    for ind in [0, 1, 3, 2, 2, 7]:  # 2 is late then duplicated, 4 to 6 are missing but only 2 of them remembered
+        checker(frames[ind])
+    checker(DataToExport('untagged', data=[DataFromPlugins(name='data', data=[np.zeros((2,))])]))
+    summary = checker.summary()
+    assert (summary['received'], summary['dropped'], summary['reordered'], summary['duplicated'],
+            summary['untagged']) == (6, 3, 1, 1, 1)
+    assert checker.last_seq == 7
+    assert summary['latency_ms']['min'] >= 5 > summary['transit_ms']['p50']
+
+
+def test_frame_checker_large_gaps():
+    frame = FrameTagger().tag(DataToExport('frame', data=[DataFromPlugins(name='data', data=[np.zeros((2,))])]))
+    checker = FrameChecker(max_missing=100)
+
+    def receive(*seqs):
+        for seq in seqs:
+            frame[0].seq = seq
+            checker(frame)
+
+    tic = time.perf_counter()
+    receive(0, 1_000_000, 999_999, 999_000)  # only the last 100 of the gap remembered, 999_000 being then too old
+    assert time.perf_counter() - tic < 1
+    assert (checker.dropped, checker.reordered, checker.duplicated) == (1_000_000 - 2, 1, 1)
+    for seq in range(1_000_001, 1_002_000, 2):  # every other frame late by one
+        receive(seq + 1, seq)
+    assert (checker.dropped, checker.reordered) == (1_000_000 - 2, 1 + 1000)
+    assert len(checker._missing_order) <= 2 * checker.max_missing
+    receive(1_002_050)
+    assert checker.dropped == 1_000_000 - 2 + 49
+
+
+def test_noise_bank():
+    bank = NoiseBank(frames=4, seed=0)
+    assert bank.draw((3, 5), 2.) is None
+    bank.update(True)
+    noise = bank.draw((3, 5), 2.)
+    assert noise.shape == (3, 5) and not noise.flags.writeable
+    assert np.all(noise >= 0) and np.all(noise < 2) and bank.nbytes == 5 * 15 * 8
+    assert np.max(bank.draw((3, 5), 0.5)) < 0.5 and bank.nbytes == 5 * 15 * 8
+    bank.update(True, frames=2, background=True)
+    assert not bank.is_ready and bank.draw((4,)) is None
+    assert bank.wait(5.) and bank.draw((4,)).shape == (4,) and bank.nbytes == 3 * 4 * 8
+    bank.update(False)
+    assert bank.draw((4,)) is None and bank.nbytes == 0
+
+
+def test_replay_source(tmp_path):
+    frames = np.arange(5 * 2 * 3, dtype=np.uint16).reshape((5, 2, 3))
+    np.save(tmp_path.joinpath('frames.npy'), frames)
+    np.save(tmp_path.joinpath('frames_timestamps.npy'), np.arange(5, dtype=np.int64) * 20_000_000)
+    source = ReplaySource(tmp_path.joinpath('frames.npy'))
+    assert isinstance(source.frames, np.memmap) and (len(source), source.frame_shape) == (5, (2, 3))
+    first = source.read()
+    assert first.index == 0 and first.data.dtype == np.uint16 and np.array_equal(first.data, frames[0])
+    assert source.read(out=first.data).data is first.data
+    averaged = source.read(2)
+    assert (averaged.index, averaged.timestamp) == (3, pytest.approx(0.06))
+    assert np.allclose(averaged.data, frames[2:4].mean(axis=0))
+    assert [source.read().index for _ in range(2)] == [4, 0]
+    source.index = 5
+    with pytest.raises(EOFError):
+        source.read(loop=False)
+
+    frames.tofile(tmp_path.joinpath('raw.bin'))
+    source = ReplaySource(tmp_path.joinpath('raw.bin'), np.uint16, parse_shape('(3,)'), offset=6)
+    assert (len(source), source.timestamps) == (9, None)
+    assert np.array_equal(source.read().data, frames.ravel()[3:6]) and source.read(period=0.5).timestamp == 0.5
+
+    clock = ReplayClock()
+    start = time.perf_counter()
+    for timestamp in (10., 10.02, 10.04, 0., 0.02):
+        clock.wait(timestamp, speed=2.)
+    assert 0.02 <= time.perf_counter() - start < 0.2
+
+    # a long recorded gap, interrupted from another thread
+    threading.Timer(0.05, clock.interrupt).start()
+    start = time.perf_counter()
+    clock.wait(60.)
+    assert time.perf_counter() - start < 5 and clock.interrupted
+    clock.reset()
+    assert not clock.interrupted
+
+
+def test_simulated_sample():
+    sample = SimulatedSample(width=20.)
+    stage, other_stage = ActuatorWrapperWithTauMultiAxes(sample), ActuatorWrapperWithTauMultiAxes(sample)
+    stage.tau = 0.02
+    stage.move_at(40., 'X')
+    other_stage.move_at(90., 'Theta')
+    state = sample.state
+    assert not state.target.flags.writeable and list(state.target) == [40., 0., 90., 0., 0.]
+    times = state.start[0] + np.array([0., 0.01, 1.])
+    positions = sample.positions(times)
+    assert positions.shape == (len(AXES), 3)
+    assert positions[0, 0] == 0. and 0 < positions[0, 1] < 40 and positions[0, 2] == pytest.approx(40., abs=1)
+    time.sleep(0.01)
+    read = stage.get_value('X')
+    assert sample.positions()[0] == pytest.approx(read, abs=stage.get_epsilon('X'))
+    time.sleep(0.01)
+    expected = sample.positions()[0]
+    stage.stop('X')  # held where it stands now, not where it was last read
+    assert sample.state.target[0] == sample.state.init[0] == stage._current_values[0]
+    assert read < expected <= sample.state.target[0] < 40
+    assert sample.signal(times[-1]) == pytest.approx(0., abs=1e-9)
+    sample.hold(['X', 'Theta', 'Power'], [10., 0., 10.])
+    assert sample.signal() == pytest.approx(2 * 0.5 ** (4 * 10 ** 2 / 20 ** 2))
+
+
+def test_event_generator():
+    generator = EventGenerator(rate=1e7, nchannels=3, seed=0)
+    generator.reset(0)
+    events = generator.generate(10_000_000)
+    assert events.dtype == EVENT_DTYPE and len(events) == pytest.approx(1e5, rel=0.02)
+    assert np.all(np.diff(events['timestamp']) >= 0) and 0 <= events['timestamp'][0] <= events['timestamp'][-1] < 1e7
+    assert set(np.unique(events['x'])) == {0, 1, 2} and np.all(events['value'] == 1)
+    counts = histogram_xy(events, (1, 3))
+    assert counts.shape == (1, 3) and counts.sum() == len(events)
+    assert histogram_time(events, 0, 10_000_000, 10) == pytest.approx(np.full((10,), len(events) / 10), rel=0.05)
+    assert len(generator.generate(10_000_000)) == 0
+
+    generator.layout, generator.shape, generator.buffer = 'pixels', (8, 16), 100
+    events = generator.generate(20_000_000)
+    assert len(events) == 100 and generator.dropped == pytest.approx(1e5, rel=0.02)
+    assert np.all(np.abs(events['value']) == 1) and np.all(events['x'] < 16) and np.all(events['y'] < 8)
+    assert histogram_xy(events, (8, 16), weighted=True).sum() == events['value'].sum()
+
+
+def test_fault_injector():
+    def run(injector: FaultInjector, ncalls: int = 200):
+        emitted = []
+        counter = itertools.count()
+        outcomes = [injector.emit(emitted.append, ind, tag=lambda ind: (next(counter), ind)) for ind in range(ncalls)]
+        return outcomes, emitted
+
+    disabled = FaultInjector(drop_probability=1., error_probability=1.)
+    assert run(disabled, 3) == ([True] * 3, [(0, 0), (1, 1), (2, 2)]) and disabled.delay() == 0.
+    disabled.check()
+
+    injector = FaultInjector(True, seed=3, drop_probability=0.2, error_probability=0.1)
+    outcomes, emitted = run(injector)
+    counts = injector.counts
+    assert counts['calls'] == 200 and counts['dropped'] == pytest.approx(50, abs=20)
+    assert counts['errors'] == pytest.approx(25, abs=15) and all(outcomes)
+    # each call emits its data, the dropped or failed frames leaving gaps in the sequence numbers
+    assert [ind for _, ind in emitted] == list(range(200))
+    assert emitted[-1][0] == 199 + counts['dropped'] + counts['errors']
+    injector.update(True, 3, 'none', 1., 0.2, 1., 0., 500., 0.2, 0.1, 0., 5.)
+    assert run(injector) == (outcomes, emitted) and injector.counts == counts  # same seed, same faults
+
+    statuses = []
+    injector.update(True, 0, 'none', 1., 0.2, 1., 0., 500., 1., 0., 0., 5.)
+    assert not injector.emit(emitted.append, 0, statuses.append)
+    assert injector.counts['dropped'] == injector.max_retries + 1 and statuses[-1].command == 'stop'
+
+    injector.update(True, 1, 'fixed', 2., 0.2, 1., 0.5, 10., 0., 1., 0.5, 4.)
+    latencies = [injector.draw_latency() for _ in range(100)]
+    assert set(latencies) == {0.002, 0.012} and injector.counts['stalls'] == pytest.approx(50, abs=15)
+    with pytest.raises(InjectedFault, match='move'):
+        injector.check('move')
+    slowdowns = [injector.slowdown() for _ in range(100)]
+    assert set(slowdowns) == {1., 4.} and injector.counts['slowed'] == slowdowns.count(4.)
+    for distribution, median in (('normal', 2.), ('lognormal', 2.), ('pareto', 2 * 2 ** 0.5)):
+        injector.update(True, 0, distribution, 2., 0.5, 2., 0., 10., 0., 0., 0., 1.)
+        latencies = np.array([injector.draw_latency() for _ in range(2000)]) * 1e3
+        assert np.median(latencies) == pytest.approx(median, rel=0.1) and np.all(latencies >= 0)
+    assert np.min(latencies) >= 2. and np.max(latencies) > 20  # the heavy tail of the pareto distribution
+
+    stage = ActuatorWrapperWithTauMultiAxes(SimulatedSample())
+    stage.tau = 0.01
+    stage.faults.update(True, 0, 'none', 1., 0.2, 1., 0., 500., 0., 0., 1., 10.)
+    stage.move_at(10., 'X')
+    time.sleep(0.03)
+    assert 0. < stage.get_value('X') < 9.  # slowed down ten times, it would otherwise be within 1 µm of the target
+    stage.faults.update(True, 0, 'fixed', 5., 0.2, 1., 0., 500., 0., 1., 0., 1.)
+    start = time.perf_counter()
+    with pytest.raises(InjectedFault):
+        stage.get_value('X')
+    assert time.perf_counter() - start >= 0.005
+
+def test_message_reader():
+    async def read_all(chunks):
+        reader = asyncio.StreamReader()
+        for chunk in chunks:
+            reader.feed_data(chunk)
+        reader.feed_eof()
+        messages = MessageReader(reader)
+        command = await messages.read()
+        position = await messages.read('dwa_deserialization')
+        with pytest.raises(ConnectionError):
+            await messages.read()
+        return command, position
+
+    message = Serializer('move_abs').to_bytes() + Serializer(DataActuator(data=2.5)).to_bytes()
+    command, position = asyncio.run(read_all([message[i:i + 7] for i in range(0, len(message), 7)]))
+    assert command == 'move_abs'
+    assert position.value() == pytest.approx(2.5)
+
+
+def test_frame_stream():
+    received = []
+    publisher = FramePublisher('tcp://127.0.0.1:*')
+    subscriber = FrameSubscriber(publisher.address, received.append)
+    subscriber.start()
+    try:
+        frame = np.arange(12, dtype=np.uint16).reshape(3, 4)
+        dte = DataToExport('test', data=[DataFromPlugins('frame', data=[frame, frame[:, ::-1]], labels=['a', 'b']),
+                                         DataFromPlugins('scalar', data=[np.array([1.5])])])
+        for _ in range(3):
+            publisher.publish(dte)
+        publisher.seq += 2  # as if two frames had been lost
+        publisher.publish(dte)
+        deadline = time.perf_counter() + 5
+        while len(received) < 4 and time.perf_counter() < deadline:
+            time.sleep(0.01)
+    finally:
+        subscriber.stop()
+        publisher.close()
+    assert publisher.subscribers == 1
+    assert [dte[0].seq for dte in received] == [0, 1, 2, 5]
+    assert subscriber.dropped == 2
+    streamed = received[0]
+    assert streamed.get_data_from_name('frame').labels == ['a', 'b']
+    assert np.array_equal(streamed.get_data_from_name('frame')[1], frame[:, ::-1])
+    assert streamed.get_data_from_name('scalar').dim.name == 'Data0D'
+
+
+def test_frame_stream_errors():
+    received, errors = [], []
+
+    def callback(dte):
+        if not received:
+            received.append(None)
+            raise RuntimeError('consumer failure')
+        received.append(dte)
+
+    publisher = FramePublisher('tcp://127.0.0.1:*')
+    subscriber = FrameSubscriber(publisher.address, callback, error_callback=errors.append)
+    subscriber.start()
+    try:
+        dte = DataToExport('test', data=[DataFromPlugins('scalar', data=[np.array([1.5])])])
+        publisher.publish(dte)  # the callback fails
+        publisher.socket.send_multipart([TOPIC, b'not a descriptor'])  # cannot be decoded
+        publisher.publish(dte)
+        deadline = time.perf_counter() + 5
+        while len(received) < 2 and time.perf_counter() < deadline:
+            time.sleep(0.01)
+    finally:
+        subscriber.stop()
+        publisher.close()
+    assert received[1][0].seq == 1 and subscriber.errors == 2  # still receiving after the failures
+    assert isinstance(errors[0], RuntimeError) and subscriber.error is errors[1]
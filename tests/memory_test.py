@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Created the 19/10/2026
+
+Memory footprint and leak tests of the Mock viewers
+"""
+import tracemalloc
+
+import pytest
+
+from pymodaq_plugins_mock.benchmarks import memory
+from pymodaq_plugins_mock.daq_viewer_plugins.plugins_0D.daq_0Dviewer_Mock import DAQ_0DViewer_Mock
+
+
+class LeakingMock(DAQ_0DViewer_Mock):
+    """A 0D Mock keeping all its data, as a plugin accumulating frames by mistake would"""
+
+    def ini_attributes(self):
+        super().ini_attributes()
+        self.history = []
+        self.dte_signal.connect(self.history.append)
+
+
+@pytest.mark.parametrize('dim, size, grabs', [('0D', 1, 500), ('1D', 256, 500), ('2D', 32, 15), ('ND', 16, 10)])
+def test_mock_viewers_do_not_leak(qtbot, dim, size, grabs):
+    result = memory.run_viewer(dim, size, grabs, leak_bytes=32 * 1024)
+    assert not result['leak'], f'{dim} Mock memory grew by {result["growth_bytes"]} bytes over {grabs} grabs'
+    assert result['steady_MB'] > 0 and result['peak_per_grab_MB'] > 0
+
+
+def test_leak_detected(qtbot):
+    tracemalloc.start()
+    plugin = LeakingMock()
+    try:
+        plugin.ini_detector()
+        result = memory.measure(plugin, 500, leak_bytes=32 * 1024)
+    finally:
+        plugin.close()
+        tracemalloc.stop()
+    assert result['leak'] and result['trend_bytes_per_grab'] > 100
+
+
+def test_peak_scales_with_frame_size(qtbot):
+    small, large = (memory.run_viewer('2D', size, 3) for size in (32, 128))
+    frames_MB = (128 * 128 - 32 * 32) * 8 / memory.MB
+    assert large['steady_MB'] - small['steady_MB'] >= frames_MB  # the last emitted frame at least
+    assert large['peak_per_grab_MB'] - small['peak_per_grab_MB'] >= frames_MB